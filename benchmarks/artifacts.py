@@ -0,0 +1,454 @@
+"""
+Synthetic dbt artifacts generator.
+
+Produces manifest.json, run_results.json and catalog.json shaped as dbt 1.7 writes them,
+with configurable amount of models, seeds, sources and generic tests, depth and fan-out of the DAG.
+
+    python -m benchmarks.artifacts --models 1000 --output /tmp/project/target
+"""
+import argparse
+import hashlib
+import json
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+PROJECT = "bench"
+DATABASE = "analytics"
+SCHEMA = "public"
+INVOCATION_ID = "00000000-0000-4000-8000-000000000000"
+GENERATED_AT = "2024-01-01T00:00:00.000000Z"
+
+TEST_TYPES = ("unique", "not_null", "accepted_values", "relationships")
+COLUMN_TYPES = ("integer", "character varying(255)", "numeric(10,2)", "timestamp with time zone", "boolean", "text")
+STATUSES = ("pass", "pass", "pass", "fail", "error")
+
+
+@dataclass
+class ProjectShape:
+    models: int = 100
+    seeds: int = 10
+    sources: int = 10
+    tests_per_model: int = 2
+    columns: int = 8
+    depth: int = 5
+    fan_out: int = 3
+    seed: int = 42
+
+    @classmethod
+    def for_node_count(
+        cls,
+        nodes: int,
+        seeds: Optional[int] = None,
+        sources: Optional[int] = None,
+        tests_per_model: int = 2,
+        **kwargs,
+    ) -> "ProjectShape":
+        """
+        Shape with roughly `nodes` entries in manifest nodes, tests take `tests_per_model` parts of them.
+        Seeds and sources are a tenth of models when not set.
+        """
+        models = max(1, nodes // (tests_per_model + 1))
+        return cls(
+            models=models,
+            seeds=max(1, models // 10) if seeds is None else seeds,
+            sources=max(1, models // 10) if sources is None else sources,
+            tests_per_model=tests_per_model,
+            **kwargs,
+        )
+
+
+def _checksum(value: str) -> dict:
+    return {"name": "sha256", "checksum": hashlib.sha256(value.encode()).hexdigest()}
+
+
+def _columns(names: list[str]) -> dict:
+    return {
+        name: {
+            "name": name,
+            "description": f"Column {name}",
+            "meta": {},
+            "data_type": None,
+            "constraints": [],
+            "quote": None,
+            "tags": [],
+        }
+        for name in names
+    }
+
+
+def _base_node(resource_type: str, name: str, path: str, raw_code: str) -> dict:
+    return {
+        "database": DATABASE,
+        "schema": SCHEMA,
+        "name": name,
+        "resource_type": resource_type,
+        "package_name": PROJECT,
+        "path": path,
+        "original_file_path": f"{resource_type}s/{path}",
+        "unique_id": f"{resource_type}.{PROJECT}.{name}",
+        "fqn": [PROJECT, name],
+        "alias": name,
+        "checksum": _checksum(raw_code),
+        "tags": [],
+        "description": f"Synthetic {resource_type} {name}",
+        "meta": {},
+        "group": None,
+        "docs": {"show": True, "node_color": None},
+        "patch_path": None,
+        "build_path": None,
+        "deferred": False,
+        "unrendered_config": {},
+        "created_at": 1704067200.0,
+        "relation_name": f'"{DATABASE}"."{SCHEMA}"."{name}"',
+        "raw_code": raw_code,
+    }
+
+
+def _model(name: str, parents: list[str], columns: list[str], rng: random.Random) -> dict:
+    refs = [p.split(".")[-1] for p in parents]
+    raw_code = "select\n" + ",\n".join(f"    {c}" for c in columns) + "\nfrom " + " join ".join(
+        f"{{{{ ref('{ref}') }}}}" for ref in refs
+    )
+    node = _base_node("model", name, f"{name}.sql", raw_code)
+    node.update(
+        {
+            "config": {
+                "enabled": True,
+                "alias": None,
+                "schema": None,
+                "database": None,
+                "tags": [],
+                "meta": {},
+                "group": None,
+                "materialized": rng.choice(("table", "view", "incremental")),
+                "incremental_strategy": None,
+                "persist_docs": {},
+                "post-hook": [],
+                "pre-hook": [],
+                "quoting": {},
+                "column_types": {},
+                "full_refresh": None,
+                "unique_key": None,
+                "on_schema_change": "ignore",
+                "on_configuration_change": "apply",
+                "grants": {},
+                "packages": [],
+                "docs": {"show": True, "node_color": None},
+                "contract": {"enforced": False, "alias_types": True},
+                "access": "protected",
+            },
+            "columns": _columns(columns),
+            "language": "sql",
+            "refs": [{"name": ref, "package": None, "version": None} for ref in refs],
+            "sources": [],
+            "metrics": [],
+            "depends_on": {"macros": [], "nodes": parents},
+            "compiled_path": None,
+            "contract": {"enforced": False, "alias_types": True, "checksum": None},
+            "access": "protected",
+            "constraints": [],
+            "version": None,
+            "latest_version": None,
+            "deprecation_date": None,
+        }
+    )
+    return node
+
+
+def _seed(name: str, columns: list[str]) -> dict:
+    node = _base_node("seed", name, f"{name}.csv", "")
+    node.update(
+        {
+            "config": {
+                "enabled": True,
+                "alias": None,
+                "schema": None,
+                "database": None,
+                "tags": [],
+                "meta": {},
+                "group": None,
+                "materialized": "seed",
+                "incremental_strategy": None,
+                "persist_docs": {},
+                "post-hook": [],
+                "pre-hook": [],
+                "quoting": {},
+                "column_types": {},
+                "full_refresh": None,
+                "unique_key": None,
+                "on_schema_change": "ignore",
+                "on_configuration_change": "apply",
+                "grants": {},
+                "packages": [],
+                "docs": {"show": True, "node_color": None},
+                "contract": {"enforced": False, "alias_types": True},
+                "delimiter": ",",
+                "quote_columns": None,
+            },
+            "columns": _columns(columns),
+            "root_path": "/tmp/bench",
+            "depends_on": {"macros": []},
+        }
+    )
+    return node
+
+
+def _source(name: str, columns: list[str]) -> dict:
+    return {
+        "database": "raw",
+        "schema": "landing",
+        "name": name,
+        "resource_type": "source",
+        "package_name": PROJECT,
+        "path": "models/sources.yml",
+        "original_file_path": "models/sources.yml",
+        "unique_id": f"source.{PROJECT}.landing.{name}",
+        "fqn": [PROJECT, "landing", name],
+        "source_name": "landing",
+        "source_description": "",
+        "loader": "",
+        "identifier": name,
+        "quoting": {"database": None, "schema": None, "identifier": None, "column": None},
+        "loaded_at_field": "loaded_at",
+        "freshness": {
+            "warn_after": {"count": 12, "period": "hour"},
+            "error_after": {"count": 24, "period": "hour"},
+            "filter": None,
+        },
+        "external": None,
+        "description": "",
+        "columns": _columns(columns),
+        "meta": {},
+        "source_meta": {},
+        "tags": [],
+        "config": {"enabled": True},
+        "patch_path": None,
+        "unrendered_config": {},
+        "relation_name": f'"raw"."landing"."{name}"',
+        "created_at": 1704067200.0,
+    }
+
+
+def _test(test_type: str, model: dict, column: str, to: dict) -> dict:
+    model_name = model["name"]
+    name = f"{test_type}_{model_name}_{column}"
+    kwargs = {"column_name": column, "model": f"{{{{ get_where_subquery(ref('{model_name}')) }}}}"}
+    parents = [model["unique_id"]]
+
+    if test_type == "accepted_values":
+        kwargs["values"] = ["a", "b", "c"]
+    elif test_type == "relationships":
+        kwargs.update({"to": f"ref('{to['name']}')", "field": "id"})
+        parents.insert(0, to["unique_id"])
+
+    node = _base_node("test", name, f"{name}.sql", f"{{{{ test_{test_type}(**_dbt_generic_test_kwargs) }}}}")
+    node.update(
+        {
+            "unique_id": f"test.{PROJECT}.{name}.{hashlib.md5(name.encode()).hexdigest()[:10]}",
+            "schema": f"{SCHEMA}_dbt_test__audit",
+            "checksum": {"name": "none", "checksum": ""},
+            "original_file_path": "models/schema.yml",
+            "relation_name": None,
+            "test_metadata": {"name": test_type, "kwargs": kwargs, "namespace": None},
+            "config": {
+                "enabled": True,
+                "alias": None,
+                "schema": "dbt_test__audit",
+                "database": None,
+                "tags": [],
+                "meta": {},
+                "group": None,
+                "materialized": "test",
+                "severity": "ERROR",
+                "store_failures": None,
+                "store_failures_as": None,
+                "where": None,
+                "limit": None,
+                "fail_calc": "count(*)",
+                "warn_if": "!= 0",
+                "error_if": "!= 0",
+            },
+            "columns": {},
+            "language": "sql",
+            "refs": [{"name": p.split(".")[-1], "package": None, "version": None} for p in parents],
+            "sources": [],
+            "metrics": [],
+            "depends_on": {"macros": [f"macro.dbt.test_{test_type}"], "nodes": parents},
+            "compiled_path": None,
+            "contract": {"enforced": False, "alias_types": True, "checksum": None},
+            "column_name": column,
+            "file_key_name": f"models.{model_name}",
+            "attached_node": model["unique_id"],
+        }
+    )
+    return node
+
+
+def generate(shape: ProjectShape) -> dict[str, dict]:
+    """
+    :param shape: ProjectShape
+    :return: artifact file name to its content
+    """
+    rng = random.Random(shape.seed)
+    column_names = [f"column_{i}" for i in range(shape.columns)]
+
+    nodes, sources = {}, {}
+    for i in range(shape.sources):
+        source = _source(f"source_{i}", ["id", "loaded_at", *column_names])
+        sources[source["unique_id"]] = source
+
+    for i in range(shape.seeds):
+        seed = _seed(f"seed_{i}", ["id", *column_names])
+        nodes[seed["unique_id"]] = seed
+
+    # Models are spread by layers, each model depends on up to fan_out nodes of the previous layer.
+    layers: list[list[str]] = [[*sources, *nodes]]
+    per_layer = -(-shape.models // max(1, shape.depth))
+    models = []
+    for i in range(shape.models):
+        if i % per_layer == 0:
+            layers.append([])
+
+        upstream = layers[-2]
+        parents = rng.sample(upstream, k=min(len(upstream), rng.randint(1, shape.fan_out)))
+        model = _model(f"model_{i}", parents, ["id", *column_names], rng)
+        nodes[model["unique_id"]] = model
+        layers[-1].append(model["unique_id"])
+        models.append(model)
+
+    for i, model in enumerate(models):
+        for j in range(shape.tests_per_model):
+            test_type = TEST_TYPES[(i + j) % len(TEST_TYPES)]
+            to = models[rng.randrange(len(models))]
+            test = _test(test_type, model, column_names[j % len(column_names)] if column_names else "id", to)
+            nodes[test["unique_id"]] = test
+
+    parent_map = {uid: list(node["depends_on"].get("nodes", [])) for uid, node in nodes.items()}
+    parent_map.update({uid: [] for uid in sources})
+    child_map = {uid: [] for uid in parent_map}
+    for uid, parents in parent_map.items():
+        for parent in parents:
+            child_map[parent].append(uid)
+
+    manifest = {
+        "metadata": {
+            "dbt_schema_version": "https://schemas.getdbt.com/dbt/manifest/v11.json",
+            "dbt_version": "1.7.0",
+            "generated_at": GENERATED_AT,
+            "invocation_id": INVOCATION_ID,
+            "env": {},
+            "project_name": PROJECT,
+            "project_id": hashlib.md5(PROJECT.encode()).hexdigest(),
+            "user_id": None,
+            "send_anonymous_usage_stats": False,
+            "adapter_type": "postgres",
+        },
+        "nodes": nodes,
+        "sources": sources,
+        "macros": {},
+        "docs": {},
+        "exposures": {},
+        "metrics": {},
+        "groups": {},
+        "selectors": {},
+        "disabled": {},
+        "parent_map": parent_map,
+        "child_map": child_map,
+        "group_map": {},
+        "saved_queries": {},
+        "semantic_models": {},
+    }
+
+    results = []
+    for uid in nodes:
+        if not uid.startswith("test."):
+            continue
+        status = rng.choice(STATUSES)
+        results.append(
+            {
+                "status": status,
+                "timing": [
+                    {"name": "compile", "started_at": "2024-01-01T00:00:00.000000Z", "completed_at": "2024-01-01T00:00:00.100000Z"},
+                    {"name": "execute", "started_at": "2024-01-01T00:00:00.100000Z", "completed_at": "2024-01-01T00:00:01.000000Z"},
+                ],
+                "thread_id": "Thread-1",
+                "execution_time": 1.0,
+                "adapter_response": {},
+                "message": None if status == "pass" else f"Got {rng.randint(1, 100)} results, configured to fail if != 0",
+                "failures": 0 if status == "pass" else rng.randint(1, 100),
+                "unique_id": uid,
+                "compiled": True,
+                "compiled_code": "select 1",
+                "relation_name": None,
+            }
+        )
+
+    run_results = {
+        "metadata": {
+            "dbt_schema_version": "https://schemas.getdbt.com/dbt/run-results/v5.json",
+            "dbt_version": "1.7.0",
+            "generated_at": GENERATED_AT,
+            "invocation_id": INVOCATION_ID,
+            "env": {},
+        },
+        "results": results,
+        "elapsed_time": float(len(results)),
+        "args": {"profiles_dir": "/tmp/bench", "which": "test"},
+    }
+
+    catalog_nodes = {}
+    for uid, node in nodes.items():
+        if node["resource_type"] not in ("model", "seed"):
+            continue
+        catalog_nodes[uid] = {
+            "metadata": {"type": "BASE TABLE", "schema": SCHEMA, "name": node["name"], "database": DATABASE, "comment": None, "owner": "bench"},
+            "columns": {
+                name: {"type": COLUMN_TYPES[index % len(COLUMN_TYPES)], "index": index + 1, "name": name, "comment": None}
+                for index, name in enumerate(node["columns"])
+            },
+            "stats": {},
+            "unique_id": uid,
+        }
+
+    catalog = {
+        "metadata": {
+            "dbt_schema_version": "https://schemas.getdbt.com/dbt/catalog/v1.json",
+            "dbt_version": "1.7.0",
+            "generated_at": GENERATED_AT,
+            "invocation_id": INVOCATION_ID,
+            "env": {},
+        },
+        "nodes": catalog_nodes,
+        "sources": {},
+        "errors": None,
+    }
+
+    return {
+        "manifest.json": manifest,
+        "run_results.json": run_results,
+        "catalog.json": catalog,
+    }
+
+
+def write(shape: ProjectShape, target_path: Path) -> Path:
+    target_path.mkdir(parents=True, exist_ok=True)
+    for name, content in generate(shape).items():
+        (target_path / name).write_text(json.dumps(content))
+    return target_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", type=Path, required=True, help="target folder to write artifacts to")
+    for field, default in vars(ProjectShape()).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=default)
+    args = vars(parser.parse_args())
+    output = args.pop("output")
+    write(ProjectShape(**args), output)
+    print(f"Artifacts written to {output}")
+
+
+if __name__ == "__main__":
+    main()
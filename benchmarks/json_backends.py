@@ -0,0 +1,82 @@
+"""
+Parse time and memory of dbt artifacts for each installed JSON backend.
+
+    python -m benchmarks.json_backends --sizes 1000 10000 100000
+"""
+import argparse
+import gc
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+from benchmarks.artifacts import ProjectShape, write
+from odd_dbt.domain import Manifest, RunResults
+from odd_dbt.utils import json_backend
+
+
+def measure(func: Callable[[], Any], repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    return {"seconds": min(timings), "peak_bytes": peak}
+
+
+def run(sizes: list[int], repeat: int) -> list[dict]:
+    report = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            target = write(ProjectShape.for_node_count(size), Path(directory))
+            manifest = target / "manifest.json"
+            run_results = target / "run_results.json"
+
+            def load_sources():
+                sources = Manifest(manifest).sources
+                return [sources[uid] for uid in sources]
+
+            cases = {
+                "manifest.json": lambda: json_backend.loads(manifest.read_bytes()),
+                "manifest.sources": load_sources,
+                "run_results.json": lambda: RunResults(run_results),
+            }
+
+            for backend in json_backend.JSON_BACKENDS:
+                json_backend.set_backend(backend)
+                for case, func in cases.items():
+                    report.append(
+                        {
+                            "nodes": size,
+                            "backend": backend,
+                            "case": case,
+                            "file_bytes": (run_results if case == "run_results.json" else manifest).stat().st_size,
+                            **measure(func, repeat),
+                        }
+                    )
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    json.dump(run(args.sizes, args.repeat), sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Map time and payload size of model metadata, full ModelNode.to_dict() against projections.
+
+    python -m benchmarks.metadata_projection --sizes 1000 10000 --sql-bytes 20000
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from dbt.contracts.graph.nodes import ParsedNode
+from odd_models import MetadataExtension
+
+from benchmarks.artifacts import ProjectShape, write
+from odd_dbt.mapper.metadata import MetadataProjection, get_model_metadata
+from odd_dbt.utils import load_json
+
+SCHEMA_URL = "https://raw.githubusercontent.com/opendatadiscovery/opendatadiscovery-specification/main/specification/extensions/dbt.json#/definitions/DataTransformer"
+
+
+def to_dict_metadata(raw: dict) -> MetadataExtension:
+    """Metadata as it was built before projections"""
+    return MetadataExtension(
+        schema_url=SCHEMA_URL, metadata=ParsedNode._deserialize(raw).to_dict()
+    )
+
+
+def measure(nodes: list[dict], build: Callable[[dict], MetadataExtension], repeat: int) -> dict:
+    timings, payload = [], 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        payload = sum(len(build(raw).json(exclude_none=True)) for raw in nodes)
+        timings.append(time.perf_counter() - started)
+
+    return {"seconds": min(timings), "payload_bytes": payload}
+
+
+def run(sizes: list[int], sql_bytes: int, repeat: int) -> list[dict]:
+    cases: dict[str, Callable[[dict], MetadataExtension]] = {
+        "to_dict": to_dict_metadata,
+        **{
+            f"projection:{name}": lambda raw, p=projection: get_model_metadata(raw, p)
+            for name, projection in {
+                "minimal": MetadataProjection.from_options(["minimal"]),
+                "default": MetadataProjection.from_options(),
+                "default+hash": MetadataProjection.from_options(hash_text=True),
+                "full": MetadataProjection.from_options(["full"]),
+            }.items()
+        },
+    }
+
+    report = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            target = write(ProjectShape.for_node_count(size), Path(directory))
+            manifest = load_json(target / "manifest.json")
+
+        models = [
+            node for node in manifest["nodes"].values() if node["resource_type"] == "model"
+        ]
+        # Real models are much longer than generated ones
+        for node in models:
+            padding = sql_bytes - len(node["raw_code"])
+            if padding > 0:
+                node["raw_code"] += "\n--" + "x" * padding
+            node["compiled_code"] = node["raw_code"]
+
+        for case, build in cases.items():
+            report.append(
+                {"nodes": size, "models": len(models), "case": case, **measure(models, build, repeat)}
+            )
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--sql-bytes", type=int, default=10_000, help="size of raw and compiled code of each model")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    json.dump(run(args.sizes, args.sql_bytes, args.repeat), sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
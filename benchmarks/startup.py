@@ -0,0 +1,84 @@
+"""
+CLI startup time, measured by python -X importtime, checked against a budget.
+
+    python -m benchmarks.startup
+
+Budget is BUDGET_MS unless --budget-ms is given, CI and tests use the default.
+
+Exits with code 1 when import of odd_dbt.app takes longer than the budget
+or loads any of heavy packages, which commands must import on call only.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+MODULE = "odd_dbt.app"
+BUDGET_MS = 1000
+HEAVY_PACKAGES = ("dbt", "odd_models", "oddrn_generator", "pydantic", "sqlalchemy", "requests")
+
+
+def import_time(module: str) -> tuple[int, set[str]]:
+    """
+    :return: cumulative import time of module in microseconds and top level packages it loaded
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total, packages = 0, set()
+    for line in process.stderr.splitlines()[1:]:
+        _, cumulative, name = (part.strip() for part in line.split("|"))
+        packages.add(name.split(".")[0])
+        if name == module:
+            total = int(cumulative)
+
+    return total, packages
+
+
+def help_time() -> float:
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", MODULE, "--help"], capture_output=True, check=True
+    )
+    return time.perf_counter() - started
+
+
+def run(repeat: int) -> dict:
+    timings, packages = [], set()
+    for _ in range(repeat):
+        total, packages = import_time(MODULE)
+        timings.append(total)
+
+    return {
+        "module": MODULE,
+        "import_ms": min(timings) / 1000,
+        "help_seconds": min(help_time() for _ in range(repeat)),
+        "heavy_packages": sorted(packages.intersection(HEAVY_PACKAGES)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help="max import time of the CLI module")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    report = run(args.repeat)
+    report["budget_ms"] = args.budget_ms
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+    if report["heavy_packages"]:
+        sys.exit(f"{MODULE} imports {', '.join(report['heavy_packages'])} on startup")
+
+    if report["import_ms"] > args.budget_ms:
+        sys.exit(f"{MODULE} import takes {report['import_ms']:.0f}ms, budget is {args.budget_ms:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
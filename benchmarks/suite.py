@@ -0,0 +1,201 @@
+"""
+Time, peak memory and payload size of the ingestion pipeline stages on synthetic dbt projects.
+
+    python -m benchmarks.suite --sizes 1000 10000 --output report.json
+    python -m benchmarks.suite --sizes 1000 10000 --baseline report.json --max-slowdown 20
+
+Each stage is measured apart: manifest.json load, test results and lineage mapping on loaded artifacts,
+serialization of mapped entities. Report is JSON, --baseline compares it with a report of another commit.
+"""
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from benchmarks.artifacts import DATABASE, ProjectShape, write
+from odd_dbt import get_version
+from odd_dbt.domain import Manifest
+from odd_dbt.domain.context import ArtifactCache, OfflineDbtContext
+from odd_dbt.libs import odd
+from odd_dbt.logger import logger
+from odd_dbt.mapper.lineage import DbtLineageMapper
+from odd_dbt.mapper.test_results import DbtTestMapper
+
+DBT_ODDRN = "//dbt/host/localhost"
+
+
+def measure(
+    func: Callable[[Any], Any], setup: Callable[[], Any], repeat: int
+) -> tuple[dict, Any]:
+    """
+    :param setup: prepares an argument of func, it is not measured
+    :return: best time, peak memory of func and its last result
+    """
+    timings = []
+    for _ in range(repeat):
+        argument = setup()
+        gc.collect()
+        started = time.perf_counter()
+        func(argument)
+        timings.append(time.perf_counter() - started)
+
+    argument = setup()
+    gc.collect()
+    tracemalloc.start()
+    result = func(argument)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"seconds": min(timings), "peak_bytes": peak}, result
+
+
+def create_context(target: Path) -> OfflineDbtContext:
+    """Context with decoded artifacts and a cache of its own, so each run deserializes nodes again"""
+    context = OfflineDbtContext(
+        project_dir=target.parent,
+        credentials={"host": "localhost", "database": DATABASE},
+        target_path=target,
+        cache=ArtifactCache(),
+    )
+    context.manifest.raw_nodes
+    context.run_results
+    context.catalog
+    return context
+
+
+def run(
+    shape: ProjectShape,
+    sizes: list[int],
+    repeat: int,
+    workers: int,
+    seeds: Optional[int] = None,
+    sources: Optional[int] = None,
+) -> list[dict]:
+    """
+    :param shape: fields of projects, except of counts of models, seeds and sources which follow sizes
+    :param seeds: seeds of each project, a tenth of models when None
+    :param sources: sources of each project, a tenth of models when None
+    """
+    generator = odd.create_dbt_generator_from_oddrn(oddrn=DBT_ODDRN)
+    shape_fields = {key: value for key, value in vars(shape).items() if key not in ("models", "seeds", "sources")}
+    shape_fields.update(seeds=seeds, sources=sources)
+
+    report = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            target = write(ProjectShape.for_node_count(size, **shape_fields), Path(directory) / "target")
+            manifest = target / "manifest.json"
+
+            def add(case: str, stats: dict, **extra) -> None:
+                report.append({"nodes": size, "case": case, **stats, **extra})
+
+            stats, _ = measure(lambda _: Manifest(manifest).raw_nodes, lambda: None, repeat)
+            add("manifest_load", stats, file_bytes=manifest.stat().st_size)
+
+            stats, tests = measure(
+                lambda context: DbtTestMapper(context=context, generator=generator, workers=workers).map(),
+                lambda: create_context(target),
+                repeat,
+            )
+            add("test_mapper", stats, entities=len(tests.items))
+
+            stats, lineage = measure(
+                lambda context: DbtLineageMapper(context=context, generator=generator, workers=workers).map(),
+                lambda: create_context(target),
+                repeat,
+            )
+            add("lineage_mapper", stats, entities=len(lineage.items))
+
+            for case, entities in (("test_payload", tests), ("lineage_payload", lineage)):
+                stats, payload = measure(lambda e: e.json(exclude_none=True), lambda e=entities: e, repeat)
+                add(case, stats, payload_bytes=len(payload.encode()))
+
+    return report
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list[dict], baseline: list[dict]) -> dict[tuple[int, str], float]:
+    """
+    :return: change of time against baseline in percents, by nodes count and case
+    """
+    previous = {(item["nodes"], item["case"]): item for item in baseline}
+    changes = {}
+    for item in results:
+        if base := previous.get((item["nodes"], item["case"])):
+            changes[item["nodes"], item["case"]] = (item["seconds"] / base["seconds"] - 1) * 100
+            print(
+                f"{item['case']:>16} {item['nodes']:>8} nodes: {base['seconds']:.3f}s -> {item['seconds']:.3f}s "
+                f"({changes[item['nodes'], item['case']]:+.1f}%), peak {base['peak_bytes']} -> {item['peak_bytes']} bytes",
+                file=sys.stderr,
+            )
+    return changes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000], help="approximate manifest nodes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1, help="processes mapping nodes and results")
+    parser.add_argument("--seeds", type=int, help="seeds of each project, a tenth of models by default")
+    parser.add_argument("--sources", type=int, help="sources of each project, a tenth of models by default")
+    for field in ("tests_per_model", "columns", "depth", "fan_out", "seed"):
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=getattr(ProjectShape, field))
+    parser.add_argument("--output", type=Path, help="file to write the report to, stdout by default")
+    parser.add_argument("--baseline", type=Path, help="report of another commit to compare with")
+    parser.add_argument("--max-slowdown", type=float, help="exit with code 1 when any case is slower by more percents")
+    args = parser.parse_args()
+
+    # Mapping warnings of synthetic artifacts are not interesting here
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    shape = ProjectShape(
+        tests_per_model=args.tests_per_model,
+        columns=args.columns,
+        depth=args.depth,
+        fan_out=args.fan_out,
+        seed=args.seed,
+    )
+    report = {
+        "commit": git_commit(),
+        "version": get_version(),
+        "python": platform.python_version(),
+        "workers": args.workers,
+        "shape": {
+            **{key: value for key, value in vars(shape).items() if key not in ("models", "seeds", "sources")},
+            "seeds": args.seeds,
+            "sources": args.sources,
+        },
+        "results": run(shape, args.sizes, args.repeat, args.workers, args.seeds, args.sources),
+    }
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        changes = compare(report["results"], json.loads(args.baseline.read_text())["results"])
+        slow = [key for key, change in changes.items() if args.max_slowdown is not None and change > args.max_slowdown]
+        if slow:
+            sys.exit(f"Slower than baseline by more than {args.max_slowdown}%: {slow}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,146 @@
 import contextlib
+import functools
+import time
 import traceback
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, List, Optional
 
 import typer
-from dbt.cli.params import default_profiles_dir, default_project_dir
 
-from odd_dbt import config
 from odd_dbt import errors
 from odd_dbt import get_version
+from odd_dbt.defaults import (
+    BACKFILL_CHECKPOINT_FILE,
+    FULL_PROFILE,
+    MAX_BATCH_ENTITIES,
+    MAX_TEXT_LENGTH,
+    METADATA_PROFILES,
+    RETRIES,
+    SAMPLE_CONCURRENCY,
+    SAMPLE_MAX_BYTES,
+    SAMPLE_MAX_ROWS,
+    SAMPLE_ROWS,
+    STREAM_BATCH_SIZE,
+    STREAM_INTERVAL,
+)
 from odd_dbt.logger import logger
-from odd_dbt.mapper.test_results import DbtTestMapper
-from odd_dbt.mapper.lineage import DbtLineageMapper
-from odd_dbt.libs import odd, dbt
-from odd_dbt.service import odd as odd_api
-from odd_dbt.service.dbt import run_tests, CliArgs
+from odd_dbt.service.state import FRESHNESS_STATE_FILE, STATE_FILE
+from odd_dbt.service.watch import DEBOUNCE, INTERVAL
+from odd_dbt.utils.paths import default_profiles_dir, default_project_dir
+
+if TYPE_CHECKING:
+    from odd_dbt.domain.context import DbtContext
+
+# dbt, odd_models and mappers take seconds to import,
+# commands import them on call, so --help and light commands start fast
 
 app = typer.Typer(
     short_help="Run dbt tests and inject results to ODD platform",
     pretty_exceptions_show_locals=False,
 )
 
+# Options shared by commands
+PROJECT_DIR_OPTION = typer.Option(default=default_project_dir())
+PROFILES_DIR_OPTION = typer.Option(default=default_profiles_dir())
+TARGET_OPTION = typer.Option(default=None)
+PROFILE_OPTION = typer.Option(default=None)
+HOST_OPTION = typer.Option(None, "--host", "-h", envvar="ODD_PLATFORM_HOST")
+TOKEN_OPTION = typer.Option(None, "--token", "-t", envvar="ODD_PLATFORM_TOKEN")
+REQUIRED_HOST_OPTION = typer.Option(..., "--host", "-h", envvar="ODD_PLATFORM_HOST")
+REQUIRED_TOKEN_OPTION = typer.Option(..., "--token", "-t", envvar="ODD_PLATFORM_TOKEN")
+DBT_ODDRN_OPTION = typer.Option(
+    ..., "--dbt-oddrn", "-oddrn", envvar="DBT_DATA_SOURCE_ODDRN"
+)
+CONCURRENCY_OPTION = typer.Option(
+    default=1, envvar="ODD_INGESTION_CONCURRENCY", help="Batches sent at a time"
+)
+RETRIES_OPTION = typer.Option(
+    default=RETRIES, help="Retries of a batch failed by transient error"
+)
+STATE_PATH_OPTION = typer.Option(
+    default=None,
+    help=f"File with hashes of ingested entities. Default: <target-path>/{STATE_FILE}",
+)
+FULL_REFRESH_OPTION = typer.Option(
+    default=False, help="Ingest all entities, even if they didn't change"
+)
+SELECT_OPTION = typer.Option(
+    None, "--select", "-s", help="dbt node selectors of nodes to ingest"
+)
+EXCLUDE_OPTION = typer.Option(None, help="dbt node selectors of nodes to skip")
+STATE_OPTION = typer.Option(
+    default=None, help="Directory with manifest.json for state:modified selector"
+)
+WORKERS_OPTION = typer.Option(
+    default=1, envvar="ODD_MAPPING_WORKERS", help="Processes mapping nodes and results"
+)
+OUTPUT_OPTION = typer.Option(
+    default=None,
+    help="Write entities to NDJSON file instead of sending them, .gz and .zst files are compressed",
+)
+PROFILE_PHASES_OPTION = typer.Option(
+    default=False,
+    help="Print wall time, CPU time, peak RSS growth and counters of each phase",
+)
+PROFILE_OUTPUT_OPTION = typer.Option(
+    default=None, help="Write profile of phases to JSON file"
+)
+PROFILE_MAPPING_OPTION = typer.Option(
+    default=None,
+    help="Dump cProfile stats of mapping to file, pyinstrument report for .html file",
+)
+SAMPLE_FAILURES_OPTION = typer.Option(
+    default=False,
+    help="Add rows of failed tests, stored by dbt store_failures, to test runs metadata",
+)
+FAILURES_DB_URL_OPTION = typer.Option(
+    default=None,
+    envvar="ODD_DBT_FAILURES_DB_URL",
+    help="SQLAlchemy URL of the database with stored failures. Default: built from dbt profile",
+)
+SAMPLE_ROWS_OPTION = typer.Option(
+    default=SAMPLE_ROWS, help="Rows sampled of each failed test"
+)
+SAMPLE_MAX_ROWS_OPTION = typer.Option(
+    default=SAMPLE_MAX_ROWS, help="Rows sampled of all failed tests"
+)
+SAMPLE_MAX_BYTES_OPTION = typer.Option(
+    default=SAMPLE_MAX_BYTES, help="Bytes of JSON rows sampled of all failed tests"
+)
+SAMPLE_CONCURRENCY_OPTION = typer.Option(
+    default=SAMPLE_CONCURRENCY, help="Queries of stored failures run at a time"
+)
+OFFLINE_OPTION = typer.Option(
+    default=False, help="Read dbt artifacts only, without profiles.yml and dbt adapter"
+)
+TARGET_PATH_OPTION = typer.Option(
+    default=None,
+    help="Folder with artifacts for --offline. Default: target-path of dbt_project.yml",
+)
+ADAPTER_CONFIG_OPTION = typer.Option(
+    default=None,
+    help="YAML file with adapter_type, host, account and database for --offline",
+)
+ADAPTER_HOST_OPTION = typer.Option(
+    default=None, envvar="ODD_DBT_ADAPTER_HOST", help="Database host for --offline"
+)
+ADAPTER_ACCOUNT_OPTION = typer.Option(
+    default=None, envvar="ODD_DBT_ADAPTER_ACCOUNT", help="Snowflake account for --offline"
+)
+ADAPTER_DATABASE_OPTION = typer.Option(
+    default=None, envvar="ODD_DBT_ADAPTER_DATABASE", help="Database name for --offline"
+)
+METADATA_FIELDS_OPTION = typer.Option(
+    None,
+    help=f"Node fields or profiles ({', '.join([*METADATA_PROFILES, FULL_PROFILE])}) kept in metadata",
+)
+METADATA_MAX_TEXT_OPTION = typer.Option(
+    default=MAX_TEXT_LENGTH, help="Longer text fields, i.e. SQL code, are truncated"
+)
+METADATA_HASH_TEXT_OPTION = typer.Option(
+    default=False, help="Store sha256 of long text fields instead of truncating"
+)
+
 
 @contextlib.contextmanager
 def handle_errors():
@@ -32,41 +152,246 @@ def handle_errors():
         raise typer.Exit(1)
 
 
+def profiled(command: Callable) -> Callable:
+    """Profiles phases of the command, enabled by its --profile-phases and --profile-output options"""
+
+    @functools.wraps(command)
+    def wrapper(**kwargs):
+        from odd_dbt.utils import profiling
+
+        with profiling.profile_phases(kwargs["profile_phases"], kwargs["profile_output"]):
+            return command(**kwargs)
+
+    return wrapper
+
+
+def check_destination(
+    platform_host: Optional[str], platform_token: Optional[str], output: Optional[Path]
+) -> None:
+    if output is None and not (platform_host and platform_token):
+        raise typer.BadParameter("--host and --token are required, unless --output is set")
+
+
+def get_context(
+    project_dir: Path,
+    profiles_dir: Path,
+    profile: Optional[str],
+    target: Optional[str],
+    offline: bool = False,
+    target_path: Optional[Path] = None,
+    adapter_config: Optional[Path] = None,
+    adapter_host: Optional[str] = None,
+    adapter_account: Optional[str] = None,
+    adapter_database: Optional[str] = None,
+) -> "DbtContext":
+    """Context of dbt project, or of its artifacts only with --offline"""
+    from odd_dbt.domain.cli_args import CliArgs
+    from odd_dbt.libs import dbt
+
+    if offline:
+        return dbt.get_offline_context(
+            project_dir,
+            target_path,
+            adapter_config,
+            host=adapter_host,
+            account=adapter_account,
+            database=adapter_database,
+        )
+
+    cli_args = CliArgs(
+        project_dir=project_dir,
+        profiles_dir=profiles_dir,
+        profile=profile,
+        target=target,
+        threads=1,
+        vars={},
+    )
+    return dbt.get_context(cli_args=cli_args)
+
+
 @app.command()
+@profiled
 def test(
-    project_dir: Path = typer.Option(default=default_project_dir()),
-    profiles_dir: Path = typer.Option(default=default_profiles_dir()),
-    target: Optional[str] = typer.Option(default=None),
-    profile: Optional[str] = typer.Option(default=None),
-    platform_host: str = typer.Option(..., "--host", "-h", envvar="ODD_PLATFORM_HOST"),
-    platform_token: str = typer.Option(
-        ..., "--token", "-t", envvar="ODD_PLATFORM_TOKEN"
+    project_dir: Path = PROJECT_DIR_OPTION,
+    profiles_dir: Path = PROFILES_DIR_OPTION,
+    target: Optional[str] = TARGET_OPTION,
+    profile: Optional[str] = PROFILE_OPTION,
+    platform_host: Optional[str] = HOST_OPTION,
+    platform_token: Optional[str] = TOKEN_OPTION,
+    dbt_data_source_oddrn: str = DBT_ODDRN_OPTION,
+    output: Optional[Path] = OUTPUT_OPTION,
+    concurrency: int = CONCURRENCY_OPTION,
+    retries: int = RETRIES_OPTION,
+    state_path: Optional[Path] = STATE_PATH_OPTION,
+    full_refresh: bool = FULL_REFRESH_OPTION,
+    select: Optional[List[str]] = SELECT_OPTION,
+    exclude: Optional[List[str]] = EXCLUDE_OPTION,
+    state: Optional[Path] = STATE_OPTION,
+    workers: int = WORKERS_OPTION,
+    threads: Optional[int] = typer.Option(
+        default=None, help="dbt threads running tests. Default: threads of dbt profile"
     ),
-    dbt_data_source_oddrn: str = typer.Option(
-        ..., "--dbt-oddrn", "-oddrn", envvar="DBT_DATA_SOURCE_ODDRN"
+    stream: bool = typer.Option(
+        default=False,
+        help="Run dbt in this process and ingest test results by batches while tests are running",
     ),
+    stream_batch_size: int = typer.Option(
+        default=STREAM_BATCH_SIZE, help="Test results ingested at once with --stream"
+    ),
+    stream_interval: float = typer.Option(
+        default=STREAM_INTERVAL,
+        help="Max seconds a finished test waits for its batch with --stream",
+    ),
+    sample_failures: bool = SAMPLE_FAILURES_OPTION,
+    failures_db_url: Optional[str] = FAILURES_DB_URL_OPTION,
+    sample_rows: int = SAMPLE_ROWS_OPTION,
+    sample_max_rows: int = SAMPLE_MAX_ROWS_OPTION,
+    sample_max_bytes: int = SAMPLE_MAX_BYTES_OPTION,
+    sample_concurrency: int = SAMPLE_CONCURRENCY_OPTION,
+    profile_phases: bool = PROFILE_PHASES_OPTION,
+    profile_output: Optional[Path] = PROFILE_OUTPUT_OPTION,
+    profile_mapping: Optional[Path] = PROFILE_MAPPING_OPTION,
 ):
+    from odd_dbt import config
+    from odd_dbt.libs import dbt, odd
+    from odd_dbt.mapper.test_results import DbtTestMapper
+    from odd_dbt.service import odd as odd_api
+    from odd_dbt.service.dbt import CliArgs, run_tests, stream_tests
+    from odd_dbt.service.export import EntityWriter, write_entities
+    from odd_dbt.service.failures import create_sampler, failed_tests, sample_failed_tests
+    from odd_dbt.service.state import IngestionState
+    from odd_dbt.utils import profiling
+
+    check_destination(platform_host, platform_token, output)
+
     logger.info(f"Used OpenDataDiscovery dbt version: {get_version()}")
     cli_args = CliArgs(
         project_dir=project_dir,
         profiles_dir=profiles_dir,
         profile=profile,
         target=target,
-        threads=1,
+        threads=threads,
         vars={},
     )
 
+    if stream:
+        with handle_errors():
+            context = dbt.get_context(cli_args=cli_args)
+            generator = odd.create_dbt_generator_from_oddrn(oddrn=dbt_data_source_oddrn)
+            # Entities written to --output are not diffed against ingested ones
+            ingestion_state, client = None, None
+            if not output:
+                ingestion_state = IngestionState(state_path or context.target_path / STATE_FILE)
+                client = config.create_odd_client(
+                    host=platform_host, token=platform_token, pool_size=concurrency
+                )
+
+            sampler = None
+            if sample_failures:
+                sampler = create_sampler(
+                    context,
+                    failures_db_url,
+                    sample_rows,
+                    sample_max_rows,
+                    sample_max_bytes,
+                    sample_concurrency,
+                )
+
+            # dbt runs only tests selected by the same selectors, results are not filtered again
+            failed = 0
+            with profiling.profiler.span("dbt.test"), (
+                EntityWriter(output) if output else contextlib.nullcontext()
+            ) as writer, sampler or contextlib.nullcontext(), profiling.ProfileDump(
+                profile_mapping
+            ) as mapping_profile:
+                for run_results in stream_tests(
+                    cli_args=cli_args,
+                    select=select,
+                    exclude=exclude,
+                    state=state,
+                    batch_size=stream_batch_size,
+                    interval=stream_interval,
+                ):
+                    context.use_run_results(run_results)
+                    try:
+                        samples = sampler.sample(failed_tests(context)) if sampler else None
+                        with mapping_profile.part():
+                            data_entities = DbtTestMapper(
+                                context=context,
+                                generator=generator,
+                                workers=workers,
+                                samples=samples,
+                            ).map()
+                        if writer:
+                            with profiling.profiler.span("write"):
+                                writer.write(data_entities)
+                            continue
+
+                        odd_api.ingest_changed_entities(
+                            data_entities,
+                            client,
+                            state=ingestion_state,
+                            full_refresh=full_refresh,
+                            concurrency=concurrency,
+                            retries=retries,
+                        )
+                    except Exception as e:
+                        # Keep ingesting next batches, tests are still running
+                        failed += 1
+                        logger.debug(traceback.format_exc())
+                        logger.error(f"Batch of {len(run_results.results)} test results: {e}")
+
+            if failed:
+                raise ValueError(f"{failed} batches of test results were not ingested")
+        return
+
     try:
-        run_tests(cli_args=cli_args)
+        with profiling.profiler.span("dbt.test"):
+            run_tests(cli_args=cli_args, select=select, exclude=exclude, state=state)
         context = dbt.get_context(cli_args=cli_args)
-        client = config.create_odd_client(host=platform_host, token=platform_token)
+        with profiling.profiler.span("select"):
+            selected = dbt.select_nodes(context, select, exclude, state)
         generator = odd.create_dbt_generator_from_oddrn(oddrn=dbt_data_source_oddrn)
-        data_entities = DbtTestMapper(context=context, generator=generator).map()
+        samples = None
+        if sample_failures:
+            samples = sample_failed_tests(
+                context,
+                selected,
+                failures_db_url,
+                sample_rows,
+                sample_max_rows,
+                sample_max_bytes,
+                sample_concurrency,
+            )
+        with profiling.dump_profile(profile_mapping):
+            data_entities = DbtTestMapper(
+                context=context,
+                generator=generator,
+                selected=selected,
+                workers=workers,
+                samples=samples,
+            ).map()
+        logger.debug(f"Artifacts: {context.artifact_cache}")
+
+        if output:
+            with profiling.profiler.span("write"):
+                write_entities(data_entities, output)
+            return
 
-        odd_api.ingest_entities(data_entities, client)
+        client = config.create_odd_client(
+            host=platform_host, token=platform_token, pool_size=concurrency
+        )
+        odd_api.ingest_changed_entities(
+            data_entities,
+            client,
+            state=IngestionState(state_path or context.target_path / STATE_FILE),
+            full_refresh=full_refresh,
+            concurrency=concurrency,
+            retries=retries,
+        )
     except errors.DbtTestCommandError as e:
         logger.error(e)
-        typer.Exit(2)
+        raise typer.Exit(2)
     except Exception as e:
         logger.debug(traceback.format_exc())
         logger.error(e)
@@ -77,11 +402,12 @@ def test(
 def create_datasource(
     data_source_name=typer.Option(..., "--name", "-n"),
     dbt_host: str = typer.Option(default="localhost"),
-    platform_host: str = typer.Option(..., "--host", "-h", envvar="ODD_PLATFORM_HOST"),
-    platform_token: str = typer.Option(
-        ..., "--token", "-t", envvar="ODD_PLATFORM_TOKEN"
-    ),
+    platform_host: str = REQUIRED_HOST_OPTION,
+    platform_token: str = REQUIRED_TOKEN_OPTION,
 ):
+    from odd_dbt import config
+    from odd_dbt.service import odd as odd_api
+
     with handle_errors():
         client = config.create_odd_client(host=platform_host, token=platform_token)
         oddrn = odd_api.create_datasource(data_source_name, dbt_host, client)
@@ -94,65 +420,614 @@ def create_datasource(
 
 
 @app.command()
+@profiled
 def ingest_test(
-    project_dir: Path = typer.Option(default=default_project_dir()),
-    profiles_dir: Path = typer.Option(default=default_profiles_dir()),
-    target: Optional[str] = typer.Option(default=None),
-    profile: Optional[str] = typer.Option(default=None),
-    platform_host: str = typer.Option(..., "--host", "-h", envvar="ODD_PLATFORM_HOST"),
-    platform_token: str = typer.Option(
-        ..., "--token", "-t", envvar="ODD_PLATFORM_TOKEN"
+    project_dir: Path = PROJECT_DIR_OPTION,
+    profiles_dir: Path = PROFILES_DIR_OPTION,
+    target: Optional[str] = TARGET_OPTION,
+    profile: Optional[str] = PROFILE_OPTION,
+    platform_host: Optional[str] = HOST_OPTION,
+    platform_token: Optional[str] = TOKEN_OPTION,
+    dbt_data_source_oddrn: str = DBT_ODDRN_OPTION,
+    output: Optional[Path] = OUTPUT_OPTION,
+    concurrency: int = CONCURRENCY_OPTION,
+    retries: int = RETRIES_OPTION,
+    state_path: Optional[Path] = STATE_PATH_OPTION,
+    full_refresh: bool = FULL_REFRESH_OPTION,
+    select: Optional[List[str]] = SELECT_OPTION,
+    exclude: Optional[List[str]] = EXCLUDE_OPTION,
+    state: Optional[Path] = STATE_OPTION,
+    workers: int = WORKERS_OPTION,
+    offline: bool = OFFLINE_OPTION,
+    target_path: Optional[Path] = TARGET_PATH_OPTION,
+    adapter_config: Optional[Path] = ADAPTER_CONFIG_OPTION,
+    adapter_host: Optional[str] = ADAPTER_HOST_OPTION,
+    adapter_account: Optional[str] = ADAPTER_ACCOUNT_OPTION,
+    adapter_database: Optional[str] = ADAPTER_DATABASE_OPTION,
+    sample_failures: bool = SAMPLE_FAILURES_OPTION,
+    failures_db_url: Optional[str] = FAILURES_DB_URL_OPTION,
+    sample_rows: int = SAMPLE_ROWS_OPTION,
+    sample_max_rows: int = SAMPLE_MAX_ROWS_OPTION,
+    sample_max_bytes: int = SAMPLE_MAX_BYTES_OPTION,
+    sample_concurrency: int = SAMPLE_CONCURRENCY_OPTION,
+    profile_phases: bool = PROFILE_PHASES_OPTION,
+    profile_output: Optional[Path] = PROFILE_OUTPUT_OPTION,
+    profile_mapping: Optional[Path] = PROFILE_MAPPING_OPTION,
+):
+    from odd_dbt import config
+    from odd_dbt.libs import dbt, odd
+    from odd_dbt.mapper.test_results import DbtTestMapper
+    from odd_dbt.service import odd as odd_api
+    from odd_dbt.service.export import write_entities
+    from odd_dbt.service.failures import sample_failed_tests
+    from odd_dbt.service.state import IngestionState
+    from odd_dbt.utils import profiling
+
+    check_destination(platform_host, platform_token, output)
+
+    with handle_errors():
+        context = get_context(
+            project_dir,
+            profiles_dir,
+            profile,
+            target,
+            offline,
+            target_path,
+            adapter_config,
+            adapter_host,
+            adapter_account,
+            adapter_database,
+        )
+        with profiling.profiler.span("select"):
+            selected = dbt.select_nodes(context, select, exclude, state)
+        generator = odd.create_dbt_generator_from_oddrn(oddrn=dbt_data_source_oddrn)
+
+        samples = None
+        if sample_failures:
+            samples = sample_failed_tests(
+                context,
+                selected,
+                failures_db_url,
+                sample_rows,
+                sample_max_rows,
+                sample_max_bytes,
+                sample_concurrency,
+            )
+
+        with profiling.dump_profile(profile_mapping):
+            data_entities = DbtTestMapper(
+                context=context,
+                generator=generator,
+                selected=selected,
+                workers=workers,
+                samples=samples,
+            ).map()
+        logger.debug(f"Artifacts: {context.artifact_cache}")
+
+        if output:
+            with profiling.profiler.span("write"):
+                write_entities(data_entities, output)
+            return
+
+        client = config.create_odd_client(
+            host=platform_host, token=platform_token, pool_size=concurrency
+        )
+        odd_api.ingest_changed_entities(
+            data_entities,
+            client,
+            state=IngestionState(state_path or context.target_path / STATE_FILE),
+            full_refresh=full_refresh,
+            concurrency=concurrency,
+            retries=retries,
+        )
+
+
+@app.command()
+@profiled
+def ingest_lineage(
+    project_dir: Path = PROJECT_DIR_OPTION,
+    profiles_dir: Path = PROFILES_DIR_OPTION,
+    target: Optional[str] = TARGET_OPTION,
+    profile: Optional[str] = PROFILE_OPTION,
+    platform_host: Optional[str] = HOST_OPTION,
+    platform_token: Optional[str] = TOKEN_OPTION,
+    dbt_data_source_oddrn: str = DBT_ODDRN_OPTION,
+    output: Optional[Path] = OUTPUT_OPTION,
+    concurrency: int = CONCURRENCY_OPTION,
+    retries: int = RETRIES_OPTION,
+    state_path: Optional[Path] = STATE_PATH_OPTION,
+    full_refresh: bool = FULL_REFRESH_OPTION,
+    select: Optional[List[str]] = SELECT_OPTION,
+    exclude: Optional[List[str]] = EXCLUDE_OPTION,
+    state: Optional[Path] = STATE_OPTION,
+    workers: int = WORKERS_OPTION,
+    offline: bool = OFFLINE_OPTION,
+    target_path: Optional[Path] = TARGET_PATH_OPTION,
+    adapter_config: Optional[Path] = ADAPTER_CONFIG_OPTION,
+    adapter_host: Optional[str] = ADAPTER_HOST_OPTION,
+    adapter_account: Optional[str] = ADAPTER_ACCOUNT_OPTION,
+    adapter_database: Optional[str] = ADAPTER_DATABASE_OPTION,
+    metadata_fields: Optional[List[str]] = METADATA_FIELDS_OPTION,
+    metadata_max_text: int = METADATA_MAX_TEXT_OPTION,
+    metadata_hash_text: bool = METADATA_HASH_TEXT_OPTION,
+    profile_phases: bool = PROFILE_PHASES_OPTION,
+    profile_output: Optional[Path] = PROFILE_OUTPUT_OPTION,
+    profile_mapping: Optional[Path] = PROFILE_MAPPING_OPTION,
+):
+    from odd_dbt import config
+    from odd_dbt.libs import dbt, odd
+    from odd_dbt.mapper.lineage import DbtLineageMapper
+    from odd_dbt.mapper.metadata import MetadataProjection
+    from odd_dbt.service import odd as odd_api
+    from odd_dbt.service.export import write_entities
+    from odd_dbt.service.state import IngestionState
+    from odd_dbt.utils import profiling
+
+    check_destination(platform_host, platform_token, output)
+
+    with handle_errors():
+        context = get_context(
+            project_dir,
+            profiles_dir,
+            profile,
+            target,
+            offline,
+            target_path,
+            adapter_config,
+            adapter_host,
+            adapter_account,
+            adapter_database,
+        )
+        with profiling.profiler.span("select"):
+            selected = dbt.select_nodes(context, select, exclude, state)
+        generator = odd.create_dbt_generator_from_oddrn(oddrn=dbt_data_source_oddrn)
+
+        metadata = MetadataProjection.from_options(
+            metadata_fields, metadata_max_text, metadata_hash_text
+        )
+
+        with profiling.dump_profile(profile_mapping):
+            data_entities = DbtLineageMapper(
+                context=context,
+                generator=generator,
+                selected=selected,
+                metadata=metadata,
+                workers=workers,
+            ).map()
+        logger.debug(f"Artifacts: {context.artifact_cache}")
+
+        if output:
+            with profiling.profiler.span("write"):
+                write_entities(data_entities, output)
+            return
+
+        client = config.create_odd_client(
+            host=platform_host, token=platform_token, pool_size=concurrency
+        )
+        odd_api.ingest_changed_entities(
+            data_entities,
+            client,
+            state=IngestionState(state_path or context.target_path / STATE_FILE),
+            full_refresh=full_refresh,
+            concurrency=concurrency,
+            retries=retries,
+        )
+
+
+@app.command()
+@profiled
+def ingest_freshness(
+    project_dir: Path = PROJECT_DIR_OPTION,
+    profiles_dir: Path = PROFILES_DIR_OPTION,
+    target: Optional[str] = TARGET_OPTION,
+    profile: Optional[str] = PROFILE_OPTION,
+    platform_host: Optional[str] = HOST_OPTION,
+    platform_token: Optional[str] = TOKEN_OPTION,
+    dbt_data_source_oddrn: str = DBT_ODDRN_OPTION,
+    sources_path: Optional[Path] = typer.Option(
+        None,
+        "--sources",
+        help="sources.json written by dbt source freshness. Default: <target-path>/sources.json",
     ),
-    dbt_data_source_oddrn: str = typer.Option(
-        ..., "--dbt-oddrn", "-oddrn", envvar="DBT_DATA_SOURCE_ODDRN"
+    output: Optional[Path] = OUTPUT_OPTION,
+    concurrency: int = CONCURRENCY_OPTION,
+    retries: int = RETRIES_OPTION,
+    state_path: Optional[Path] = typer.Option(
+        default=None,
+        help=f"File with ingested freshness statuses. Default: <target-path>/{FRESHNESS_STATE_FILE}",
     ),
+    full_refresh: bool = FULL_REFRESH_OPTION,
+    select: Optional[List[str]] = SELECT_OPTION,
+    exclude: Optional[List[str]] = EXCLUDE_OPTION,
+    state: Optional[Path] = STATE_OPTION,
+    offline: bool = OFFLINE_OPTION,
+    target_path: Optional[Path] = TARGET_PATH_OPTION,
+    adapter_config: Optional[Path] = ADAPTER_CONFIG_OPTION,
+    adapter_host: Optional[str] = ADAPTER_HOST_OPTION,
+    adapter_account: Optional[str] = ADAPTER_ACCOUNT_OPTION,
+    adapter_database: Optional[str] = ADAPTER_DATABASE_OPTION,
+    profile_phases: bool = PROFILE_PHASES_OPTION,
+    profile_output: Optional[Path] = PROFILE_OUTPUT_OPTION,
 ):
+    """
+    Ingests results of dbt source freshness as tests of sources.
+    Test run is sent only when freshness status of the source changes, unless --full-refresh is set.
+    """
+    from odd_dbt import config
+    from odd_dbt.domain import SourceFreshnessResults
+    from odd_dbt.libs import dbt, odd
+    from odd_dbt.mapper.freshness import DbtFreshnessMapper
+    from odd_dbt.service import odd as odd_api
+    from odd_dbt.service.export import write_entities
+    from odd_dbt.service.state import IngestionState, status_fingerprint
+    from odd_dbt.utils import profiling
+
+    check_destination(platform_host, platform_token, output)
+
     with handle_errors():
-        cli_args = CliArgs(
-            project_dir=project_dir,
-            profiles_dir=profiles_dir,
-            profile=profile,
-            target=target,
-            threads=1,
-            vars={},
+        context = get_context(
+            project_dir,
+            profiles_dir,
+            profile,
+            target,
+            offline,
+            target_path,
+            adapter_config,
+            adapter_host,
+            adapter_account,
+            adapter_database,
         )
-        context = dbt.get_context(cli_args=cli_args)
-        client = config.create_odd_client(host=platform_host, token=platform_token)
+
+        with profiling.profiler.span("select"):
+            selected = dbt.select_nodes(context, select, exclude, state)
         generator = odd.create_dbt_generator_from_oddrn(oddrn=dbt_data_source_oddrn)
+        freshness = (
+            context.artifact_cache.get(sources_path, SourceFreshnessResults)
+            if sources_path
+            else context.source_freshness
+        )
+        data_entities = DbtFreshnessMapper(
+            context=context, generator=generator, freshness=freshness, selected=selected
+        ).map()
+
+        if output:
+            with profiling.profiler.span("write"):
+                write_entities(data_entities, output)
+            return
 
-        data_entities = DbtTestMapper(context=context, generator=generator).map()
-        odd_api.ingest_entities(data_entities, client)
+        client = config.create_odd_client(
+            host=platform_host, token=platform_token, pool_size=concurrency
+        )
+        odd_api.ingest_changed_entities(
+            data_entities,
+            client,
+            state=IngestionState(
+                state_path or context.target_path / FRESHNESS_STATE_FILE,
+                fingerprint=status_fingerprint,
+            ),
+            full_refresh=full_refresh,
+            concurrency=concurrency,
+            retries=retries,
+        )
 
 
 @app.command()
-def ingest_lineage(
-    project_dir: Path = typer.Option(default=default_project_dir()),
-    profiles_dir: Path = typer.Option(default=default_profiles_dir()),
-    target: Optional[str] = typer.Option(default=None),
-    profile: Optional[str] = typer.Option(default=None),
-    platform_host: str = typer.Option(..., "--host", "-h", envvar="ODD_PLATFORM_HOST"),
-    platform_token: str = typer.Option(
-        ..., "--token", "-t", envvar="ODD_PLATFORM_TOKEN"
+@profiled
+def upload(
+    files: List[Path] = typer.Argument(..., help="NDJSON files written with --output"),
+    platform_host: str = REQUIRED_HOST_OPTION,
+    platform_token: str = REQUIRED_TOKEN_OPTION,
+    concurrency: int = CONCURRENCY_OPTION,
+    retries: int = RETRIES_OPTION,
+    state_path: Optional[Path] = typer.Option(
+        default=None,
+        help="File with hashes of ingested entities. All entities are sent when not set",
+    ),
+    profile_phases: bool = PROFILE_PHASES_OPTION,
+    profile_output: Optional[Path] = PROFILE_OUTPUT_OPTION,
+):
+    """
+    Sends entities written by --output of other commands, files are read by parts.
+    """
+    from odd_dbt import config
+    from odd_dbt.service import odd as odd_api
+    from odd_dbt.service.export import read_batches
+    from odd_dbt.service.state import IngestionState
+
+    with handle_errors():
+        client = config.create_odd_client(
+            host=platform_host, token=platform_token, pool_size=concurrency
+        )
+        ingestion_state = IngestionState(state_path) if state_path else None
+
+        # Each part fills all concurrent batches
+        for data_entities in read_batches(files, MAX_BATCH_ENTITIES * concurrency):
+            if ingestion_state is None:
+                odd_api.ingest_entities(
+                    data_entities, client, concurrency=concurrency, retries=retries
+                )
+                continue
+
+            odd_api.ingest_changed_entities(
+                data_entities,
+                client,
+                state=ingestion_state,
+                concurrency=concurrency,
+                retries=retries,
+            )
+
+
+@app.command()
+@profiled
+def backfill(
+    paths: List[str] = typer.Argument(
+        ..., help="Archived run_results.json files, glob patterns or directories to search them in"
+    ),
+    manifests: Optional[List[str]] = typer.Option(
+        None,
+        "--manifests",
+        help="manifest.json files, glob patterns or directories. Default: folders of run_results.json files",
+    ),
+    project_dir: Path = PROJECT_DIR_OPTION,
+    profiles_dir: Path = PROFILES_DIR_OPTION,
+    target: Optional[str] = TARGET_OPTION,
+    profile: Optional[str] = PROFILE_OPTION,
+    platform_host: Optional[str] = HOST_OPTION,
+    platform_token: Optional[str] = TOKEN_OPTION,
+    dbt_data_source_oddrn: str = DBT_ODDRN_OPTION,
+    output: Optional[Path] = OUTPUT_OPTION,
+    concurrency: int = CONCURRENCY_OPTION,
+    retries: int = RETRIES_OPTION,
+    checkpoint_path: Path = typer.Option(
+        Path(BACKFILL_CHECKPOINT_FILE),
+        "--checkpoint",
+        help="File with ingested run_results.json files, an interrupted backfill resumes from it",
     ),
-    dbt_data_source_oddrn: str = typer.Option(
-        ..., "--dbt-oddrn", "-oddrn", envvar="DBT_DATA_SOURCE_ODDRN"
+    workers: int = typer.Option(
+        default=1, envvar="ODD_MAPPING_WORKERS", help="Processes mapping run_results.json files"
     ),
+    offline: bool = typer.Option(
+        default=False, help="Don't read profiles.yml, adapter type is taken from manifest.json"
+    ),
+    adapter_config: Optional[Path] = ADAPTER_CONFIG_OPTION,
+    adapter_host: Optional[str] = ADAPTER_HOST_OPTION,
+    adapter_account: Optional[str] = ADAPTER_ACCOUNT_OPTION,
+    adapter_database: Optional[str] = ADAPTER_DATABASE_OPTION,
+    profile_phases: bool = PROFILE_PHASES_OPTION,
+    profile_output: Optional[Path] = PROFILE_OUTPUT_OPTION,
 ):
+    """
+    Ingests test results of past dbt invocations from archived run_results.json files.
+    Each file is mapped against manifest.json of the same invocation, or the nearest one by time.
+    """
+    from odd_dbt import config
+    from odd_dbt.libs import dbt, odd
+    from odd_dbt.service import backfill as history
+    from odd_dbt.service import odd as odd_api
+    from odd_dbt.service.export import EntityWriter
+
+    check_destination(platform_host, platform_token, output)
+
     with handle_errors():
-        cli_args = CliArgs(
-            project_dir=project_dir,
-            profiles_dir=profiles_dir,
-            profile=profile,
-            target=target,
-            threads=1,
-            vars={},
+        run_files = history.find_files(paths, history.RUN_RESULTS_FILES)
+        manifest_files = (
+            history.find_files(manifests, history.MANIFEST_FILES)
+            if manifests
+            else history.find_neighbours(run_files, history.MANIFEST_FILES)
+        )
+        runs = history.match_runs(run_files, history.ManifestIndex(manifest_files))
+
+        checkpoint = history.BackfillCheckpoint(checkpoint_path)
+        pending = [run for run in runs if not checkpoint.is_done(run)]
+        logger.info(
+            f"Found {len(runs)} runs matched to {len(manifest_files)} manifests, "
+            f"{len(runs) - len(pending)} of them were ingested before"
+        )
+        if not pending:
+            return
+
+        if offline:
+            adapter_type, credentials = dbt.offline_settings(
+                adapter_config,
+                host=adapter_host,
+                account=adapter_account,
+                database=adapter_database,
+            )
+        else:
+            context = get_context(project_dir, profiles_dir, profile, target)
+            adapter_type, credentials = context.adapter_type, context.credentials.to_dict()
+
+        history.check_credentials(pending, credentials, adapter_type)
+
+        generator = odd.create_dbt_generator_from_oddrn(oddrn=dbt_data_source_oddrn)
+        mapped_runs = history.map_runs(
+            pending, generator, credentials, adapter_type, workers=workers
+        )
+
+        with contextlib.ExitStack() as stack:
+            if output:
+                flush = stack.enter_context(EntityWriter(output)).write
+            else:
+                client = config.create_odd_client(
+                    host=platform_host, token=platform_token, pool_size=concurrency
+                )
+
+                def flush(data_entities) -> None:
+                    odd_api.ingest_entities(
+                        data_entities, client, concurrency=concurrency, retries=retries
+                    )
+
+            ingested = history.backfill(
+                mapped_runs,
+                checkpoint,
+                flush,
+                data_source_oddrn=generator.get_data_source_oddrn(),
+                # Each flush fills all concurrent batches
+                size=MAX_BATCH_ENTITIES * concurrency,
+            )
+
+        logger.success(f"Backfilled {ingested} of {len(pending)} runs")
+        if ingested < len(pending):
+            raise ValueError(
+                f"{len(pending) - ingested} runs failed, run backfill again to retry them"
+            )
+
+
+@app.command()
+def watch(
+    project_dir: Path = PROJECT_DIR_OPTION,
+    profiles_dir: Path = PROFILES_DIR_OPTION,
+    target: Optional[str] = TARGET_OPTION,
+    profile: Optional[str] = PROFILE_OPTION,
+    platform_host: str = REQUIRED_HOST_OPTION,
+    platform_token: str = REQUIRED_TOKEN_OPTION,
+    dbt_data_source_oddrn: str = DBT_ODDRN_OPTION,
+    concurrency: int = CONCURRENCY_OPTION,
+    retries: int = RETRIES_OPTION,
+    state_path: Optional[Path] = STATE_PATH_OPTION,
+    freshness_state_path: Optional[Path] = typer.Option(
+        default=None,
+        help=f"File with ingested freshness statuses. Default: <target-path>/{FRESHNESS_STATE_FILE}",
+    ),
+    select: Optional[List[str]] = SELECT_OPTION,
+    exclude: Optional[List[str]] = EXCLUDE_OPTION,
+    state: Optional[Path] = STATE_OPTION,
+    workers: int = WORKERS_OPTION,
+    offline: bool = OFFLINE_OPTION,
+    target_path: Optional[Path] = TARGET_PATH_OPTION,
+    adapter_config: Optional[Path] = ADAPTER_CONFIG_OPTION,
+    adapter_host: Optional[str] = ADAPTER_HOST_OPTION,
+    adapter_account: Optional[str] = ADAPTER_ACCOUNT_OPTION,
+    adapter_database: Optional[str] = ADAPTER_DATABASE_OPTION,
+    metadata_fields: Optional[List[str]] = METADATA_FIELDS_OPTION,
+    metadata_max_text: int = METADATA_MAX_TEXT_OPTION,
+    metadata_hash_text: bool = METADATA_HASH_TEXT_OPTION,
+    interval: float = typer.Option(
+        default=INTERVAL, help="Seconds between checks of artifacts"
+    ),
+    debounce: float = typer.Option(
+        default=DEBOUNCE, help="Seconds artifacts must stay unchanged before ingestion"
+    ),
+):
+    """
+    Stays resident and ingests test results, lineage and source freshness each time dbt rewrites artifacts.
+    Stops on SIGTERM or SIGINT.
+    """
+    from odd_dbt import config
+    from odd_dbt.libs import dbt, odd
+    from odd_dbt.mapper.freshness import DbtFreshnessMapper
+    from odd_dbt.mapper.lineage import DbtLineageMapper
+    from odd_dbt.mapper.metadata import MetadataProjection
+    from odd_dbt.mapper.test_results import DbtTestMapper
+    from odd_dbt.service import odd as odd_api
+    from odd_dbt.service.state import IngestionState, status_fingerprint
+    from odd_dbt.service.watch import (
+        MANIFEST,
+        RUN_RESULTS,
+        SOURCES,
+        ArtifactWatcher,
+        stop_on_signals,
+    )
+
+    with handle_errors():
+        context = get_context(
+            project_dir,
+            profiles_dir,
+            profile,
+            target,
+            offline,
+            target_path,
+            adapter_config,
+            adapter_host,
+            adapter_account,
+            adapter_database,
+        )
+        client = config.create_odd_client(
+            host=platform_host, token=platform_token, pool_size=concurrency
         )
-        context = dbt.get_context(cli_args=cli_args)
-        client = config.create_odd_client(host=platform_host, token=platform_token)
         generator = odd.create_dbt_generator_from_oddrn(oddrn=dbt_data_source_oddrn)
+        metadata = MetadataProjection.from_options(
+            metadata_fields, metadata_max_text, metadata_hash_text
+        )
+        ingestion_state = IngestionState(state_path or context.target_path / STATE_FILE)
+        freshness_state = IngestionState(
+            freshness_state_path or context.target_path / FRESHNESS_STATE_FILE,
+            fingerprint=status_fingerprint,
+        )
+
+        stop = stop_on_signals()
+        watcher = ArtifactWatcher(
+            context.target_path,
+            files=(MANIFEST, RUN_RESULTS, SOURCES),
+            interval=interval,
+            debounce=debounce,
+        )
+        logger.info(f"Watching {context.target_path} for dbt artifacts")
+
+        for changed in watcher.changes(stop):
+            started = time.perf_counter()
+            logger.info(f"Changed: {', '.join(sorted(changed))}")
+
+            try:
+                if MANIFEST in changed:
+                    context.reset_generators()
+
+                selected = dbt.select_nodes(context, select, exclude, state)
+
+                if RUN_RESULTS in changed:
+                    if any(r.unique_id.startswith("test.") for r in context.results):
+                        data_entities = DbtTestMapper(
+                            context=context,
+                            generator=generator,
+                            selected=selected,
+                            workers=workers,
+                        ).map()
+                        odd_api.ingest_changed_entities(
+                            data_entities,
+                            client,
+                            state=ingestion_state,
+                            concurrency=concurrency,
+                            retries=retries,
+                        )
+                    else:
+                        logger.info("run_results.json has no test results, skipping")
+
+                if MANIFEST in changed:
+                    data_entities = DbtLineageMapper(
+                        context=context,
+                        generator=generator,
+                        selected=selected,
+                        metadata=metadata,
+                        workers=workers,
+                    ).map()
+                    odd_api.ingest_changed_entities(
+                        data_entities,
+                        client,
+                        state=ingestion_state,
+                        concurrency=concurrency,
+                        retries=retries,
+                    )
+
+                if SOURCES in changed:
+                    data_entities = DbtFreshnessMapper(
+                        context=context, generator=generator, selected=selected
+                    ).map()
+                    odd_api.ingest_changed_entities(
+                        data_entities,
+                        client,
+                        state=freshness_state,
+                        concurrency=concurrency,
+                        retries=retries,
+                    )
+            except Exception as e:
+                logger.debug(traceback.format_exc())
+                logger.error(e)
+                continue
+
+            logger.debug(f"Artifacts: {context.artifact_cache}")
+            logger.info(f"Ingested in {time.perf_counter() - started:.2f}s")
 
-        data_entities = DbtLineageMapper(context=context, generator=generator).map()
-        odd_api.ingest_entities(data_entities, client)
+        logger.info("Watch stopped")
 
 
 if __name__ == "__main__":
@@ -1,5 +1,9 @@
+from odd_models.api_client.http_client import DEFAULT_API_TIMEOUT
+from odd_models.api_client.open_data_discovery_ingestion_api import ODDApiClient
 from odd_models.api_client.v2.odd_api_client import Client
 from pydantic_settings import BaseSettings
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
 
 
 class Config(BaseSettings):
@@ -8,5 +12,43 @@ class Config(BaseSettings):
     dbt_data_source_oddrn: str
 
 
-def create_odd_client(host: str = None, token: str = None) -> Client:
-    return Client(host=host, token=token)
+class PooledApiClient(ODDApiClient):
+    """ODDApiClient sending requests through one keep-alive connection pool instead of a session per request"""
+
+    def __init__(self, base_url: str, pool_size: int = 1) -> None:
+        super().__init__(base_url)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session = Session()
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def _fetch_response(
+        self,
+        path: str,
+        method: str,
+        params: dict = None,
+        data=None,
+        json: dict = None,
+        headers: dict = None,
+        timeout: int = None,
+    ) -> Response:
+        return self._session.request(
+            method,
+            self.base_url + path,
+            params=params,
+            data=data,
+            json=json,
+            allow_redirects=False,
+            headers=headers or {},
+            timeout=timeout or DEFAULT_API_TIMEOUT,
+        )
+
+
+class PooledClient(Client):
+    def __init__(self, host: str = None, token: str = None, pool_size: int = 1) -> None:
+        super().__init__(host=host, token=token)
+        self._client = PooledApiClient(self._host, pool_size=pool_size)
+
+
+def create_odd_client(host: str = None, token: str = None, pool_size: int = 1) -> Client:
+    return PooledClient(host=host, token=token, pool_size=pool_size)
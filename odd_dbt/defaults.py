@@ -0,0 +1,60 @@
+"""
+Defaults shared by services and CLI options.
+Module has no dependencies, so building the CLI doesn't import dbt or odd_models.
+"""
+
+# Ingestion
+MAX_BATCH_ENTITIES = 1_000
+MAX_BATCH_BYTES = 8 * 1024 * 1024
+RETRIES = 3
+BACKOFF = 1.0
+MAX_BACKOFF = 30.0
+
+# Named sets of node fields for --metadata-fields, nested fields are dot separated
+METADATA_PROFILES: dict[str, tuple[str, ...]] = {
+    "minimal": (
+        "unique_id",
+        "name",
+        "resource_type",
+        "database",
+        "schema",
+        "alias",
+        "config.materialized",
+    ),
+    "default": (
+        "unique_id",
+        "name",
+        "resource_type",
+        "package_name",
+        "database",
+        "schema",
+        "alias",
+        "fqn",
+        "path",
+        "original_file_path",
+        "description",
+        "tags",
+        "meta",
+        "language",
+        "config.materialized",
+        "config.tags",
+        "raw_code",
+        "compiled_code",
+    ),
+}
+# Profile keeping the whole node, as it is in manifest.json
+FULL_PROFILE = "full"
+MAX_TEXT_LENGTH = 2_000
+
+# Streaming of test results while dbt test is running
+STREAM_BATCH_SIZE = 100
+STREAM_INTERVAL = 30.0
+
+# Backfill of archived run_results.json files
+BACKFILL_CHECKPOINT_FILE = "odd_backfill_checkpoint.json"
+
+# Sampling rows of failed tests stored by dbt store_failures
+SAMPLE_ROWS = 10
+SAMPLE_MAX_ROWS = 1_000
+SAMPLE_MAX_BYTES = 1024 * 1024
+SAMPLE_CONCURRENCY = 4
@@ -1,5 +1,7 @@
-from .manifest import Manifest
+from .manifest import Manifest, StreamingManifest
 from .credentials import Credentials
 from .project import Project
-from .result import Result
+from .result import FailureSample, Result
 from .run_results import RunResults
+from .catalog import Catalog
+from .freshness import FreshnessThreshold, SourceFreshness, SourceFreshnessResults
@@ -0,0 +1,43 @@
+from pathlib import Path
+from typing import Optional
+
+from odd_dbt.utils import load_json
+
+
+class Catalog:
+    """
+    catalog.json written by dbt docs generate.
+    Tables are keyed by unique id of their node or source, so joining them with manifest nodes takes a lookup per node.
+    """
+
+    __slots__ = ("_nodes", "_sources")
+
+    def __init__(self, file: Path) -> None:
+        self._load(load_json(file))
+
+    @classmethod
+    def from_dict(cls, catalog: dict) -> "Catalog":
+        """Catalog built from already decoded catalog.json or a part of it"""
+        instance = cls.__new__(cls)
+        instance._load(catalog)
+        return instance
+
+    def _load(self, catalog: dict) -> None:
+        self._nodes: dict[str, dict] = catalog.get("nodes") or {}
+        self._sources: dict[str, dict] = catalog.get("sources") or {}
+
+    @property
+    def raw_nodes(self) -> dict[str, dict]:
+        return self._nodes
+
+    def table(self, unique_id: str) -> Optional[dict]:
+        return self._nodes.get(unique_id) or self._sources.get(unique_id)
+
+    def columns(self, unique_id: str) -> list[dict]:
+        """
+        :return: columns of a table, with name, type and index, in table order
+        """
+        if not (table := self.table(unique_id)):
+            return []
+
+        return sorted(table.get("columns", {}).values(), key=lambda c: c.get("index") or 0)
@@ -1,16 +1,96 @@
-from dbt.config.runtime import RuntimeConfig
+import os
+import threading
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Callable, Optional, TypeVar
+
 from dbt.contracts.graph.nodes import ParsedNode
 
-from odd_dbt.domain import Manifest, Credentials, RunResults, Result
+from odd_dbt.domain import (
+    Catalog,
+    Credentials,
+    Manifest,
+    Project,
+    Result,
+    RunResults,
+    SourceFreshnessResults,
+    StreamingManifest,
+)
 from odd_dbt.domain.cli_args import CliArgs
-from odd_dbt.errors import DbtInternalError
-from odd_dbt.utils import load_json
+from odd_dbt.errors import DbtInternalError, ProfileError
+from odd_dbt.mapper.generator import ODDRN_GENERATORS, Generator, create_generator
+from odd_dbt.utils import load_yaml
+from odd_dbt.utils.profiling import profiler
+
+T = TypeVar("T")
+
+# manifest.json bigger than threshold (in bytes) is read by StreamingManifest
+STREAMING_THRESHOLD = int(
+    os.getenv("ODD_DBT_STREAMING_THRESHOLD", 100 * 1024 * 1024)
+)
+
+
+class ArtifactCache:
+    """
+    Loads each dbt artifact at most once per version of the file.
+    Entries are keyed by path and loader and validated against file mtime and size,
+    so a long-living process picks up artifacts written by a fresh dbt invocation.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[tuple[Path, Callable], tuple[tuple[int, int], Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, file: Path, loader: Callable[[Path], T]) -> T:
+        stat = file.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        key = (file.resolve(), loader)
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == signature:
+                self.hits += 1
+                return cached[1]
+
+            self.misses += 1
+            with profiler.span(f"parse {file.name}"):
+                artifact = loader(file)
+            self._entries[key] = (signature, artifact)
+            return artifact
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __repr__(self) -> str:
+        return f"ArtifactCache(hits={self.hits}, misses={self.misses}, entries={len(self._entries)})"
+
+
+artifact_cache = ArtifactCache()
 
 
 class DbtContext:
-    def __init__(self, cli_args: CliArgs):
+    # Results of a running dbt invocation, used instead of run_results.json when set
+    _run_results: Optional[RunResults] = None
+
+    def __init__(
+        self,
+        cli_args: CliArgs,
+        cache: ArtifactCache = artifact_cache,
+        streaming_threshold: int = STREAMING_THRESHOLD,
+    ):
+        self.artifact_cache = cache
+        self.streaming_threshold = streaming_threshold
+
+        from dbt.config.runtime import RuntimeConfig
+
         try:
-            self._config = RuntimeConfig.from_args(cli_args)
+            with profiler.span("dbt.runtime_config"):
+                self._config = RuntimeConfig.from_args(cli_args)
             self.target_path = cli_args.project_dir / self._config.target_path
         except Exception as e:
             raise DbtInternalError(f"Failed getting dbt context: {e}") from e
@@ -20,23 +100,70 @@ class DbtContext:
         return self._config.get_metadata().adapter_type
 
     @property
-    def catalog(self):
+    def catalog(self) -> Optional[Catalog]:
         if (catalog := self.target_path / "catalog.json").is_file():
-            return load_json(catalog)
+            return self.artifact_cache.get(catalog, Catalog)
 
         return None
 
+    @property
+    def source_freshness(self) -> SourceFreshnessResults:
+        """sources.json written by dbt source freshness"""
+        return self.artifact_cache.get(
+            self.target_path / "sources.json", SourceFreshnessResults
+        )
+
     @property
     def credentials(self) -> Credentials:
         return Credentials(**self._config.credentials.to_dict())
 
+    @property
+    def connection_settings(self) -> dict[str, Any]:
+        """Credentials of dbt profile as they are, with secrets, to connect to the database"""
+        return self._config.credentials.to_dict()
+
+    @cached_property
+    def oddrn_generator(self) -> Generator:
+        """ODDRN generator for materialized models and sources, shared by the run"""
+        return create_generator(
+            adapter_type=self.adapter_type,
+            credentials=self.credentials,
+        )
+
+    def reset_generators(self) -> None:
+        """Drops ODDRNs memoized by generators, i.e. when manifest.json was rewritten"""
+        self.__dict__.pop("oddrn_generator", None)
+
     @property
     def manifest(self) -> Manifest:
-        return Manifest(self.target_path / "manifest.json")
+        file = self.target_path / "manifest.json"
+        loader = (
+            StreamingManifest
+            if file.stat().st_size > self.streaming_threshold
+            else Manifest
+        )
+        return self.artifact_cache.get(file, loader)
+
+    def state_manifest(self, state_path: Path) -> Manifest:
+        """
+        :param state_path: directory with manifest.json of a previous dbt invocation
+        """
+        return self.artifact_cache.get(state_path / "manifest.json", Manifest)
+
+    def use_run_results(self, run_results: Optional[RunResults]) -> None:
+        """
+        :param run_results: results streamed from dbt while it runs, run_results.json is read again when None
+        """
+        self._run_results = run_results
 
     @property
     def run_results(self) -> RunResults:
-        return RunResults(self.target_path / "run_results.json")
+        if self._run_results is not None:
+            return self._run_results
+
+        return self.artifact_cache.get(
+            self.target_path / "run_results.json", RunResults
+        )
 
     @property
     def results(self) -> list[Result]:
@@ -49,3 +176,65 @@ class DbtContext:
     @property
     def nodes(self) -> dict[str, ParsedNode]:
         return self.manifest.nodes
+
+
+class OfflineDbtContext(DbtContext):
+    """
+    Context built from dbt artifacts only, without RuntimeConfig, profiles.yml and adapter plugins.
+    Adapter type is taken from manifest metadata, credentials fields ODDRNs are built from are passed explicitly.
+    """
+
+    def __init__(
+        self,
+        project_dir: Path,
+        credentials: dict[str, str],
+        target_path: Optional[Path] = None,
+        adapter_type: Optional[str] = None,
+        cache: ArtifactCache = artifact_cache,
+        streaming_threshold: int = STREAMING_THRESHOLD,
+    ):
+        self.artifact_cache = cache
+        self.streaming_threshold = streaming_threshold
+        self.target_path = target_path or project_dir / get_target_path(project_dir)
+        self._adapter_type = adapter_type
+        self._credentials = credentials
+
+    @property
+    def adapter_type(self) -> str:
+        adapter_type = self._adapter_type or self.manifest.metadata.get("adapter_type")
+        if not adapter_type:
+            raise ProfileError(
+                "manifest.json metadata has no adapter_type, it must be set explicitly"
+            )
+        return adapter_type
+
+    @property
+    def credentials(self) -> Credentials:
+        if generator := ODDRN_GENERATORS.get(self.adapter_type):
+            missing = [
+                field
+                for field in generator.required_credentials
+                if not self._credentials.get(field)
+            ]
+            if missing:
+                raise ProfileError(
+                    f"Offline mode for {self.adapter_type} needs {', '.join(missing)} to be set"
+                )
+        return Credentials(**self._credentials)
+
+    def check_credentials(self) -> None:
+        """Fails before mapping when fields needed for ODDRNs are missing"""
+        self.credentials
+
+    @property
+    def connection_settings(self) -> dict[str, Any]:
+        raise ProfileError("Offline mode has no dbt profile to connect to the database with")
+
+
+def get_target_path(project_dir: Path) -> Path:
+    """target-path from dbt_project.yml, without rendering it"""
+    if (project_file := project_dir / "dbt_project.yml").is_file():
+        project = Project(**load_yaml(project_file))
+        if project.target_path:
+            return project.target_path
+    return Path("target")
@@ -1,7 +1,10 @@
 class Credentials:
     def __init__(self, **config) -> None:
-        del config["password"]
+        config.pop("password", None)
         self._config: dict[str, str] = config
 
     def __getitem__(self, item):
         return self._config.get(item)
+
+    def to_dict(self) -> dict[str, str]:
+        return dict(self._config)
@@ -0,0 +1,96 @@
+import dataclasses
+from pathlib import Path
+from typing import Optional
+
+from funcy import lmap
+
+from odd_dbt.utils import load_json
+from .result import get_execution_period
+
+
+@dataclasses.dataclass(frozen=True)
+class FreshnessThreshold:
+    count: int
+    period: str
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> Optional["FreshnessThreshold"]:
+        """None when the threshold is not set"""
+        if not data or data.get("count") is None or not data.get("period"):
+            return None
+        return cls(count=data["count"], period=data["period"])
+
+    def __str__(self) -> str:
+        return f"{self.count} {self.period}{'s' if self.count != 1 else ''}"
+
+
+@dataclasses.dataclass
+class SourceFreshness:
+    """Result of a source of sources.json written by dbt source freshness"""
+
+    __slots__ = (
+        "unique_id",
+        "status",
+        "max_loaded_at",
+        "snapshotted_at",
+        "age_seconds",
+        "warn_after",
+        "error_after",
+        "filter",
+        "error",
+        "execution_period",
+    )
+
+    unique_id: str
+    # pass, warn, error or runtime error
+    status: str
+    max_loaded_at: Optional[str]
+    snapshotted_at: Optional[str]
+    age_seconds: Optional[float]
+    warn_after: Optional[FreshnessThreshold]
+    error_after: Optional[FreshnessThreshold]
+    filter: Optional[str]
+    # Message of runtime error, i.e. when loaded_at_field query failed
+    error: Optional[str]
+    execution_period: tuple[Optional[str], Optional[str]]
+
+    @classmethod
+    def _deserialize(cls, data: dict) -> "SourceFreshness":
+        criteria = data.get("criteria") or {}
+        return cls(
+            unique_id=data["unique_id"],
+            status=data["status"],
+            max_loaded_at=data.get("max_loaded_at"),
+            snapshotted_at=data.get("snapshotted_at"),
+            age_seconds=data.get("max_loaded_at_time_ago_in_s"),
+            warn_after=FreshnessThreshold.from_dict(criteria.get("warn_after")),
+            error_after=FreshnessThreshold.from_dict(criteria.get("error_after")),
+            filter=criteria.get("filter"),
+            error=data.get("error"),
+            execution_period=get_execution_period(data.get("timing") or []),
+        )
+
+
+class SourceFreshnessResults:
+    """sources.json written by dbt source freshness"""
+
+    __slots__ = ("metadata", "results")
+
+    def __init__(self, file: Path) -> None:
+        self._load(load_json(file))
+
+    @classmethod
+    def from_dict(cls, sources: dict) -> "SourceFreshnessResults":
+        instance = cls.__new__(cls)
+        instance._load(sources)
+        return instance
+
+    def _load(self, sources: dict) -> None:
+        self.metadata: dict = sources["metadata"]
+        self.results: list[SourceFreshness] = lmap(
+            SourceFreshness._deserialize, sources.get("results", [])
+        )
+
+    @property
+    def invocation_id(self) -> str:
+        return self.metadata["invocation_id"]
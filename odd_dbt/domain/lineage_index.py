@@ -0,0 +1,115 @@
+from array import array
+from typing import Iterable, Mapping, Optional
+
+
+def _csr(adjacency: Iterable[Iterable[int]]) -> tuple[array, array]:
+    """Packs adjacency lists into offsets and edges arrays"""
+    offsets, edges = array("l", [0]), array("l")
+    for targets in adjacency:
+        edges.extend(targets)
+        offsets.append(len(edges))
+    return offsets, edges
+
+
+class LineageIndex:
+    """
+    Lineage graph of dbt nodes built once from manifest parent_map and child_map.
+    Unique ids are numbered and edges are kept as integer adjacency arrays,
+    so resolving edges or traversing the graph doesn't touch node objects.
+    """
+
+    def __init__(
+        self,
+        parent_map: Mapping[str, list[str]],
+        child_map: Optional[Mapping[str, list[str]]] = None,
+    ) -> None:
+        self.ids: list[str] = []
+        self._index: dict[str, int] = {}
+
+        for uid, parents in parent_map.items():
+            self._id(uid)
+            for parent in parents:
+                self._id(parent)
+
+        if child_map is None:
+            children: list[list[int]] = [[] for _ in self.ids]
+            for uid, parents in parent_map.items():
+                for parent in parents:
+                    children[self._index[parent]].append(self._index[uid])
+        else:
+            for uid, uid_children in child_map.items():
+                self._id(uid)
+                for child in uid_children:
+                    self._id(child)
+            children = [
+                [self._index[child] for child in child_map.get(uid, [])]
+                for uid in self.ids
+            ]
+
+        self._parents = _csr(
+            [self._index[parent] for parent in parent_map.get(uid, [])]
+            for uid in self.ids
+        )
+        self._children = _csr(children)
+
+    def _id(self, unique_id: str) -> int:
+        if (index := self._index.get(unique_id)) is None:
+            index = self._index[unique_id] = len(self.ids)
+            self.ids.append(unique_id)
+        return index
+
+    def __contains__(self, unique_id: object) -> bool:
+        return unique_id in self._index
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def parents(self, unique_id: str) -> list[str]:
+        return self._neighbours(unique_id, *self._parents)
+
+    def children(self, unique_id: str) -> list[str]:
+        return self._neighbours(unique_id, *self._children)
+
+    def upstream(self, unique_ids: Iterable[str], depth: Optional[int] = None) -> set[str]:
+        """
+        :param unique_ids: nodes to start from, they are included to the result
+        :param depth: how many generations of parents to take, all when None
+        :return: unique ids of nodes and their ancestors
+        """
+        return self._walk(unique_ids, depth, *self._parents)
+
+    def downstream(self, unique_ids: Iterable[str], depth: Optional[int] = None) -> set[str]:
+        """
+        :param unique_ids: nodes to start from, they are included to the result
+        :param depth: how many generations of children to take, all when None
+        :return: unique ids of nodes and their descendants
+        """
+        return self._walk(unique_ids, depth, *self._children)
+
+    def _neighbours(self, unique_id: str, offsets: array, edges: array) -> list[str]:
+        if (index := self._index.get(unique_id)) is None:
+            return []
+        return [self.ids[i] for i in edges[offsets[index] : offsets[index + 1]]]
+
+    def _walk(
+        self,
+        unique_ids: Iterable[str],
+        depth: Optional[int],
+        offsets: array,
+        edges: array,
+    ) -> set[str]:
+        seen = {self._index[uid] for uid in unique_ids if uid in self._index}
+        frontier = list(seen)
+        generation = 0
+
+        while frontier and (depth is None or generation < depth):
+            generation += 1
+            next_frontier = []
+            for index in frontier:
+                for neighbour in edges[offsets[index] : offsets[index + 1]]:
+                    if neighbour not in seen:
+                        seen.add(neighbour)
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+
+        return {self.ids[index] for index in seen}
@@ -1,33 +1,158 @@
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, Mapping, Optional, TypeVar
 
 from dbt.contracts.graph.nodes import ParsedNode, GenericTestNode, ModelNode, SeedNode
-from funcy import walk_values, select_values
+
+from odd_dbt.domain.lineage_index import LineageIndex
 
 from odd_dbt.domain.source import Source
+from odd_dbt.logger import logger
 from odd_dbt.utils import load_json
+from odd_dbt.utils.json_index import load_json_index
 from functools import cached_property
 
+T = TypeVar("T")
+
+
+def resource_type_of(unique_id: str) -> str:
+    """dbt prefixes each unique_id with the resource type, i.e. model.project.name"""
+    return unique_id.split(".", 1)[0]
+
+
+class LazyNodes(Mapping[str, T]):
+    """
+    Read-only mapping over raw manifest entries.
+    Entry is deserialized the first time it is looked up, selections made by
+    resource type share deserialized entries with the mapping they were made from.
+    """
+
+    def __init__(
+        self,
+        raw: Mapping[str, dict],
+        deserialize: Callable[[dict], T],
+        keys: Optional[dict[str, None]] = None,
+        cache: Optional[dict[str, T]] = None,
+    ) -> None:
+        self._raw = raw
+        self._deserialize = deserialize
+        self._keys = keys
+        self._cache: dict[str, T] = {} if cache is None else cache
+
+    def __getitem__(self, unique_id: str) -> T:
+        if unique_id not in self:
+            raise KeyError(unique_id)
+
+        if (node := self._cache.get(unique_id)) is None:
+            node = self._cache[unique_id] = self._deserialize(self._raw[unique_id])
+
+        return node
+
+    def __contains__(self, unique_id: object) -> bool:
+        keys = self._raw if self._keys is None else self._keys
+        return unique_id in keys
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._raw if self._keys is None else self._keys)
+
+    def __len__(self) -> int:
+        return len(self._raw if self._keys is None else self._keys)
+
+    def select(
+        self, *resource_types: str, where: Optional[Callable[[dict], bool]] = None
+    ) -> "LazyNodes[T]":
+        """
+        :param resource_types: dbt resource types to keep, i.e. model, seed, test
+        :param where: optional predicate applied to the raw entry
+        :return: LazyNodes sharing deserialized entries with this mapping
+        """
+        keys = {
+            uid: None
+            for uid in self
+            if resource_type_of(uid) in resource_types
+            and (where is None or where(self._raw[uid]))
+        }
+        return LazyNodes(self._raw, self._deserialize, keys=keys, cache=self._cache)
+
+    def subset(self, unique_ids: Iterable[str]) -> "LazyNodes[T]":
+        """
+        :param unique_ids: ids to keep, ones missing in this mapping are skipped
+        :return: LazyNodes sharing deserialized entries with this mapping, ordered by unique_id
+        """
+        keys = {uid: None for uid in sorted(unique_ids) if uid in self}
+        return LazyNodes(self._raw, self._deserialize, keys=keys, cache=self._cache)
+
 
 class Manifest:
     def __init__(self, file: Path) -> None:
         self._manifest = load_json(file)
 
+    @classmethod
+    def from_dict(cls, manifest: dict) -> "Manifest":
+        """Manifest built from already decoded manifest.json or a part of it"""
+        instance = cls.__new__(cls)
+        instance._manifest = manifest
+        return instance
+
+    @property
+    def metadata(self) -> dict:
+        return self._manifest["metadata"]
+
+    @property
+    def parent_map(self) -> dict[str, list[str]]:
+        return self._manifest.get("parent_map") or {}
+
+    @property
+    def child_map(self) -> Optional[dict[str, list[str]]]:
+        return self._manifest.get("child_map")
+
     @cached_property
-    def nodes(self) -> dict[str, ParsedNode]:
-        return walk_values(ParsedNode._deserialize, self._manifest["nodes"])
+    def lineage(self) -> LineageIndex:
+        if self._manifest.get("parent_map") is None:
+            logger.warning(
+                "manifest.json has no parent_map, nodes have no upstream lineage. "
+                "Run dbt parse or compile to write the full manifest"
+            )
+        return LineageIndex(self.parent_map, self.child_map)
+
+    @property
+    def raw_nodes(self) -> Mapping[str, dict]:
+        return self._manifest["nodes"]
+
+    @property
+    def raw_sources(self) -> Mapping[str, dict]:
+        return self._manifest["sources"]
 
     @cached_property
-    def sources(self) -> dict[str, Source]:
-        return walk_values(Source._deserialize, self._manifest["sources"])
+    def nodes(self) -> LazyNodes[ParsedNode]:
+        return LazyNodes(self.raw_nodes, ParsedNode._deserialize)
 
     @cached_property
-    def generic_tests(self) -> dict[str, GenericTestNode]:
-        return select_values(lambda x: isinstance(x, GenericTestNode), self.nodes)
+    def sources(self) -> LazyNodes[Source]:
+        return LazyNodes(self.raw_sources, Source._deserialize)
 
     @cached_property
-    def models(self) -> dict[str, ModelNode]:
-        return select_values(lambda x: isinstance(x, ModelNode), self.nodes)
+    def generic_tests(self) -> LazyNodes[GenericTestNode]:
+        return self.nodes.select("test", where=lambda x: "test_metadata" in x)
 
     @cached_property
-    def seeds(self) -> dict[str, SeedNode]:
-        return select_values(lambda x: isinstance(x, SeedNode), self.nodes)
+    def models(self) -> LazyNodes[ModelNode]:
+        return self.nodes.select("model")
+
+    @cached_property
+    def seeds(self) -> LazyNodes[SeedNode]:
+        return self.nodes.select("seed")
+
+
+class StreamingManifest(Manifest):
+    """
+    Manifest which doesn't keep manifest.json in memory.
+    Only metadata, parent_map and child_map are decoded eagerly, nodes and sources are
+    indexed by byte offsets and read from the file on lookup.
+    """
+
+    def __init__(self, file: Path) -> None:
+        self._manifest = load_json_index(
+            file,
+            indexed=("nodes", "sources"),
+            decoded=("metadata", "parent_map", "child_map"),
+        )
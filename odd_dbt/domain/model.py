@@ -1,4 +1,7 @@
+from typing import Optional
+
 from odd_models import DataEntity, DataTransformer, DataSet, DataInput, DataSetField
+from pydantic import PrivateAttr
 import abc
 
 
@@ -15,8 +18,15 @@ class NodeEntity(DataEntity, abc.ABC):
     def add_output(self, oddrn: str) -> None:
         ...
 
+    def outputs(self) -> list[DataEntity]:
+        """Entities of the node output ingested with it, i.e. columns of the materialized table"""
+        return []
+
 
 class ModelEntity(NodeEntity):
+    # Table or view the model is materialized to, set when it has columns
+    _output: Optional[DataEntity] = PrivateAttr(default=None)
+
     def __init__(self, **data: dict):
         super().__init__(**data)
 
@@ -36,6 +46,13 @@ class ModelEntity(NodeEntity):
         if oddrn not in self.data_transformer.outputs:
             self.data_transformer.outputs.append(oddrn)
 
+    def set_output_dataset(self, output: DataEntity) -> None:
+        self.add_output(output.oddrn)
+        self._output = output
+
+    def outputs(self) -> list[DataEntity]:
+        return [] if self._output is None else [self._output]
+
 
 class ColumnEntity(DataSetField):
     def __init__(self, **data: dict):
@@ -1,31 +1,48 @@
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Any, Optional
 
 from funcy import first
 
 
 class Result:
+    """Test or node result of run_results.json"""
+
+    __slots__ = (
+        "unique_id",
+        "status",
+        "status_reason",
+        "failures",
+        "relation_name",
+        "execution_period",
+    )
+
     def __init__(self, result: dict) -> None:
-        self._result = result
+        self.unique_id: str = result["unique_id"]
+        self.status: str = result["status"]
+        self.status_reason: Optional[str] = result.get("message")
+        self.failures: Optional[int] = result.get("failures")
+        # Table with failing rows, set for tests with store_failures
+        self.relation_name: Optional[str] = result.get("relation_name")
+        self.execution_period: tuple[
+            Optional[str], Optional[str]
+        ] = get_execution_period(result.get("timing", []))
+
 
-    @property
-    def unique_id(self) -> str:
-        return self._result["unique_id"]
+@dataclass
+class FailureSample:
+    """Rows of a failed test stored by dbt store_failures"""
 
-    @property
-    def execution_period(self) -> tuple[Optional[str], Optional[str]]:
-        execution = first(
-            period for period in self._result["timing"] if period["name"] == "execute"
-        )
+    relation: str
+    failures: Optional[int]
+    rows: list[dict[str, Any]] = field(default_factory=list)
+    # Fewer rows were taken than the test failed on
+    truncated: bool = False
 
-        if execution is None:
-            return None, None
 
-        return execution.get("started_at"), execution.get("completed_at")
+def get_execution_period(timing: list[dict]) -> tuple[Optional[str], Optional[str]]:
+    execution = first(period for period in timing if period["name"] == "execute")
 
-    @property
-    def status(self) -> str:
-        return self._result["status"]
+    if execution is None:
+        return None, None
 
-    @property
-    def status_reason(self) -> Optional[str]:
-        return self._result.get("message")
+    return execution.get("started_at"), execution.get("completed_at")
@@ -1,4 +1,3 @@
-from functools import cached_property
 from pathlib import Path
 
 from funcy import lmap
@@ -8,17 +7,27 @@ from .result import Result
 
 
 class RunResults:
+    __slots__ = ("metadata", "results", "_args")
+
     def __init__(self, file: Path) -> None:
-        self._results = load_json(file)
+        self._load(load_json(file))
+
+    @classmethod
+    def from_dict(cls, run_results: dict) -> "RunResults":
+        """Run results built from already decoded run_results.json or results of a running invocation"""
+        instance = cls.__new__(cls)
+        instance._load(run_results)
+        return instance
 
-    @cached_property
-    def results(self) -> list[Result]:
-        return lmap(Result, self._results.get("results", []))
+    def _load(self, run_results: dict) -> None:
+        self.metadata: dict = run_results["metadata"]
+        self.results: list[Result] = lmap(Result, run_results.get("results", []))
+        self._args: dict = run_results.get("args", {})
 
     @property
     def invocation_id(self) -> str:
-        return self._results["metadata"]["invocation_id"]
+        return self.metadata["invocation_id"]
 
     @property
     def profiles_dir(self) -> Path:
-        return Path(self._results["args"]["profiles_dir"])
+        return Path(self._args["profiles_dir"])
@@ -0,0 +1,241 @@
+import re
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+
+from odd_dbt.domain.manifest import Manifest, resource_type_of
+from odd_dbt.errors import SelectorError
+
+_CRITERIA = re.compile(
+    r"^(?P<childrens_parents>@)?"
+    r"(?:(?P<parents_depth>\d*)(?P<parents>\+))?"
+    r"(?:(?P<method>[\w.]+):)?"
+    r"(?P<value>.*?)"
+    r"(?:(?P<children>\+)(?P<children_depth>\d*))?$"
+)
+
+# Node fields compared by state:modified, others change on each parse
+_STATE_FIELDS = ("checksum", "config", "description", "columns", "meta", "tags")
+
+
+@dataclass(frozen=True)
+class SelectionCriteria:
+    """Single dbt selector, i.e. tag:nightly, +model_name, path:models/staging+"""
+
+    method: str
+    value: str
+    parents: bool = False
+    parents_depth: Optional[int] = None
+    children: bool = False
+    children_depth: Optional[int] = None
+    childrens_parents: bool = False
+
+    @classmethod
+    def parse(cls, raw: str) -> "SelectionCriteria":
+        match = _CRITERIA.match(raw)
+        if not match or not match["value"]:
+            raise SelectorError(f"Invalid selector: {raw!r}")
+
+        if match["childrens_parents"] and (match["parents"] or match["children"]):
+            raise SelectorError(f"'@' can't be combined with '+' in selector {raw!r}")
+
+        value = match["value"]
+        method = match["method"]
+        if method is None:
+            method = "path" if "/" in value or value.endswith(".sql") else "fqn"
+
+        return cls(
+            method=method,
+            value=value,
+            parents=bool(match["parents"]),
+            parents_depth=int(match["parents_depth"]) if match["parents_depth"] else None,
+            children=bool(match["children"]),
+            children_depth=int(match["children_depth"]) if match["children_depth"] else None,
+            childrens_parents=bool(match["childrens_parents"]),
+        )
+
+
+class NodeSelector:
+    """
+    Selects manifest nodes and sources by dbt node selection syntax.
+    Selectors in a list or separated by space are united, separated by comma are intersected.
+    Tests are selected along with any node they depend on, as `dbt` does with eager indirect selection.
+
+    Methods which can be answered from unique_id (resource_type, package, source) don't read nodes,
+    graph operators are resolved by the manifest lineage index.
+    """
+
+    def __init__(self, manifest: Manifest, state: Optional[Manifest] = None) -> None:
+        self._manifest = manifest
+        self._state = state
+        self._nodes = manifest.raw_nodes
+        self._sources = manifest.raw_sources
+        self._methods: dict[str, Callable[[str], Iterator[str]]] = {
+            "fqn": self._by_fqn,
+            "tag": self._by_tag,
+            "path": self._by_path,
+            "resource_type": self._by_resource_type,
+            "package": self._by_package,
+            "source": self._by_source,
+            "test_type": self._by_test_type,
+            "state": self._by_state,
+        }
+
+    def select(
+        self, select: Sequence[str] = (), exclude: Sequence[str] = ()
+    ) -> Optional[set[str]]:
+        """
+        :param select: selectors of included nodes, all nodes when empty
+        :param exclude: selectors of excluded nodes
+        :return: unique ids of selected nodes and sources, None when nothing is filtered
+        """
+        if not select and not exclude:
+            return None
+
+        if select:
+            selected = self._with_tests(self._union(select))
+        else:
+            selected = {*self._nodes, *self._sources}
+
+        if exclude:
+            selected -= self._with_tests(self._union(exclude))
+
+        return selected
+
+    def _union(self, selectors: Iterable[str]) -> set[str]:
+        result: set[str] = set()
+        for selector in selectors:
+            for union_part in selector.split():
+                result |= self._intersection(union_part.split(","))
+        return result
+
+    def _intersection(self, selectors: Sequence[str]) -> set[str]:
+        result = self._resolve(SelectionCriteria.parse(selectors[0]))
+        for selector in selectors[1:]:
+            result &= self._resolve(SelectionCriteria.parse(selector))
+        return result
+
+    def _resolve(self, criteria: SelectionCriteria) -> set[str]:
+        method, _, argument = criteria.method.partition(".")
+        if method == "config" and argument:
+            matched = set(self._by_config(argument, criteria.value))
+        elif method in self._methods and not argument:
+            matched = set(self._methods[method](criteria.value))
+        else:
+            raise SelectorError(
+                f"Unknown selector method {criteria.method!r}. "
+                f"Available: {', '.join([*self._methods, 'config.<key>'])}"
+            )
+
+        lineage = self._manifest.lineage
+        if criteria.childrens_parents:
+            return lineage.upstream(lineage.downstream(matched))
+
+        result = set(matched)
+        if criteria.parents:
+            result |= lineage.upstream(matched, criteria.parents_depth)
+        if criteria.children:
+            result |= lineage.downstream(matched, criteria.children_depth)
+        return result
+
+    def _with_tests(self, selected: set[str]) -> set[str]:
+        lineage = self._manifest.lineage
+        tests = {
+            child
+            for uid in selected
+            for child in lineage.children(uid)
+            if resource_type_of(child) == "test"
+        }
+        return selected | tests
+
+    def _all(self) -> Iterator[tuple[str, dict]]:
+        yield from self._nodes.items()
+        yield from self._sources.items()
+
+    def _by_fqn(self, value: str) -> Iterator[str]:
+        parts = value.split(".")
+        # Sources are selected by source: method, as in dbt
+        for uid, node in self._nodes.items():
+            # Node name is a part of unique_id, fqn is read only when it doesn't match
+            if len(parts) == 1 and fnmatchcase(name_of(uid), value):
+                yield uid
+                continue
+
+            fqn = node.get("fqn") or []
+            # Selector is a prefix of fqn, i.e. package or folder, and may omit the package name, like dbt allows
+            if any(
+                len(candidate) >= len(parts) and all(map(fnmatchcase, candidate, parts))
+                for candidate in (fqn, fqn[1:])
+            ):
+                yield uid
+
+    def _by_tag(self, value: str) -> Iterator[str]:
+        for uid, node in self._all():
+            if any(fnmatchcase(tag, value) for tag in node.get("tags") or []):
+                yield uid
+
+    def _by_path(self, value: str) -> Iterator[str]:
+        prefix = value.rstrip("/") + "/"
+        for uid, node in self._all():
+            path = node.get("original_file_path") or ""
+            if path == value or path.startswith(prefix) or fnmatchcase(path, value):
+                yield uid
+
+    def _by_resource_type(self, value: str) -> Iterator[str]:
+        for uid in (*self._nodes, *self._sources):
+            if resource_type_of(uid) == value:
+                yield uid
+
+    def _by_package(self, value: str) -> Iterator[str]:
+        for uid in (*self._nodes, *self._sources):
+            if fnmatchcase(uid.split(".")[1], value):
+                yield uid
+
+    def _by_source(self, value: str) -> Iterator[str]:
+        parts = value.split(".")
+        for uid in self._sources:
+            # source.<package>.<source_name>.<table_name>
+            if all(map(fnmatchcase, uid.split(".")[2:], parts)):
+                yield uid
+
+    def _by_test_type(self, value: str) -> Iterator[str]:
+        for uid, node in self._nodes.items():
+            if resource_type_of(uid) != "test":
+                continue
+            test_type = "generic" if "test_metadata" in node else "singular"
+            if test_type == value:
+                yield uid
+
+    def _by_config(self, key: str, value: str) -> Iterator[str]:
+        for uid, node in self._all():
+            config_value = (node.get("config") or {}).get(key)
+            values = config_value if isinstance(config_value, list) else [config_value]
+            if any(str(v).lower() == value.lower() for v in values):
+                yield uid
+
+    def _by_state(self, value: str) -> Iterator[str]:
+        if self._state is None:
+            raise SelectorError(
+                "Selector 'state:' needs a previous manifest, pass it with --state"
+            )
+        if value not in ("new", "modified"):
+            raise SelectorError(
+                f"Unknown state selector {value!r}. Available: new, modified"
+            )
+
+        previous = {**self._state.raw_nodes, **self._state.raw_sources}
+        for uid, node in self._all():
+            if (old := previous.get(uid)) is None:
+                yield uid
+            elif value == "modified" and any(
+                node.get(field) != old.get(field) for field in _STATE_FIELDS
+            ):
+                yield uid
+
+
+def name_of(unique_id: str) -> str:
+    """
+    :return: node name from unique_id, i.e. orders for model.shop.orders and source.shop.raw.orders
+    """
+    parts = unique_id.split(".")
+    return parts[3] if parts[0] == "source" else parts[2]
@@ -1,16 +1,27 @@
 import dataclasses
+from typing import Optional
 
 
 @dataclasses.dataclass
 class Source:
+    __slots__ = ("unique_id", "database", "schema", "name", "source_name", "loaded_at_field")
+
+    unique_id: str
     database: str
     schema: str
     name: str
+    # Name of the source the table belongs to, i.e. raw of source('raw', 'orders')
+    source_name: str
+    # Column freshness is checked by
+    loaded_at_field: Optional[str]
 
     @classmethod
     def _deserialize(cls, data: dict) -> "Source":
         return cls(
+            unique_id=data["unique_id"],
             database=data["database"],
             schema=data["schema"],
             name=data["name"],
+            source_name=data.get("source_name", ""),
+            loaded_at_field=data.get("loaded_at_field"),
         )
@@ -3,13 +3,19 @@ class DbtInternalError(Exception):
         super().__init__(original_message, *args)
 
 
-class ParsingReasonError(Exception):
+class ProfileError(Exception):
     ...
 
 
-class ProfileError(Exception):
+class DbtTestCommandError(Exception):
     ...
 
 
-class DbtTestCommandError(Exception):
+class SelectorError(Exception):
     ...
+
+
+class IngestionError(Exception):
+    def __init__(self, summary) -> None:
+        super().__init__(f"Ingestion failed. {summary}")
+        self.summary = summary
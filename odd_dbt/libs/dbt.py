@@ -1,9 +1,16 @@
+from pathlib import Path
+from typing import Optional, Sequence
+
 import dbt.events.functions as events_functions
 from dbt import flags
 from dbt.contracts.graph.nodes import ParsedNode, ModelNode, SeedNode
 
 from odd_dbt.domain.cli_args import CliArgs, FlagsArgs
-from odd_dbt.domain.context import DbtContext
+from odd_dbt.domain.context import DbtContext, OfflineDbtContext
+from odd_dbt.domain.selector import NodeSelector
+from odd_dbt.logger import logger
+from odd_dbt.utils import load_yaml
+from odd_dbt.utils.profiling import profiler
 
 
 def collect_flags(cli_args: CliArgs):
@@ -20,8 +27,61 @@ def collect_flags(cli_args: CliArgs):
 
 
 def get_context(cli_args: CliArgs) -> DbtContext:
-    collect_flags(cli_args)
-    return DbtContext(cli_args=cli_args)
+    with profiler.span("dbt.context"):
+        collect_flags(cli_args)
+        return DbtContext(cli_args=cli_args)
+
+
+def offline_settings(
+    config_file: Optional[Path] = None, **settings: Optional[str]
+) -> tuple[Optional[str], dict[str, str]]:
+    """
+    :param config_file: YAML file with adapter_type and credentials fields, i.e. host, account, database
+    :param settings: same fields, override ones from config_file when set
+    :return: adapter type, None when it is taken from manifest.json, and credentials fields
+    """
+    config = load_yaml(config_file) if config_file else {}
+    config.update({key: value for key, value in settings.items() if value is not None})
+    return config.pop("adapter_type", None), config
+
+
+def get_offline_context(
+    project_dir: Path,
+    target_path: Optional[Path] = None,
+    config_file: Optional[Path] = None,
+    **settings: Optional[str],
+) -> OfflineDbtContext:
+    adapter_type, credentials = offline_settings(config_file, **settings)
+
+    with profiler.span("dbt.context"):
+        context = OfflineDbtContext(
+            project_dir=project_dir,
+            credentials=credentials,
+            target_path=target_path,
+            adapter_type=adapter_type,
+        )
+        context.check_credentials()
+    return context
+
+
+def select_nodes(
+    context: DbtContext,
+    select: Sequence[str] = (),
+    exclude: Sequence[str] = (),
+    state: Optional[Path] = None,
+) -> Optional[set[str]]:
+    """
+    :return: unique ids of nodes selected by dbt selectors, None when all nodes are used
+    """
+    state_manifest = context.state_manifest(state) if state else None
+    selected = NodeSelector(context.manifest, state_manifest).select(select, exclude)
+
+    if selected is not None:
+        logger.info(f"Selected {len(selected)} nodes")
+        if not selected:
+            logger.warning(f"No nodes match --select {list(select)} --exclude {list(exclude)}, nothing will be ingested")
+
+    return selected
 
 
 def is_a_model_node(node: ParsedNode) -> bool:
@@ -1,3 +1,11 @@
-from odd_models.logger import logger
+import os
+import sys
 
-logger = logger
+from loguru import logger
+
+# Same setup as odd_models.logger, without importing odd_models models on startup
+try:
+    logger.remove()
+    logger.add(sys.stderr, level=os.getenv("LOGLEVEL", "INFO"))
+except Exception:
+    logger.add(sys.stderr, level="DEBUG")
@@ -0,0 +1,154 @@
+from datetime import datetime
+from typing import Collection, Optional
+
+import pytz
+from odd_models import MetadataExtension
+from odd_models.models import (
+    DataEntity,
+    DataEntityList,
+    DataEntityType,
+    DataQualityTest,
+    DataQualityTestExpectation,
+    DataQualityTestRun,
+    QualityRunStatus,
+)
+from oddrn_generator import DbtGenerator
+
+from odd_dbt.domain import SourceFreshness, SourceFreshnessResults
+from odd_dbt.domain.context import DbtContext
+from odd_dbt.domain.source import Source
+from odd_dbt.logger import logger
+from odd_dbt.mapper.helpers import datetime_format
+from odd_dbt.mapper.metadata import SCHEMA_URL
+from odd_dbt.utils.profiling import profiler
+
+FRESHNESS_TEST_TYPE = "freshness"
+
+# warn keeps the run successful, as warned dbt tests do
+FRESHNESS_STATUSES = {
+    "pass": QualityRunStatus.SUCCESS,
+    "warn": QualityRunStatus.SUCCESS,
+    "error": QualityRunStatus.FAILED,
+    "runtime error": QualityRunStatus.BROKEN,
+}
+
+
+class DbtFreshnessMapper:
+    """Maps each source of sources.json to a freshness test and its run of the invocation"""
+
+    def __init__(
+        self,
+        context: DbtContext,
+        generator: DbtGenerator,
+        freshness: Optional[SourceFreshnessResults] = None,
+        selected: Optional[Collection[str]] = None,
+    ) -> None:
+        """
+        :param freshness: results of dbt source freshness, sources.json of the target folder when None
+        :param selected: unique ids of sources to map, all sources when None
+        """
+        self._context = context
+        self._generator = generator
+        self._freshness = freshness or context.source_freshness
+        self._selected = selected
+
+    @profiler.spanned("map.freshness")
+    def map(self) -> DataEntityList:
+        results = self._freshness.results
+        if self._selected is not None:
+            results = [res for res in results if res.unique_id in self._selected]
+            logger.info(f"{len(results)} source freshness results are selected")
+
+        sources = self._context.manifest.sources
+        profiler.count("results", len(results))
+
+        data_entities = []
+        for result in results:
+            if not (source := sources.get(result.unique_id)):
+                logger.warning(f"Can't map freshness of {result.unique_id}: source is not in manifest.json")
+                continue
+
+            try:
+                data_entities.extend(self.map_result(result, source))
+            except Exception as e:
+                logger.warning(f"Can't map freshness of {result.unique_id}: {e}")
+
+        if not data_entities:
+            raise ValueError("No source freshness results were mapped. Data will not be ingested")
+
+        profiler.count("entities", len(data_entities))
+        return DataEntityList(
+            data_source_oddrn=self._generator.get_data_source_oddrn(),
+            items=data_entities,
+        )
+
+    def map_result(
+        self, result: SourceFreshness, source: Source
+    ) -> tuple[DataEntity, DataEntity]:
+        name = f"source_freshness_{source.source_name}_{source.name}"
+        self._generator.set_oddrn_paths(**{"databases": source.database, "tests": name})
+
+        job = DataEntity(
+            oddrn=self._generator.get_oddrn_by_path("tests"),
+            owner=None,
+            name=name,
+            type=DataEntityType.JOB,
+            metadata=[
+                MetadataExtension(
+                    schema_url=SCHEMA_URL,
+                    metadata={
+                        "source_unique_id": source.unique_id,
+                        "loaded_at_field": source.loaded_at_field,
+                        "warn_after": str(result.warn_after) if result.warn_after else None,
+                        "error_after": str(result.error_after) if result.error_after else None,
+                        "filter": result.filter,
+                    },
+                )
+            ],
+            data_quality_test=DataQualityTest(
+                suite_name=name,
+                dataset_list=[self._context.oddrn_generator.get_oddrn_for(source)],
+                expectation=DataQualityTestExpectation(type=FRESHNESS_TEST_TYPE),
+            ),
+        )
+
+        start_time, end_time = result.execution_period
+        run = DataEntity(
+            oddrn=self._generator.get_oddrn_by_path("runs", self._freshness.invocation_id),
+            name=name,
+            type=DataEntityType.JOB_RUN,
+            owner=None,
+            metadata=[
+                MetadataExtension(
+                    schema_url=SCHEMA_URL,
+                    metadata={
+                        "status": result.status,
+                        "max_loaded_at": result.max_loaded_at,
+                        "snapshotted_at": result.snapshotted_at,
+                        "max_loaded_at_time_ago_in_s": result.age_seconds,
+                    },
+                )
+            ],
+            data_quality_test_run=DataQualityTestRun(
+                data_quality_test_oddrn=job.oddrn,
+                start_time=datetime_format(start_time or result.snapshotted_at) or datetime.now(tz=pytz.UTC),
+                end_time=datetime_format(end_time or result.snapshotted_at) or datetime.now(tz=pytz.UTC),
+                status=FRESHNESS_STATUSES.get(result.status, QualityRunStatus.UNKNOWN),
+                status_reason=get_reason(result),
+            ),
+        )
+
+        return job, run
+
+
+def get_reason(result: SourceFreshness) -> Optional[str]:
+    if result.status == "runtime error":
+        return result.error or "Error during freshness check"
+
+    if result.status not in ("warn", "error"):
+        return None
+
+    threshold = result.error_after if result.status == "error" else result.warn_after
+    age = f"{result.age_seconds / 3600:.1f} hours" if result.age_seconds is not None else "unknown time"
+    reason = f"Source was loaded {age} ago, at {result.max_loaded_at}"
+    return f"{reason}, {result.status} after {threshold}" if threshold else reason
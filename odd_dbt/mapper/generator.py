@@ -1,8 +1,8 @@
 import abc
 from functools import singledispatchmethod
-from typing import Type, Protocol, Any
+from typing import Type, Protocol, Any, Union
 
-from dbt.contracts.graph.nodes import ModelNode
+from dbt.contracts.graph.nodes import ModelNode, SnapshotNode
 from oddrn_generator import generators as odd
 
 from odd_dbt.domain.credentials import Credentials
@@ -11,22 +11,42 @@ from odd_dbt.domain.source import Source
 
 class Generator(Protocol):
     generator_cls: Type[odd.Generator]
+    # Credentials fields ODDRNs are built from
+    required_credentials: tuple[str, ...]
     credentials: Credentials
 
     @singledispatchmethod
     def get_oddrn_for(self, node: Any) -> str:
         ...
 
-    @get_oddrn_for.register
-    def _(self, node: ModelNode) -> str:
-        return self._get_oddrn_for_model(node)
+    @get_oddrn_for.register(SnapshotNode)
+    @get_oddrn_for.register(ModelNode)
+    def _(self, node: Union[ModelNode, SnapshotNode]) -> str:
+        key = (node.unique_id, node.config.materialized)
+        if (oddrn := self._oddrns.get(key)) is None:
+            oddrn = self._oddrns[key] = self._get_oddrn_for_model(node)
+        return oddrn
 
     @get_oddrn_for.register
     def _(self, node: Source) -> str:
-        return self._get_oddrn_for_source(node)
+        key = (node.unique_id, "source")
+        if (oddrn := self._oddrns.get(key)) is None:
+            oddrn = self._oddrns[key] = self._get_oddrn_for_source(node)
+        return oddrn
+
+    def get_generator(self, host: str, database: str) -> odd.Generator:
+        """
+        :return: oddrn generator shared by all nodes of the same host and database
+        """
+        key = (host, database)
+        if (generator := self._generators.get(key)) is None:
+            generator = self._generators[key] = self.generator_cls(
+                host_settings=host, databases=database
+            )
+        return generator
 
     @abc.abstractmethod
-    def _get_oddrn_for_model(self, model: ModelNode) -> str:
+    def _get_oddrn_for_model(self, model: Union[ModelNode, SnapshotNode]) -> str:
         ...
 
     @abc.abstractmethod
@@ -36,14 +56,17 @@ class Generator(Protocol):
 
 class PostgresGenerator(Generator):
     generator_cls = odd.PostgresqlGenerator
+    required_credentials = ("host", "database")
 
     def __init__(self, credentials: Credentials) -> None:
         self.credentials = credentials
+        self._generators: dict[tuple[str, str], odd.Generator] = {}
+        self._oddrns: dict[tuple[str, str], str] = {}
 
-    def _get_oddrn_for_model(self, model: ModelNode) -> str:
+    def _get_oddrn_for_model(self, model: Union[ModelNode, SnapshotNode]) -> str:
         host = self.credentials["host"]
         database = self.credentials["database"] or self.credentials["dbname"]
-        generator = self.generator_cls(host_settings=host, databases=database)
+        generator = self.get_generator(host, database)
         path = "views" if model.config.materialized == "view" else "tables"
         generator.set_oddrn_paths(**{"schemas": model.schema})
         return generator.get_oddrn_by_path(path, model.name)
@@ -51,23 +74,26 @@ class PostgresGenerator(Generator):
     def _get_oddrn_for_source(self, source: Source) -> str:
         host = self.credentials["host"]
         database = source.database
-        generator = self.generator_cls(host_settings=host, databases=database)
+        generator = self.get_generator(host, database)
         generator.set_oddrn_paths(**{"schemas": source.schema, "tables": source.name})
         return generator.get_oddrn_by_path("tables")
 
 
 class SnowflakeGenerator(Generator):
     generator_cls = odd.SnowflakeGenerator
+    required_credentials = ("account", "database")
 
     def __init__(self, credentials: Credentials) -> None:
         self.credentials = credentials
+        self._generators: dict[tuple[str, str], odd.Generator] = {}
+        self._oddrns: dict[tuple[str, str], str] = {}
 
-    def _get_oddrn_for_model(self, model: ModelNode) -> str:
+    def _get_oddrn_for_model(self, model: Union[ModelNode, SnapshotNode]) -> str:
         host = f"{self.credentials['account'].upper()}.snowflakecomputing.com"
         database = self.credentials["database"] or self.credentials["dbname"]
         database = database.upper()
 
-        generator = self.generator_cls(host_settings=host, databases=database)
+        generator = self.get_generator(host, database)
 
         name = model.name.upper()
         path = "views" if model.config.materialized == "view" else "tables"
@@ -78,7 +104,7 @@ class SnowflakeGenerator(Generator):
         host = f"{self.credentials['account'].upper()}.snowflakecomputing.com"
         database = source.database.upper()
 
-        generator = self.generator_cls(host_settings=host, databases=database)
+        generator = self.get_generator(host, database)
 
         generator.set_oddrn_paths(
             **{"schemas": source.schema.upper(), "tables": source.name.upper()}
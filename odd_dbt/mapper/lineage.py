@@ -1,73 +1,182 @@
-import traceback
-from typing import Optional, Union
+from typing import Collection, Iterator, Mapping, Optional, Union
 
-from dbt.contracts.graph.nodes import ModelNode, SeedNode, ColumnInfo
-from odd_models import DataSetFieldType
+from dbt.contracts.graph.nodes import ModelNode, SeedNode, SnapshotNode, ColumnInfo
+from odd_models import DataSetFieldType, MetadataExtension
 from odd_models.models import (
+    DataEntity,
     DataEntityList,
     DataEntityType,
+    DataSet,
 )
 from oddrn_generator import DbtGenerator
 
 from odd_dbt import logger
 from odd_dbt.domain.context import DbtContext
+from odd_dbt.domain.manifest import resource_type_of
 from odd_dbt.domain.model import ModelEntity, SeedEntity, NodeEntity, ColumnEntity
 from odd_dbt.domain.source import Source
-from odd_dbt.mapper.generator import create_generator
-from odd_dbt.mapper.metadata import get_model_metadata
-from odd_dbt.mapper.types import DBT_TO_ODD
+from odd_dbt.mapper.metadata import (
+    DEFAULT_PROJECTION,
+    MetadataProjection,
+    get_model_metadata,
+)
+from odd_dbt.mapper.parallel import (
+    Mapped,
+    ShardContext,
+    map_safely,
+    map_shards,
+    shard,
+)
+from odd_dbt.mapper.types import parse_type
+from odd_dbt.utils.profiling import profiler
 
 
 class DbtLineageMapper:
-    _SUPPORTED_NODE_TYPES = (ModelNode, SeedNode)
+    _SUPPORTED_RESOURCE_TYPES = ("model", "snapshot", "seed")
 
-    def __init__(self, context: DbtContext, generator: DbtGenerator) -> None:
+    def __init__(
+        self,
+        context: DbtContext,
+        generator: DbtGenerator,
+        selected: Optional[Collection[str]] = None,
+        metadata: MetadataProjection = DEFAULT_PROJECTION,
+        workers: int = 1,
+    ) -> None:
+        """
+        :param selected: unique ids of nodes to map, all nodes when None
+        :param metadata: fields of manifest node kept in entity metadata
+        :param workers: processes mapping nodes, nodes are mapped in this process when 1
+        """
         self._context = context
         self._generator = generator
-        self._nodes = {
-            uid: node
-            for uid, node in self._context.manifest.nodes.items()
-            if isinstance(node, self._SUPPORTED_NODE_TYPES)
-        }
+        self._metadata = metadata
+        self._workers = workers
+        self._raw_nodes = self._context.manifest.raw_nodes
+        self._all_nodes = self._context.manifest.nodes.select(
+            *self._SUPPORTED_RESOURCE_TYPES
+        )
+        self._nodes = (
+            self._all_nodes
+            if selected is None
+            else self._context.manifest.nodes.subset(
+                uid
+                for uid in selected
+                if resource_type_of(uid) in self._SUPPORTED_RESOURCE_TYPES
+            )
+        )
         self._sources = self._context.manifest.sources
+        self._lineage = self._context.manifest.lineage
+        self._catalog = self._context.catalog
 
+    @profiler.spanned("map.lineage")
     def map(self) -> DataEntityList:
-        nodes: dict[str, Union[ModelNode, SeedNode]] = self._nodes
-
-        node_entities = {}
-        for uid, node in nodes.items():
-            try:
-                node_entities[uid] = self.map_node(node)
-            except Exception as e:
-                logger.warning(f"Can't map node {node.unique_id}: {str(e)}")
-                logger.debug(traceback.format_exc())
+        nodes: Mapping[str, Union[ModelNode, SnapshotNode, SeedNode]] = self._nodes
+
+        if self._workers > 1:
+            mapped_nodes = self.map_nodes_parallel()
+        else:
+            mapped_nodes = (
+                map_safely(uid, self.map_node, node) for uid, node in nodes.items()
+            )
+
+        node_entities, failed = {}, set()
+        for mapped in mapped_nodes:
+            if mapped.error is not None:
+                logger.warning(f"Can't map node {mapped.unique_id}: {mapped.error}")
+                logger.debug(mapped.traceback)
+                failed.add(mapped.unique_id)
                 continue
 
-        for node_id, entity in node_entities.items():
-            upstream_ids = nodes[node_id].depends_on_nodes
+            node_entities[mapped.unique_id] = mapped.value
 
-            for upstream_id in upstream_ids:
+        missing, unmapped = set(), set()
+        for node_id, entity in node_entities.items():
+            for upstream_id in self._lineage.parents(node_id):
                 if source := self._sources.get(upstream_id):
                     entity.add_input(get_source_oddrn(source, self._context))
                     continue
 
                 upstream_entity = node_entities.get(upstream_id)
 
+                if upstream_id in failed:
+                    unmapped.add(upstream_id)
+                    entity.add_input(self.get_node_oddrn(upstream_id))
+                    continue
+
+                if not upstream_entity and upstream_id in self._all_nodes:
+                    # Upstream is not selected, it is referenced without mapping
+                    entity.add_input(self.get_node_oddrn(upstream_id))
+                    continue
+
                 if not upstream_entity:
-                    logger.warning(
-                        f"For {node_id} Can't find node {upstream_id}. Upstream node must be model or seed"
-                    )
+                    missing.add(upstream_id)
                     continue
 
                 entity.add_upstream(upstream_entity)
 
+        if missing:
+            logger.warning(
+                f"{len(missing)} upstream nodes are not models, snapshots, seeds or sources and are not linked, "
+                f"i.e. {examples(missing)}"
+            )
+        if unmapped:
+            logger.warning(
+                f"{len(unmapped)} upstream nodes failed to map and are linked by ODDRN only, i.e. {examples(unmapped)}"
+            )
+
+        profiler.count("nodes", len(nodes))
+        profiler.count("entities", len(node_entities))
         return DataEntityList(
             data_source_oddrn=self._generator.get_data_source_oddrn(),
-            items=list(node_entities.values()),
+            items=[
+                item
+                for entity in node_entities.values()
+                for item in (entity, *entity.outputs())
+            ],
         )
 
-    def map_node(self, node: Union[ModelNode, SeedNode]) -> Optional[NodeEntity]:
-        if isinstance(node, ModelNode):
+    def map_nodes_parallel(self) -> Iterator[Mapped[NodeEntity]]:
+        """
+        Maps nodes by shards in a process pool, upstream edges are linked afterwards in this process.
+        """
+        catalog = self._catalog.raw_nodes if self._catalog else None
+        payloads = [
+            (
+                ShardContext(
+                    nodes={uid: self._raw_nodes[uid] for uid in uids},
+                    sources={},
+                    adapter_type=self._context.adapter_type,
+                    credentials=self._context.credentials,
+                    catalog=catalog
+                    and {uid: catalog[uid] for uid in uids if uid in catalog},
+                ),
+                self._generator,
+                self._metadata,
+                uids,
+            )
+            for uids in shard(list(self._nodes), self._workers)
+        ]
+
+        logger.info(f"Mapping {len(self._nodes)} nodes by {self._workers} workers")
+        return map_shards(map_nodes_shard, payloads, self._workers)
+
+    def get_node_oddrn(self, unique_id: str) -> str:
+        if resource_type_of(unique_id) == "seed":
+            self._generator.set_oddrn_paths(seeds=unique_id)
+            return self._generator.get_oddrn_by_path("seeds")
+
+        self._generator.set_oddrn_paths(models=unique_id)
+        return self._generator.get_oddrn_by_path("models")
+
+    def get_metadata(
+        self, node: Union[ModelNode, SnapshotNode, SeedNode]
+    ) -> MetadataExtension:
+        return get_model_metadata(self._raw_nodes[node.unique_id], self._metadata)
+
+    def map_node(
+        self, node: Union[ModelNode, SnapshotNode, SeedNode]
+    ) -> Optional[NodeEntity]:
+        if isinstance(node, (ModelNode, SnapshotNode)):
             return self.map_model(node)
         elif isinstance(node, SeedNode):
             return self.map_seed(node)
@@ -80,45 +189,109 @@ class DbtLineageMapper:
             oddrn=self._generator.get_oddrn_by_path("seeds"),
             owner=None,
             type=DataEntityType.FILE,
-            metadata=[get_model_metadata(node)],
+            metadata=[self.get_metadata(node)],
         )
 
-        for column in node.columns.values():
-            seed_entity.add_column(self.map_column(column, generator=self._generator))
+        for column in self.map_columns(node, seed_entity.oddrn):
+            seed_entity.add_column(column)
 
         return seed_entity
 
-    def map_column(self, column: ColumnInfo, generator: DbtGenerator) -> ColumnEntity:
-        oddrn = generator.get_oddrn_by_path("seeds") + f"/columns/{column.name}"
+    def map_columns(
+        self, node: Union[ModelNode, SnapshotNode, SeedNode], parent_oddrn: str
+    ) -> Iterator[ColumnEntity]:
+        """
+        Columns with types of catalog.json, described in manifest.json.
+        Columns declared in manifest.json are used, when the node is not in catalog.
+        """
+        declared: dict[str, ColumnInfo] = {
+            name.lower(): column for name, column in node.columns.items()
+        }
+        catalog_columns = self._catalog.columns(node.unique_id) if self._catalog else []
+
+        if not catalog_columns:
+            for column in node.columns.values():
+                yield self.map_column(
+                    column.name, column.data_type, column.description, parent_oddrn
+                )
+            return
+
+        for column in catalog_columns:
+            name = column["name"]
+            description = (info := declared.get(name.lower())) and info.description
+            yield self.map_column(name, column.get("type"), description, parent_oddrn)
+
+    def map_column(
+        self,
+        name: str,
+        data_type: Optional[str],
+        description: Optional[str],
+        parent_oddrn: str,
+    ) -> ColumnEntity:
         return ColumnEntity(
-            name=column.name,
-            oddrn=oddrn,
+            name=name,
+            oddrn=f"{parent_oddrn}/columns/{name}",
+            description=description or None,
             type=DataSetFieldType(
-                type=DBT_TO_ODD['UNKNOWN'],
-                is_nullable=True
+                type=parse_type(data_type),
+                logical_type=data_type,
+                is_nullable=True,
             ),
         )
 
-    def map_model(self, node: ModelNode) -> ModelEntity:
+    def map_model(self, node: Union[ModelNode, SnapshotNode]) -> ModelEntity:
         self._generator.set_oddrn_paths(models=node.unique_id)
         model_entity = ModelEntity(
             name=node.unique_id,
             oddrn=self._generator.get_oddrn_by_path("models"),
             owner=None,
             type=DataEntityType.JOB,
-            metadata=[get_model_metadata(node)],
+            metadata=[self.get_metadata(node)],
         )
-        model_entity.add_output(get_materialized_entity_oddrn(node, self._context))
+        output_oddrn = get_materialized_entity_oddrn(node, self._context)
+        model_entity.add_output(output_oddrn)
+
+        # Columns belong to the table the model is materialized to, not to the model job
+        columns = list(self.map_columns(node, output_oddrn))
+        if columns and node.config.materialized != "ephemeral":
+            model_entity.set_output_dataset(
+                DataEntity(
+                    oddrn=output_oddrn,
+                    name=node.alias or node.name,
+                    owner=None,
+                    type=(
+                        DataEntityType.VIEW
+                        if node.config.materialized == "view"
+                        else DataEntityType.TABLE
+                    ),
+                    dataset=DataSet(field_list=columns),
+                )
+            )
+
         return model_entity
 
+
+def examples(unique_ids: Collection[str], count: int = 3) -> str:
+    return ", ".join(sorted(unique_ids)[:count]) + (", ..." if len(unique_ids) > count else "")
+
+
+def map_nodes_shard(
+    context: ShardContext,
+    generator: DbtGenerator,
+    metadata: MetadataProjection,
+    unique_ids: list[str],
+) -> list[Mapped[NodeEntity]]:
+    """Runs in a worker process"""
+    mapper = DbtLineageMapper(context=context, generator=generator, metadata=metadata)
+    nodes = context.manifest.nodes
+    return [map_safely(uid, lambda: mapper.map_node(nodes[uid])) for uid in unique_ids]
+
+
 def get_source_oddrn(source_node: Source, context: DbtContext) -> str:
-    return create_generator(
-        adapter_type=context.adapter_type,
-        credentials=context.credentials,
-    ).get_oddrn_for(source_node)
-
-def get_materialized_entity_oddrn(model_node: ModelNode, context: DbtContext) -> str:
-    return create_generator(
-        adapter_type=context.adapter_type,
-        credentials=context.credentials,
-    ).get_oddrn_for(model_node)
+    return context.oddrn_generator.get_oddrn_for(source_node)
+
+
+def get_materialized_entity_oddrn(
+    model_node: Union[ModelNode, SnapshotNode], context: DbtContext
+) -> str:
+    return context.oddrn_generator.get_oddrn_for(model_node)
@@ -1,6 +1,90 @@
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Iterable, Mapping, Optional, Union
+
 from dbt.contracts.graph.nodes import ModelNode, TestNode, ColumnInfo
 from odd_models import MetadataExtension
 
+from odd_dbt.defaults import FULL_PROFILE, MAX_TEXT_LENGTH, METADATA_PROFILES
+from odd_dbt.domain import FailureSample
+
+# Metadata of tests and their runs
+SCHEMA_URL = "https://raw.githubusercontent.com/opendatadiscovery/opendatadiscovery-specification/main/specification/extensions/dbt.json#/definitions/DataQualityTestRun"
+
+
+@dataclass(frozen=True)
+class MetadataProjection:
+    """
+    Builds entity metadata from a raw manifest.json node.
+    Only allowed fields are taken, string values longer than `max_text_length`
+    are truncated or, with `hash_text`, replaced by their sha256.
+
+    :param fields: dot separated field paths, whole node when None
+    """
+
+    fields: Optional[tuple[tuple[str, ...], ...]] = None
+    max_text_length: int = MAX_TEXT_LENGTH
+    hash_text: bool = False
+
+    @classmethod
+    def from_options(
+        cls,
+        fields: Optional[Iterable[str]] = None,
+        max_text_length: int = MAX_TEXT_LENGTH,
+        hash_text: bool = False,
+    ) -> "MetadataProjection":
+        """
+        :param fields: profile names or field paths, may be comma separated, "default" profile when empty
+        """
+        names = [name.strip() for item in fields or () for name in item.split(",")]
+        names = [name for name in names if name] or ["default"]
+
+        if FULL_PROFILE in names:
+            return cls(max_text_length=max_text_length, hash_text=hash_text)
+
+        paths: dict[tuple[str, ...], None] = {}
+        for name in names:
+            for path in METADATA_PROFILES.get(name, (name,)):
+                paths[tuple(path.split("."))] = None
+
+        # Field taken as a whole already contains its nested fields
+        fields = tuple(
+            path
+            for path in paths
+            if not any(path[:i] in paths for i in range(1, len(path)))
+        )
+        return cls(fields=fields, max_text_length=max_text_length, hash_text=hash_text)
+
+    def project(self, node: Mapping[str, Any]) -> dict[str, Any]:
+        if self.fields is None:
+            return {key: self._text(value) for key, value in node.items()}
+
+        metadata: dict[str, Any] = {}
+        for path in self.fields:
+            value = node
+            for key in path:
+                if not isinstance(value, Mapping) or (value := value.get(key)) is None:
+                    break
+            else:
+                target = metadata
+                for key in path[:-1]:
+                    target = target.setdefault(key, {})
+                target[path[-1]] = self._text(value)
+
+        return metadata
+
+    def _text(self, value: Any) -> Any:
+        if not isinstance(value, str) or len(value) <= self.max_text_length:
+            return value
+
+        if self.hash_text:
+            return "sha256:" + hashlib.sha256(value.encode()).hexdigest()
+
+        return value[: self.max_text_length] + f"... [{len(value)} chars]"
+
+
+DEFAULT_PROJECTION = MetadataProjection.from_options()
+
 
 def get_metadata(test_node: TestNode) -> MetadataExtension:
     metadata = {
@@ -22,13 +106,33 @@ def get_metadata(test_node: TestNode) -> MetadataExtension:
         "path": test_node.path,
     }
 
-    schema_url = "https://raw.githubusercontent.com/opendatadiscovery/opendatadiscovery-specification/main/specification/extensions/dbt.json#/definitions/DataQualityTestRun"
-    return MetadataExtension(schema_url=schema_url, metadata=metadata)
+    return MetadataExtension(schema_url=SCHEMA_URL, metadata=metadata)
 
 
-def get_model_metadata(model_node: ModelNode) -> MetadataExtension:
+def get_failures_metadata(sample: FailureSample) -> MetadataExtension:
+    metadata = {
+        "failures": sample.failures,
+        "failures_relation": sample.relation,
+        "failures_sample": sample.rows,
+        "failures_sample_truncated": sample.truncated,
+    }
+    return MetadataExtension(schema_url=SCHEMA_URL, metadata=metadata)
+
+
+def get_model_metadata(
+    model_node: Union[ModelNode, Mapping[str, Any]],
+    projection: Optional["MetadataProjection"] = None,
+) -> MetadataExtension:
+    """
+    :param model_node: dbt node or its raw manifest.json entry
+    :param projection: fields to take from the node, DEFAULT_PROJECTION when None
+    """
+    raw = model_node if isinstance(model_node, Mapping) else model_node.to_dict()
+    metadata = (projection or DEFAULT_PROJECTION).project(raw)
+
     schema_url = "https://raw.githubusercontent.com/opendatadiscovery/opendatadiscovery-specification/main/specification/extensions/dbt.json#/definitions/DataTransformer"
-    return MetadataExtension(schema_url=schema_url, metadata=model_node.to_dict())
+    return MetadataExtension(schema_url=schema_url, metadata=metadata)
+
 
 def get_column_metadata(column_info: ColumnInfo) -> MetadataExtension:
     schema_url = "https://raw.githubusercontent.com/opendatadiscovery/opendatadiscovery-specification/main/specification/extensions/dbt.json#/definitions/DataSetField"
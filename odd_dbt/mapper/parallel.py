@@ -0,0 +1,103 @@
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Callable, Generic, Iterable, Iterator, Optional, TypeVar
+
+from odd_dbt.domain import Catalog, Credentials, Manifest
+from odd_dbt.mapper.generator import Generator, create_generator
+
+T = TypeVar("T")
+
+# Each worker gets several shards, so a slow shard doesn't hold the whole pool
+SHARDS_PER_WORKER = 4
+
+
+@dataclass
+class Mapped(Generic[T]):
+    """Outcome of mapping a single node, error is logged by the caller"""
+
+    unique_id: str
+    value: Optional[T] = None
+    error: Optional[str] = None
+    traceback: Optional[str] = None
+
+
+def map_safely(unique_id: str, func: Callable[..., T], *args: Any) -> Mapped[T]:
+    try:
+        return Mapped(unique_id, value=func(*args))
+    except Exception as e:
+        return Mapped(unique_id, error=str(e), traceback=traceback.format_exc())
+
+
+class ShardContext:
+    """
+    Part of DbtContext used by mappers, which is sent to a worker process.
+    Keeps raw manifest.json entries of a shard only, dbt nodes are deserialized in the worker.
+    """
+
+    def __init__(
+        self,
+        nodes: dict[str, dict],
+        sources: dict[str, dict],
+        adapter_type: str,
+        credentials: Credentials,
+        invocation_id: Optional[str] = None,
+        catalog: Optional[dict[str, dict]] = None,
+    ) -> None:
+        """
+        :param catalog: catalog.json tables of the shard nodes, keyed by unique id
+        """
+        self._nodes = nodes
+        self._sources = sources
+        self._catalog = catalog
+        self.adapter_type = adapter_type
+        self.credentials = credentials
+        self.invocation_id = invocation_id
+
+    @cached_property
+    def manifest(self) -> Manifest:
+        return Manifest.from_dict(
+            {"metadata": {}, "nodes": self._nodes, "sources": self._sources}
+        )
+
+    @property
+    def catalog(self) -> Optional[Catalog]:
+        if self._catalog is None:
+            return None
+        return Catalog.from_dict({"nodes": self._catalog})
+
+    @cached_property
+    def oddrn_generator(self) -> Generator:
+        return create_generator(
+            adapter_type=self.adapter_type, credentials=self.credentials
+        )
+
+    def __getstate__(self) -> dict:
+        # Deserialized nodes and generators stay in the process which created them
+        return {
+            key: value
+            for key, value in self.__dict__.items()
+            if key not in ("manifest", "oddrn_generator")
+        }
+
+
+def shard(items: list[T], workers: int) -> Iterator[list[T]]:
+    """Splits items to ordered contiguous shards"""
+    size = max(1, -(-len(items) // (workers * SHARDS_PER_WORKER)))
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def map_shards(
+    func: Callable[..., list[Mapped[T]]],
+    payloads: Iterable[tuple],
+    workers: int,
+) -> Iterator[Mapped[T]]:
+    """
+    Runs func for each payload in a process pool.
+    Results are yielded in order of payloads, so output doesn't depend on scheduling.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for mapped in executor.map(func, *zip(*payloads)):
+            yield from mapped
@@ -1,5 +1,11 @@
+"""
+Failure reasons of dbt tests.
+Generic tests are dispatched to reason templates by test namespace and name, by name only when
+the namespace has no template of its own. Templates of other packages are added by register_reason.
+"""
 import re
-from typing import Optional
+from functools import lru_cache
+from typing import Callable, Optional
 
 from dbt.contracts.graph.nodes import (
     GenericTestNode,
@@ -9,9 +15,42 @@ from dbt.contracts.graph.nodes import (
 )
 from funcy import partial
 
-from ..errors import ParsingReasonError
+from ..domain import Result
 from ..logger import logger
 
+ReasonTemplate = Callable[[TestMetadata], str]
+
+# ref('model'), ref('package', 'model'), source('source', 'table')
+_RELATION = re.compile(r"""\b(?:ref|source)\(\s*(?:['"][^'"]*['"]\s*,\s*)?['"]([^'"]+)['"]""")
+_WORD = re.compile(r"(\w+)")
+
+_TEMPLATES: dict[tuple[Optional[str], str], ReasonTemplate] = {}
+_BY_NAME: dict[str, ReasonTemplate] = {}
+
+MAX_TEXT_LENGTH = 200
+
+
+def register_reason(
+    name: str, namespace: Optional[str] = None
+) -> Callable[[ReasonTemplate], ReasonTemplate]:
+    """
+    Registers reason template of generic test, i.e. of a custom package
+    :param namespace: package of the test, None for dbt built-in tests
+    """
+
+    def register(template: ReasonTemplate) -> ReasonTemplate:
+        _TEMPLATES[namespace, name] = template
+        _BY_NAME.setdefault(name, template)
+        return template
+
+    return register
+
+
+def find_template(test_metadata: TestMetadata) -> Optional[ReasonTemplate]:
+    return _TEMPLATES.get(
+        (test_metadata.namespace, test_metadata.name)
+    ) or _BY_NAME.get(test_metadata.name)
+
 
 def from_kwargs(test_metadata: TestMetadata, field: str, default=None):
     return test_metadata.kwargs.get(field, default)
@@ -28,132 +67,287 @@ get_compare_column = partial(from_kwargs, field="compare_column", default=[])
 
 
 def get_model_name(test_metadata: TestMetadata) -> Optional[str]:
-    try:
-        if model := from_kwargs(test_metadata, field="model"):
-            return parse_model_name(model)
-        else:
-            return None
-    except Exception as e:
-        logger.warning(f"Can't get model name from {test_metadata=}. {e}")
-        return None
+    return parse_model_name(from_kwargs(test_metadata, field="model"))
 
 
 def parse_model_name(model_name: Optional[str]) -> Optional[str]:
-    if model_name is None:
-        return None
-
-    try:
-        result = re.search(r"(\w+)", model_name)
-        return model_name if result is None else result[1]
-    except Exception as e:
-        logger.warning(f"Can't parse model name {model_name=}. {e}")
+    """
+    :param model_name: relation of test kwargs, i.e. "{{ get_where_subquery(ref('orders')) }}"
+    """
+    # Kwargs may hold lists or dicts, which can't be cache keys
+    if not isinstance(model_name, str):
         return model_name
 
+    return _parse_relation(model_name)
 
-class GenericTestReason:
-    def get_reason(self, test_node: GenericTestNode) -> str:
-        try:
-            test_metadata = test_node.test_metadata
 
-            return getattr(self, test_metadata.name)(test_node.test_metadata)
-        except Exception as e:
-            raise ParsingReasonError(f"Cant parse GenericTestReason. {e}") from e
+@lru_cache(maxsize=4096)
+def _parse_relation(model_name: str) -> str:
+    result = _RELATION.search(model_name) or _WORD.search(model_name)
+    return model_name if result is None else result[1]
+
+
+def truncate(text: str) -> str:
+    return f"{text[:MAX_TEXT_LENGTH]}..." if len(text) > MAX_TEXT_LENGTH else text
+
+
+# dbt built-in tests
+
+
+@register_reason("unique")
+def unique(test_metadata: TestMetadata) -> str:
+    column = get_column_name(test_metadata)
+    model = get_model_name(test_metadata)
+
+    return f"The {column=} in the {model=} must be unique"
+
+
+@register_reason("not_null")
+def not_null(test_metadata: TestMetadata) -> str:
+    column = get_column_name(test_metadata)
+    model = get_model_name(test_metadata)
+
+    return f"The {column=} in the {model=} must not contain null values"
+
+
+@register_reason("accepted_values")
+def accepted_values(test_metadata: TestMetadata) -> str:
+    column = get_column_name(test_metadata)
+    model = get_model_name(test_metadata)
+    acc_values = test_metadata.kwargs.get("values", "Unknown values")
+
+    return f"The {column} in the {model=} must be one of {acc_values}"
+
+
+@register_reason("relationships")
+def relationships(test_metadata: TestMetadata) -> str:
+    column = get_column_name(test_metadata)
+    model = get_model_name(test_metadata)
+
+    ref_model = parse_model_name(get_to(test_metadata))
+    ref_field = get_field(test_metadata, "id")
+
+    return f"Each value in the {column} in the {model} should exists as an {ref_field} in the {ref_model}"
+
+
+# dbt_utils
+
+
+@register_reason("expression_is_true", "dbt_utils")
+def expression_is_true(test_metadata: TestMetadata) -> str:
+    expression = truncate(get_expression(test_metadata) or "Unknown expression")
+    return f"{expression=} is not true"
+
+
+@register_reason("at_least_one", "dbt_utils")
+def at_least_one(test_metadata: TestMetadata) -> str:
+    return f"At least one row is expected for {get_column_name(test_metadata)}"
+
+
+@register_reason("cardinality_equality", "dbt_utils")
+def cardinality_equality(test_metadata: TestMetadata) -> str:
+    return f"Cardinality of {get_column_name(test_metadata)} is not as expected"
+
+
+@register_reason("equal_rowcount", "dbt_utils")
+def equal_rowcount(test_metadata: TestMetadata) -> str:
+    model = get_model_name(test_metadata)
+    compare_model = parse_model_name(get_compare_model(test_metadata))
+    return f"Rows count of {model=} and {compare_model=} are not equal"
 
-    def unique(self, test_metadata: TestMetadata) -> str:
-        column = get_column_name(test_metadata)
-        model = get_model_name(test_metadata)
 
-        return f"The {column=} in the {model=} must be unique"
+@register_reason("fewer_rows_than", "dbt_utils")
+def fewer_rows_than(test_metadata: TestMetadata) -> str:
+    model = get_model_name(test_metadata)
+    compare_model = parse_model_name(get_compare_model(test_metadata))
+    return f"{model=} must have fewer rows than {compare_model=}"
 
-    def not_null(self, test_metadata: TestMetadata) -> str:
-        column = get_column_name(test_metadata)
-        model = get_model_name(test_metadata)
 
-        return f"The {column=} in the {model=} must not contain null values"
+@register_reason("equality", "dbt_utils")
+def equality(test_metadata: TestMetadata) -> str:
+    model = get_model_name(test_metadata)
+    compare_model = parse_model_name(get_compare_model(test_metadata))
+    columns = truncate(",".join(get_compare_column(test_metadata) or []))
+    return f"{model} columns {columns} are not equal with {compare_model=}"
 
-    def accepted_values(self, test_metadata: TestMetadata) -> str:
-        column = get_column_name(test_metadata)
-        model = get_model_name(test_metadata)
-        acc_values = test_metadata.kwargs.get("values", "Unknown values")
 
-        return f"The {column} in the {model=} must be one of {acc_values}"
+@register_reason("not_constant", "dbt_utils")
+def not_constant(test_metadata: TestMetadata) -> str:
+    return f"{get_column_name(test_metadata)} is constant"
 
-    def relationships(self, test_metadata: TestMetadata) -> str:
-        column = get_column_name(test_metadata)
-        model = get_model_name(test_metadata)
 
-        ref_model = parse_model_name(get_to(test_metadata))
-        ref_field = get_field(test_metadata, "id")
+@register_reason("not_empty_string", "dbt_utils")
+def not_empty_string(test_metadata: TestMetadata) -> str:
+    return f"{get_column_name(test_metadata)} contains empty strings"
 
-        return f"Each value in the {column} in the {model} should exists as an {ref_field} in the {ref_model}"
 
-    def expression_is_true(self, test_metadata: TestMetadata) -> str:
-        expression = get_expression(test_metadata) or "Unknown expression"
-        if len(expression) > 200:
-            expression = f"{expression[:200]}..."
-        return f"{expression=} is not true"
+@register_reason("not_accepted_values", "dbt_utils")
+def not_accepted_values(test_metadata: TestMetadata) -> str:
+    values = test_metadata.kwargs.get("values", "Unknown values")
+    return f"{get_column_name(test_metadata)} must not be one of {values}"
 
-    def at_least_one(self, test_metadata: TestMetadata) -> str:
-        return f"At least one row is expected for {get_column_name(test_metadata)}"
 
-    def cardinality_equality(self, test_metadata: TestMetadata) -> str:
-        return f"Cardinality of {get_column_name(test_metadata)} is not as expected"
+@register_reason("accepted_range", "dbt_utils")
+def accepted_range(test_metadata: TestMetadata) -> str:
+    kwargs = test_metadata.kwargs
+    bounds = f"[{kwargs.get('min_value', '')}, {kwargs.get('max_value', '')}]"
+    if not kwargs.get("inclusive", True):
+        bounds = f"({bounds[1:-1]})"
+    return f"{get_column_name(test_metadata)} must be in range {bounds}"
 
-    def equal_rowcount(self, test_metadata: TestMetadata) -> str:
-        model = get_model_name(test_metadata)
-        compare_model = parse_model_name(get_compare_model(test_metadata))
-        return f"Rows count of {model=} and {compare_model=} are not equal"
 
-    def equality(self, test_metadata: TestMetadata) -> str:
-        model = get_model_name(test_metadata)
-        compare_model = parse_model_name(get_compare_model(test_metadata))
-        compare_column = get_compare_column(test_metadata) or []
-        columns = ",".join(compare_column)
-        if len(columns) > 200:
-            columns = f"{columns[:200]}..."
-        return f"{model} columns {columns} are not equal with {compare_model=}"
+@register_reason("not_null_proportion", "dbt_utils")
+def not_null_proportion(test_metadata: TestMetadata) -> str:
+    at_least = test_metadata.kwargs.get("at_least", "Unknown")
+    return f"Proportion of not null values in {get_column_name(test_metadata)} must be at least {at_least}"
 
-    def not_constant(self, test_metadata: TestMetadata) -> str:
-        return f"{get_column_name(test_metadata)} is constant"
 
-    def recency(self, test_metadata: TestMetadata) -> str:
-        return f"{get_column_name(test_metadata)} is not recent enough"
+@register_reason("sequential_values", "dbt_utils")
+def sequential_values(test_metadata: TestMetadata) -> str:
+    interval = test_metadata.kwargs.get("interval", 1)
+    return f"{get_column_name(test_metadata)} values must be sequential with interval {interval}"
 
-    def relationships_where(self, test_metadata: TestMetadata) -> str:
-        column = get_column_name(test_metadata)
-        model = get_model_name(test_metadata)
-        target_column = get_field(test_metadata, "id")
-        target_model = parse_model_name(get_to(test_metadata))
-        from_condition = get_from_condition(test_metadata)
-        to_condition = get_to_condition(test_metadata)
 
-        return f"{column=} in {model=} with {from_condition} is not related to {target_column=} in {target_model=} with {to_condition=}"
+@register_reason("recency", "dbt_utils")
+def recency(test_metadata: TestMetadata) -> str:
+    return f"{get_column_name(test_metadata)} is not recent enough"
 
-    def unique_combination_of_columns(self, test_metadata: TestMetadata) -> str:
-        columns = test_metadata.kwargs.get("combination_of_columns", [])
-        if len(columns) > 200:
-            columns = f"{columns[:200]}..."
-        return f"Combination of {columns} is not unique"
 
+@register_reason("relationships_where", "dbt_utils")
+def relationships_where(test_metadata: TestMetadata) -> str:
+    column = get_column_name(test_metadata)
+    model = get_model_name(test_metadata)
+    target_column = get_field(test_metadata, "id")
+    target_model = parse_model_name(get_to(test_metadata))
+    from_condition = get_from_condition(test_metadata)
+    to_condition = get_to_condition(test_metadata)
 
-class SingularTestReason:
-    def get_reason(self, test_node: SingularTestNode) -> str:
-        raise ParsingReasonError("Reason for SingularTestNode not implemented yet.")
+    return f"{column=} in {model=} with {from_condition} is not related to {target_column=} in {target_model=} with {to_condition=}"
+
+
+@register_reason("unique_combination_of_columns", "dbt_utils")
+def unique_combination_of_columns(test_metadata: TestMetadata) -> str:
+    columns = test_metadata.kwargs.get("combination_of_columns", [])
+    if len(columns) > MAX_TEXT_LENGTH:
+        columns = f"{columns[:MAX_TEXT_LENGTH]}..."
+    return f"Combination of {columns} is not unique"
+
+
+# dbt_expectations
+
+
+def _range(test_metadata: TestMetadata) -> str:
+    kwargs = test_metadata.kwargs
+    lower = "(" if kwargs.get("strictly") else "["
+    upper = ")" if kwargs.get("strictly") else "]"
+    return f"{lower}{kwargs.get('min_value', '')}, {kwargs.get('max_value', '')}{upper}"
+
+
+@register_reason("expect_column_to_exist", "dbt_expectations")
+def expect_column_to_exist(test_metadata: TestMetadata) -> str:
+    model = get_model_name(test_metadata)
+    return f"The {get_column_name(test_metadata)} is expected to exist in the {model=}"
+
+
+@register_reason("expect_column_values_to_not_be_null", "dbt_expectations")
+def expect_column_values_to_not_be_null(test_metadata: TestMetadata) -> str:
+    return not_null(test_metadata)
+
+
+@register_reason("expect_column_values_to_be_unique", "dbt_expectations")
+def expect_column_values_to_be_unique(test_metadata: TestMetadata) -> str:
+    return unique(test_metadata)
+
+
+@register_reason("expect_column_values_to_be_of_type", "dbt_expectations")
+def expect_column_values_to_be_of_type(test_metadata: TestMetadata) -> str:
+    column_type = test_metadata.kwargs.get("column_type", "Unknown type")
+    return f"{get_column_name(test_metadata)} is expected to be of type {column_type}"
+
+
+@register_reason("expect_column_values_to_be_in_set", "dbt_expectations")
+def expect_column_values_to_be_in_set(test_metadata: TestMetadata) -> str:
+    value_set = test_metadata.kwargs.get("value_set", "Unknown values")
+    return f"{get_column_name(test_metadata)} values are expected to be one of {value_set}"
+
+
+@register_reason("expect_column_values_to_not_be_in_set", "dbt_expectations")
+def expect_column_values_to_not_be_in_set(test_metadata: TestMetadata) -> str:
+    value_set = test_metadata.kwargs.get("value_set", "Unknown values")
+    return f"{get_column_name(test_metadata)} values are expected not to be one of {value_set}"
+
+
+@register_reason("expect_column_values_to_be_between", "dbt_expectations")
+def expect_column_values_to_be_between(test_metadata: TestMetadata) -> str:
+    return f"{get_column_name(test_metadata)} values are expected to be in range {_range(test_metadata)}"
+
+
+@register_reason("expect_column_value_lengths_to_be_between", "dbt_expectations")
+def expect_column_value_lengths_to_be_between(test_metadata: TestMetadata) -> str:
+    return f"{get_column_name(test_metadata)} value lengths are expected to be in range {_range(test_metadata)}"
+
+
+@register_reason("expect_column_values_to_match_regex", "dbt_expectations")
+def expect_column_values_to_match_regex(test_metadata: TestMetadata) -> str:
+    regex = truncate(test_metadata.kwargs.get("regex") or "Unknown regex")
+    return f"{get_column_name(test_metadata)} values are expected to match {regex=}"
+
+
+@register_reason("expect_table_row_count_to_be_between", "dbt_expectations")
+def expect_table_row_count_to_be_between(test_metadata: TestMetadata) -> str:
+    model = get_model_name(test_metadata)
+    return f"Rows count of {model=} is expected to be in range {_range(test_metadata)}"
+
+
+@register_reason("expect_table_row_count_to_equal_other_table", "dbt_expectations")
+def expect_table_row_count_to_equal_other_table(test_metadata: TestMetadata) -> str:
+    return equal_rowcount(test_metadata)
+
+
+@register_reason("expect_compound_columns_to_be_unique", "dbt_expectations")
+def expect_compound_columns_to_be_unique(test_metadata: TestMetadata) -> str:
+    columns = test_metadata.kwargs.get("column_list", [])
+    return f"Combination of {columns} is not unique"
+
+
+@register_reason("expect_row_values_to_have_recent_data", "dbt_expectations")
+def expect_row_values_to_have_recent_data(test_metadata: TestMetadata) -> str:
+    kwargs = test_metadata.kwargs
+    period = f"{kwargs.get('interval', '')} {kwargs.get('datepart', '')}".strip()
+    return f"{get_column_name(test_metadata)} has no data for the last {period or 'period'}"
 
 
 class StatusReason:
-    def get_reason(self, test_node: TestNode) -> str:
+    def get_reason(self, test_node: TestNode, result: Optional[Result] = None) -> str:
+        """
+        :param result: result of the test, reason of singular test is built from its failures and message
+        """
+        if isinstance(test_node, SingularTestNode):
+            return self.singular(test_node, result)
+
+        if not isinstance(test_node, GenericTestNode):
+            return self.unknown_error()
+
+        test_metadata = test_node.test_metadata
+        if not (template := find_template(test_metadata)):
+            return self.unknown_error()
+
         try:
-            if isinstance(test_node, GenericTestNode):
-                return GenericTestReason().get_reason(test_node)
-            elif isinstance(test_node, SingularTestNode):
-                return SingularTestReason().get_reason(test_node)
-            else:
-                return self.unknown_error()
+            return template(test_metadata)
         except Exception as e:
-            logger.warning(f"Failed to get reason for test: {e}")
-            logger.debug(f"Test definition: {test_node=}")
+            logger.warning(f"Failed to get reason for test {test_node.unique_id}: {e}")
+            return self.unknown_error()
+
+    def singular(self, test_node: SingularTestNode, result: Optional[Result]) -> str:
+        if result is None or (result.failures is None and not result.status_reason):
             return self.unknown_error()
 
+        reason = (
+            f"{test_node.name} returned {result.failures} failing rows"
+            if result.failures is not None
+            else f"{test_node.name} failed"
+        )
+        return f"{reason}: {result.status_reason}" if result.status_reason else reason
+
     def unknown_error(self) -> str:
         return "Unknown reason"
@@ -1,16 +1,23 @@
-import traceback
 from datetime import datetime
-from typing import Iterable, Optional
+from functools import cached_property
+from typing import Collection, Iterable, Iterator, Mapping, Optional
 
 import pytz
-from dbt.contracts.graph.nodes import GenericTestNode, TestNode, SeedNode
+from dbt.contracts.graph.nodes import GenericTestNode, SeedNode, TestNode
 from funcy import lkeep
-from odd_dbt.domain import Result
+from odd_dbt.domain import FailureSample, Manifest, Result
 from odd_dbt.domain.context import DbtContext
-from odd_dbt.mapper.generator import create_generator
 from odd_dbt.mapper.helpers import datetime_format
-from odd_dbt.mapper.metadata import get_metadata
+from odd_dbt.mapper.metadata import get_failures_metadata, get_metadata
+from odd_dbt.mapper.parallel import (
+    Mapped,
+    ShardContext,
+    map_safely,
+    map_shards,
+    shard,
+)
 from odd_dbt.mapper.status_reason import StatusReason
+from odd_dbt.utils.profiling import profiler
 from odd_models.models import (
     DataEntity,
     DataEntityList,
@@ -24,28 +31,66 @@ from oddrn_generator import DbtGenerator
 
 from odd_dbt.logger import logger
 
+SINGULAR_TEST_TYPE = "singular"
+
 
 class DbtTestMapper:
-    def __init__(self, context: DbtContext, generator: DbtGenerator) -> None:
+    def __init__(
+        self,
+        context: DbtContext,
+        generator: DbtGenerator,
+        selected: Optional[Collection[str]] = None,
+        workers: int = 1,
+        samples: Optional[Mapping[str, FailureSample]] = None,
+    ) -> None:
+        """
+        :param selected: unique ids of tests to map, all tests when None
+        :param workers: processes mapping results, results are mapped in this process when 1
+        :param samples: stored failures of failed tests by unique id, added to test runs metadata
+        """
         self._context = context
         self._generator = generator
+        self._selected = selected
+        self._workers = workers
+        self._samples = samples or {}
+
+    @cached_property
+    def _manifest(self) -> Manifest:
+        # Looked up once per mapping, not per test
+        return self._context.manifest
 
+    @profiler.spanned("map.test_results")
     def map(self) -> DataEntityList:
         data_entities = []
-        
+
         test_results = [res for res in self._context.results if res.unique_id.startswith("test.")]
-        
+
         if not test_results:
             raise ValueError("run_results.json doesn't contain any test result. Was dbt test command executed?")
 
-        for result in test_results:
-            try:
-                data_entities.extend(self.map_result(result, self._context.manifest.nodes))
-            except Exception as e:
-                logger.warning(f"Can't map result {result.unique_id}: {str(e)}")
-                logger.debug(traceback.format_exc())
+        if self._selected is not None:
+            test_results = [res for res in test_results if res.unique_id in self._selected]
+            logger.info(f"{len(test_results)} test results are selected")
+
+        profiler.count("results", len(test_results))
+        if self._workers > 1:
+            mapped_results = self.map_results_parallel(test_results)
+        else:
+            nodes = self._manifest.nodes
+            mapped_results = (
+                map_safely(result.unique_id, self.map_result, result, nodes)
+                for result in test_results
+            )
+
+        for mapped in mapped_results:
+            if mapped.error is not None:
+                logger.warning(f"Can't map result {mapped.unique_id}: {mapped.error}")
+                logger.debug(mapped.traceback)
                 continue
-        
+
+            if mapped.value is not None:
+                data_entities.extend(mapped.value)
+
         if not data_entities:
             raise ValueError("No test results were mapped. Data will not be ingested")
 
@@ -54,11 +99,52 @@ class DbtTestMapper:
             items=data_entities,
         )
 
-        logger.debug(data_entities.json(exclude_none=True))
+        profiler.count("entities", len(data_entities.items))
+        logger.opt(lazy=True).debug(
+            "{}", lambda: data_entities.json(exclude_none=True)
+        )
         return data_entities
 
+    def map_results_parallel(
+        self, results: list[Result]
+    ) -> Iterator[Mapped[tuple[DataEntity, DataEntity]]]:
+        """
+        Maps results by shards in a process pool, each shard takes raw manifest entries
+        of its tests and tested nodes only.
+        """
+        manifest = self._manifest
+        raw_nodes, raw_sources = manifest.raw_nodes, manifest.raw_sources
+
+        payloads = []
+        for results_shard in shard(results, self._workers):
+            nodes, sources = {}, {}
+            for result in results_shard:
+                test_id = result.unique_id
+                for uid in (test_id, *manifest.lineage.parents(test_id)):
+                    if uid in raw_nodes:
+                        nodes[uid] = raw_nodes[uid]
+                    elif uid in raw_sources:
+                        sources[uid] = raw_sources[uid]
+
+            context = ShardContext(
+                nodes=nodes,
+                sources=sources,
+                adapter_type=self._context.adapter_type,
+                credentials=self._context.credentials,
+                invocation_id=self._context.invocation_id,
+            )
+            samples = {
+                result.unique_id: self._samples[result.unique_id]
+                for result in results_shard
+                if result.unique_id in self._samples
+            }
+            payloads.append((context, self._generator, results_shard, samples))
+
+        logger.info(f"Mapping {len(results)} results by {self._workers} workers")
+        return map_shards(map_results_shard, payloads, self._workers)
+
     def map_result(
-        self, result: Result, test_nodes: list[GenericTestNode]
+        self, result: Result, test_nodes: Mapping[str, TestNode]
     ) -> Optional[tuple[DataEntity, DataEntity]]:
         test_id: str = result.unique_id
         invocation_id: str = self._context.invocation_id
@@ -72,6 +158,10 @@ class DbtTestMapper:
         if not test_node:
             raise KeyError(f"Could not find test node with an id {test_id}")
 
+        if (test_node_type := getattr(test_node, "test_node_type", None)) not in ("generic", "singular"):
+            logger.warning(f"Skipping result {test_id} of unknown test node type {test_node_type}")
+            return None
+
         job = self.map_config(test_node)
 
         oddrn = self._generator.get_oddrn_by_path("runs", f"{invocation_id}")
@@ -81,11 +171,13 @@ class DbtTestMapper:
         if len(name) > 250:
             name = test_node.alias
 
+        sample = self._samples.get(test_id)
         run = DataEntity(
             oddrn=oddrn,
             name=name,
             type=DataEntityType.JOB_RUN,
             owner=None,
+            metadata=[get_failures_metadata(sample)] if sample else None,
             data_quality_test_run=DataQualityTestRun(
                 data_quality_test_oddrn=job.oddrn,
                 start_time=datetime_format(start_time) or datetime.now(tz=pytz.UTC),
@@ -122,50 +214,57 @@ class DbtTestMapper:
             data_quality_test=DataQualityTest(
                 suite_name=test_node.name,
                 dataset_list=dataset_list,
-                expectation=DataQualityTestExpectation(
-                    type=test_node.test_metadata.name
-                ),
+                expectation=DataQualityTestExpectation(type=get_test_type(test_node)),
             ),
         )
 
     def get_dataset_oddrn(self, test_node: TestNode) -> Iterable[Optional[str]]:
-        nodes = self._context.manifest.nodes
-        sources = self._context.manifest.sources
-
-        if test_node.test_node_type == "generic":
-            dependencies = test_node.depends_on_nodes
-
-            for model_id in dependencies:
-                model = nodes.get(model_id)
-
-                if node := nodes.get(model_id):
-                    if model.config.materialized == "seed":
-                        yield seed_node_oddrn(node, self._generator)
-                    else:
-                        yield create_generator(
-                            adapter_type=self._context.adapter_type,
-                            credentials=self._context.credentials,
-                        ).get_oddrn_for(node)
-                elif node := sources.get(model_id):
-                    yield create_generator(
-                        adapter_type=self._context.adapter_type,
-                        credentials=self._context.credentials,
-                    ).get_oddrn_for(node)
+        """
+        Nodes the test depends on, generic test is bound to the tested node, singular test to nodes it selects from
+        """
+        nodes, sources = self._manifest.nodes, self._manifest.sources
+
+        for model_id in test_node.depends_on_nodes:
+            if node := nodes.get(model_id):
+                if node.config.materialized == "seed":
+                    yield seed_node_oddrn(node, self._generator)
                 else:
-                    raise KeyError(f"Could not find model/source with an id {model_id}")
-        elif test_node.test_node_type == "singular":
-            # We don't support it because it doesn't contains test_metadata
-            raise NotImplementedError("Singular test nodes are not supported yet")
-        else:
-            raise NotImplementedError(
-                f"Unknown test node type: {test_node.test_node_type}"
-            )
+                    yield self._context.oddrn_generator.get_oddrn_for(node)
+            elif node := sources.get(model_id):
+                yield self._context.oddrn_generator.get_oddrn_for(node)
+            else:
+                raise KeyError(f"Could not find model/source with an id {model_id}")
+
+
+def map_results_shard(
+    context: ShardContext,
+    generator: DbtGenerator,
+    results: list[Result],
+    samples: dict[str, FailureSample],
+) -> list[Mapped[tuple[DataEntity, DataEntity]]]:
+    """Runs in a worker process"""
+    mapper = DbtTestMapper(context=context, generator=generator, samples=samples)
+    nodes = context.manifest.nodes
+    return [
+        map_safely(result.unique_id, mapper.map_result, result, nodes)
+        for result in results
+    ]
 
 
 def seed_node_oddrn(node: SeedNode, generator: DbtGenerator) -> Optional[str]:
     return generator.get_data_source_oddrn() + f"/seeds/{node.unique_id}"
 
 
+status_reasons = StatusReason()
+
+
+def get_test_type(test_node: TestNode) -> str:
+    """Name of generic test, i.e. unique, singular tests have no test metadata"""
+    if isinstance(test_node, GenericTestNode):
+        return test_node.test_metadata.name
+    return SINGULAR_TEST_TYPE
+
+
 def parse_status(
     result: Result, test_node: TestNode
 ) -> tuple[QualityRunStatus, Optional[str]]:
@@ -179,7 +278,6 @@ def parse_status(
         status_reason = result.status_reason or "Error during test execution"
 
     if result.status == "fail":
-        print(result.status_reason)
-        status_reason = StatusReason().get_reason(test_node=test_node)
+        status_reason = status_reasons.get_reason(test_node=test_node, result=result)
 
     return status, status_reason
@@ -1,3 +1,7 @@
+import functools
+import re
+from typing import Optional
+
 from odd_models.models import Type
 
 DBT_TO_ODD: dict[str, Type] = {
@@ -5,26 +9,83 @@ DBT_TO_ODD: dict[str, Type] = {
     "INTEGER": Type.TYPE_INTEGER,
     "SMALLINT": Type.TYPE_INTEGER,
     "BIGINT": Type.TYPE_INTEGER,
+    "TINYINT": Type.TYPE_INTEGER,
+    "BYTEINT": Type.TYPE_INTEGER,
+    "INT2": Type.TYPE_INTEGER,
+    "INT4": Type.TYPE_INTEGER,
+    "INT8": Type.TYPE_INTEGER,
+    "INT64": Type.TYPE_INTEGER,
     "NUMBER": Type.TYPE_NUMBER,
     "DECIMAL": Type.TYPE_NUMBER,
     "NUMERIC": Type.TYPE_NUMBER,
     "DOUBLE": Type.TYPE_NUMBER,
+    "DOUBLE PRECISION": Type.TYPE_NUMBER,
     "REAL": Type.TYPE_NUMBER,
     "FLOAT": Type.TYPE_NUMBER,
+    "FLOAT4": Type.TYPE_NUMBER,
+    "FLOAT8": Type.TYPE_NUMBER,
+    "FLOAT64": Type.TYPE_NUMBER,
     "FIXED": Type.TYPE_NUMBER,
     "STRING": Type.TYPE_STRING,
     "TEXT": Type.TYPE_STRING,
     "VARCHAR": Type.TYPE_STRING,
+    "NVARCHAR": Type.TYPE_STRING,
+    "CHARACTER VARYING": Type.TYPE_STRING,
+    "UUID": Type.TYPE_STRING,
     "CHAR": Type.TYPE_CHAR,
     "CHARACTER": Type.TYPE_CHAR,
+    "BPCHAR": Type.TYPE_CHAR,
     "BOOLEAN": Type.TYPE_BOOLEAN,
+    "BOOL": Type.TYPE_BOOLEAN,
     "DATETIME": Type.TYPE_DATETIME,
     "DATE": Type.TYPE_DATETIME,
     "TIMESTAMP": Type.TYPE_DATETIME,
+    "TIMESTAMPTZ": Type.TYPE_DATETIME,
     "TIMESTAMP_LTZ": Type.TYPE_DATETIME,
     "TIMESTAMP_NTZ": Type.TYPE_DATETIME,
     "TIMESTAMP_TZ": Type.TYPE_DATETIME,
+    "TIME": Type.TYPE_TIME,
+    "TIMETZ": Type.TYPE_TIME,
+    "INTERVAL": Type.TYPE_DURATION,
+    "BINARY": Type.TYPE_BINARY,
+    "VARBINARY": Type.TYPE_BINARY,
+    "BYTEA": Type.TYPE_BINARY,
+    "BYTES": Type.TYPE_BINARY,
     "ARRAY": Type.TYPE_LIST,
     "VARIANT": Type.TYPE_LIST,
+    "STRUCT": Type.TYPE_STRUCT,
+    "OBJECT": Type.TYPE_STRUCT,
+    "RECORD": Type.TYPE_STRUCT,
+    "JSON": Type.TYPE_STRUCT,
+    "JSONB": Type.TYPE_STRUCT,
+    "MAP": Type.TYPE_MAP,
     "UNKNOWN": Type.TYPE_UNKNOWN,
 }
+
+# Length, precision and type parameters, i.e. (255), (10,2), <STRING>
+_PARAMETERS = re.compile(r"\([^()]*\)|<.*>")
+_TIME_ZONE = re.compile(r"\s+WITH(OUT)?(\s+LOCAL)?\s+TIME\s+ZONE$")
+_SPACES = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=None)
+def parse_type(data_type: Optional[str]) -> Type:
+    """
+    ODD type of a database type, i.e. VARCHAR(255), NUMERIC(10,2), TIMESTAMP WITH TIME ZONE or INTEGER[].
+    Memoized, as the same type names repeat across all columns of a project.
+    """
+    if not data_type:
+        return Type.TYPE_UNKNOWN
+
+    name = data_type.strip().upper()
+    if name.endswith("[]"):
+        return Type.TYPE_LIST
+
+    name = _PARAMETERS.sub("", name)
+    name = _SPACES.sub(" ", _TIME_ZONE.sub("", name)).strip()
+
+    if type_ := DBT_TO_ODD.get(name):
+        return type_
+
+    # Modifiers after the type name, i.e. INTEGER UNSIGNED
+    return DBT_TO_ODD.get(name.split(" ", 1)[0], Type.TYPE_UNKNOWN)
@@ -0,0 +1,329 @@
+"""
+Ingestion of test results of past dbt invocations from archived run_results.json files.
+Each file is mapped against manifest.json of the same invocation, or the nearest one by generation time,
+test definitions are sent once, with the first run of the test.
+"""
+import glob
+import itertools
+import json
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+from odd_models.models import DataEntity, DataEntityList
+from oddrn_generator import DbtGenerator
+
+from odd_dbt.domain import Manifest, RunResults, StreamingManifest
+from odd_dbt.domain.context import STREAMING_THRESHOLD, OfflineDbtContext
+from odd_dbt.logger import logger
+from odd_dbt.mapper.parallel import Mapped, map_safely
+from odd_dbt.mapper.test_results import DbtTestMapper
+from odd_dbt.utils.json_index import load_leading_member
+from odd_dbt.utils.profiling import profiler
+
+RUN_RESULTS_FILES = "run_results*.json"
+MANIFEST_FILES = "manifest*.json"
+
+# Runs submitted to the pool ahead of the one being ingested, per worker
+RUNS_AHEAD = 2
+
+
+def find_files(patterns: Iterable[str], name: str) -> list[Path]:
+    """
+    :param patterns: files, glob patterns or directories, directories are searched recursively for name pattern
+    """
+    files = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            found = path.rglob(name)
+        elif glob.has_magic(pattern):
+            found = map(Path, glob.glob(pattern, recursive=True))
+        else:
+            found = [path] if path.is_file() else []
+
+        found = [file for file in found if file.is_file()]
+        if not found:
+            logger.warning(f"No files found by {pattern}")
+        files.update(found)
+
+    return sorted(files)
+
+
+def find_neighbours(files: Iterable[Path], name: str) -> list[Path]:
+    """
+    :return: files like name in folders of files
+    """
+    folders = {file.parent for file in files}
+    return sorted({found for folder in folders for found in folder.glob(name)})
+
+
+def read_metadata(file: Path) -> Optional[dict]:
+    try:
+        return load_leading_member(file, "metadata") or {}
+    except Exception as e:
+        logger.warning(f"Skipping {file}, can't read its metadata: {e}")
+        return None
+
+
+@dataclass(frozen=True)
+class ArchivedRun:
+    run_results: Path
+    manifest: Path
+    invocation_id: Optional[str]
+    generated_at: str
+    # From manifest.json metadata
+    adapter_type: Optional[str]
+
+
+class ManifestIndex:
+    """Manifests by invocation id and generation time, only metadata of the files is read"""
+
+    def __init__(self, files: Iterable[Path]) -> None:
+        self._by_invocation: dict[str, tuple[Path, dict]] = {}
+        by_time: list[tuple[str, Path, dict]] = []
+
+        for file in files:
+            if (metadata := read_metadata(file)) is None:
+                continue
+            if invocation_id := metadata.get("invocation_id"):
+                self._by_invocation[invocation_id] = (file, metadata)
+            if generated_at := metadata.get("generated_at"):
+                by_time.append((generated_at, file, metadata))
+
+        by_time.sort(key=lambda item: (item[0], str(item[1])))
+        self._times = [generated_at for generated_at, *_ in by_time]
+        self._by_time = [(file, metadata) for _, file, metadata in by_time]
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def match(self, run_metadata: dict) -> Optional[tuple[Path, dict]]:
+        """
+        :return: manifest and its metadata of the same invocation, otherwise the latest one
+        generated before the run, otherwise the earliest one generated after it
+        """
+        if matched := self._by_invocation.get(run_metadata.get("invocation_id")):
+            return matched
+
+        if not self._times or not (generated_at := run_metadata.get("generated_at")):
+            return None
+
+        position = bisect_right(self._times, generated_at)
+        return self._by_time[position - 1] if position else self._by_time[0]
+
+
+def match_runs(files: Iterable[Path], manifests: ManifestIndex) -> list[ArchivedRun]:
+    """
+    :return: runs ordered by generation time, so test definitions are sent with the earliest run
+    """
+    runs = []
+    for file in files:
+        if (metadata := read_metadata(file)) is None:
+            continue
+
+        if not (matched := manifests.match(metadata)):
+            logger.warning(f"Skipping {file}, no manifest.json matches it")
+            continue
+
+        manifest, manifest_metadata = matched
+        invocation_id = metadata.get("invocation_id")
+        if manifest_metadata.get("invocation_id") != invocation_id:
+            logger.debug(f"{file} of invocation {invocation_id} is mapped against the nearest {manifest}")
+
+        runs.append(
+            ArchivedRun(
+                run_results=file,
+                manifest=manifest,
+                invocation_id=invocation_id,
+                generated_at=metadata.get("generated_at") or "",
+                adapter_type=manifest_metadata.get("adapter_type"),
+            )
+        )
+
+    return sorted(runs, key=lambda run: (run.generated_at, str(run.run_results)))
+
+
+@lru_cache(maxsize=2)
+def load_manifest(file: Path) -> Manifest:
+    # Runs of the same manifest go one after another, so a couple of last ones is enough
+    loader = StreamingManifest if file.stat().st_size > STREAMING_THRESHOLD else Manifest
+    with profiler.span(f"parse {file.name}"):
+        return loader(file)
+
+
+class ArchivedRunContext(OfflineDbtContext):
+    """Context of a past invocation, built from its archived run_results.json and matched manifest.json"""
+
+    def __init__(
+        self,
+        run: ArchivedRun,
+        credentials: dict[str, str],
+        adapter_type: Optional[str] = None,
+    ) -> None:
+        """
+        :param adapter_type: overrides adapter type of manifest.json metadata
+        """
+        super().__init__(
+            project_dir=run.run_results.parent,
+            credentials=credentials,
+            target_path=run.run_results.parent,
+            adapter_type=adapter_type or run.adapter_type,
+        )
+        self.run = run
+
+    @property
+    def manifest(self) -> Manifest:
+        return load_manifest(self.run.manifest)
+
+    @cached_property
+    def run_results(self) -> RunResults:
+        return RunResults(self.run.run_results)
+
+
+def check_credentials(
+    runs: Iterable[ArchivedRun],
+    credentials: dict[str, str],
+    adapter_type: Optional[str] = None,
+) -> None:
+    """Checks credentials once per adapter type of runs, see OfflineDbtContext.check_credentials"""
+    for run in {run.adapter_type: run for run in runs}.values():
+        ArchivedRunContext(run, credentials, adapter_type).check_credentials()
+
+
+def map_run(
+    run: ArchivedRun,
+    generator: DbtGenerator,
+    credentials: dict[str, str],
+    adapter_type: Optional[str] = None,
+) -> Mapped[list[DataEntity]]:
+    """Maps test results of a run to test and test run entities, called in worker processes"""
+    context = ArchivedRunContext(run, credentials, adapter_type)
+    return map_safely(str(run.run_results), _map_run, context, generator)
+
+
+def _map_run(context: ArchivedRunContext, generator: DbtGenerator) -> list[DataEntity]:
+    if not any(result.unique_id.startswith("test.") for result in context.results):
+        logger.info(f"{context.run.run_results} has no test results, skipping it")
+        return []
+
+    return DbtTestMapper(context=context, generator=generator).map().items
+
+
+def map_runs(
+    runs: list[ArchivedRun],
+    generator: DbtGenerator,
+    credentials: dict[str, str],
+    adapter_type: Optional[str] = None,
+    workers: int = 1,
+) -> Iterator[tuple[ArchivedRun, Mapped[list[DataEntity]]]]:
+    """
+    Maps runs in a pool of processes, results are yielded in order of runs.
+    Pool is kept at most RUNS_AHEAD runs per worker ahead of the consumer,
+    so mapped entities don't pile up in memory while previous ones are sent.
+    """
+    if workers <= 1:
+        for run in runs:
+            yield run, map_run(run, generator, credentials, adapter_type)
+        return
+
+    logger.info(f"Mapping {len(runs)} runs by {workers} workers")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        queued = iter(runs)
+
+        def submit(run: ArchivedRun) -> tuple[ArchivedRun, Future]:
+            return run, executor.submit(map_run, run, generator, credentials, adapter_type)
+
+        pending = deque(map(submit, itertools.islice(queued, workers * RUNS_AHEAD)))
+        while pending:
+            run, future = pending.popleft()
+            if (following := next(queued, None)) is not None:
+                pending.append(submit(following))
+            yield run, future.result()
+
+
+class BackfillCheckpoint:
+    """run_results.json files already ingested and ODDRNs of test definitions sent with them"""
+
+    def __init__(self, file: Path) -> None:
+        self.file = file
+        self.files: set[str] = set()
+        self.tests: set[str] = set()
+
+        if file.is_file():
+            try:
+                checkpoint = json.loads(file.read_text())
+                self.files = set(checkpoint.get("files", []))
+                self.tests = set(checkpoint.get("tests", []))
+            except ValueError as e:
+                logger.warning(f"Backfill checkpoint {file} is corrupted, ignoring it: {e}")
+
+    def is_done(self, run: ArchivedRun) -> bool:
+        return str(run.run_results.resolve()) in self.files
+
+    def save(self, runs: Iterable[ArchivedRun], tests: Iterable[str]) -> None:
+        self.files.update(str(run.run_results.resolve()) for run in runs)
+        self.tests.update(tests)
+
+        self.file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.file.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"files": sorted(self.files), "tests": sorted(self.tests)}))
+        tmp.replace(self.file)
+
+
+def backfill(
+    mapped_runs: Iterable[tuple[ArchivedRun, Mapped[list[DataEntity]]]],
+    checkpoint: BackfillCheckpoint,
+    flush: Callable[[DataEntityList], None],
+    data_source_oddrn: str,
+    size: int,
+) -> int:
+    """
+    Sends entities of mapped runs by lists of about `size` entities, entities of a run are kept in the same list.
+    Runs are saved to checkpoint after their entities are flushed, so an interrupted backfill resumes from there.
+    Test definitions sent before are dropped, runs refer to them by ODDRN.
+
+    :param flush: sends or writes a list of entities
+    :return: count of ingested runs
+    """
+    items: list[DataEntity] = []
+    runs: list[ArchivedRun] = []
+    tests: set[str] = set()
+    ingested = 0
+
+    def flush_items() -> None:
+        nonlocal items, runs, tests, ingested
+        if items:
+            flush(DataEntityList(data_source_oddrn=data_source_oddrn, items=items))
+        checkpoint.save(runs, tests)
+        ingested += len(runs)
+        items, runs, tests = [], [], set()
+
+    with profiler.span("backfill"):
+        for run, mapped in mapped_runs:
+            if mapped.error is not None:
+                logger.warning(f"Can't map {run.run_results}: {mapped.error}")
+                logger.debug(mapped.traceback)
+                continue
+
+            for entity in mapped.value:
+                if entity.data_quality_test is not None:
+                    if entity.oddrn in checkpoint.tests or entity.oddrn in tests:
+                        profiler.count("duplicate_tests")
+                        continue
+                    tests.add(entity.oddrn)
+                items.append(entity)
+
+            runs.append(run)
+            profiler.count("runs")
+            if len(items) >= size:
+                flush_items()
+
+        if runs:
+            flush_items()
+
+    return ingested
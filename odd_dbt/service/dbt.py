@@ -1,27 +1,42 @@
+import queue
 import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, Optional, Sequence
+
+from dbt.cli.main import dbtRunner, dbtRunnerResult
 
 from odd_dbt import errors
+from odd_dbt.defaults import STREAM_BATCH_SIZE, STREAM_INTERVAL
 from odd_dbt.domain.cli_args import CliArgs
+from odd_dbt.domain.run_results import RunResults
 from odd_dbt.logger import logger
 
+# How often the consumer checks whether dbt finished, while no results come
+POLL_INTERVAL = 0.1
 
-def run_tests(cli_args: CliArgs) -> None:
-    logger.info("Start dbt test process.")
-    args = [
-        "dbt",
-        "test",
-    ]
+
+def dbt_test_args(
+    cli_args: CliArgs,
+    select: Sequence[str] = (),
+    exclude: Sequence[str] = (),
+    state: Optional[Path] = None,
+) -> list[str]:
+    """Arguments of dbt test command"""
+    args = ["test"]
 
     project_dir = cli_args.project_dir
     profiles_dir = cli_args.profiles_dir
     profile = cli_args.profile
     target = cli_args.target
+    threads = cli_args.threads
 
     if project_dir:
-        args.extend(["--project-dir", project_dir])
+        args.extend(["--project-dir", str(project_dir)])
 
     if profiles_dir:
-        args.extend(["--profiles-dir", profiles_dir])
+        args.extend(["--profiles-dir", str(profiles_dir)])
 
     if profile:
         args.extend(["--profile", profile])
@@ -29,9 +44,145 @@ def run_tests(cli_args: CliArgs) -> None:
     if target:
         args.extend(["--target", target])
 
-    process = subprocess.run(args)
+    if threads:
+        args.extend(["--threads", str(threads)])
+
+    if select:
+        args.extend(["--select", *select])
+
+    if exclude:
+        args.extend(["--exclude", *exclude])
+
+    if state:
+        args.extend(["--state", str(state)])
+
+    return args
+
+
+def run_tests(
+    cli_args: CliArgs,
+    select: Sequence[str] = (),
+    exclude: Sequence[str] = (),
+    state: Optional[Path] = None,
+) -> None:
+    logger.info("Start dbt test process.")
+    process = subprocess.run(["dbt", *dbt_test_args(cli_args, select, exclude, state)])
 
     if process.returncode >= 2:
         raise errors.DbtTestCommandError("Could not run dbt test command.")
 
     logger.success("dbt test completed")
+
+
+class TestResultStream:
+    """
+    Collects results of finished tests from events of dbtRunner.
+    dbt calls it from its worker threads, results are taken by batches from another thread.
+    """
+
+    def __init__(self) -> None:
+        self.invocation_id: Optional[str] = None
+        self._queue: "queue.Queue[dict]" = queue.Queue()
+
+    def __call__(self, event) -> None:
+        if event.info.name != "NodeFinished":
+            return
+
+        node_info = event.data.node_info
+        if node_info.resource_type != "test":
+            return
+
+        self.invocation_id = event.info.invocation_id
+        self._queue.put(to_result(node_info.unique_id, event.data.run_result))
+
+    def batches(
+        self, running: threading.Thread, size: int, interval: float
+    ) -> Iterator[RunResults]:
+        """
+        :param running: thread running dbt, batches are yielded until it finishes
+        :param size: results in a batch
+        :param interval: max seconds a result waits for a batch to fill up
+        """
+        batch: list[dict] = []
+        flush_at = time.monotonic()
+
+        while running.is_alive() or not self._queue.empty():
+            try:
+                result = self._queue.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                pass
+            else:
+                if not batch:
+                    flush_at = time.monotonic() + interval
+                batch.append(result)
+
+            if len(batch) >= size or (batch and time.monotonic() >= flush_at):
+                yield self._run_results(batch)
+                batch = []
+
+        if batch:
+            yield self._run_results(batch)
+
+    def _run_results(self, results: list[dict]) -> RunResults:
+        return RunResults.from_dict(
+            {"metadata": {"invocation_id": self.invocation_id}, "results": results}
+        )
+
+
+def to_result(unique_id: str, run_result) -> dict:
+    """Result of NodeFinished event in the run_results.json format"""
+    return {
+        "unique_id": unique_id,
+        "status": run_result.status,
+        "message": run_result.message or None,
+        "failures": run_result.num_failures,
+        "timing": [
+            {
+                "name": timing.name,
+                "started_at": timestamp(timing.started_at),
+                "completed_at": timestamp(timing.completed_at),
+            }
+            for timing in run_result.timing_info
+        ],
+    }
+
+
+def timestamp(value) -> Optional[str]:
+    if not value.seconds and not value.nanos:
+        return None
+    return value.ToDatetime().strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def stream_tests(
+    cli_args: CliArgs,
+    select: Sequence[str] = (),
+    exclude: Sequence[str] = (),
+    state: Optional[Path] = None,
+    batch_size: int = STREAM_BATCH_SIZE,
+    interval: float = STREAM_INTERVAL,
+) -> Iterator[RunResults]:
+    """
+    Runs dbt test in this process and yields results of finished tests by batches, while the rest are running.
+
+    :raises DbtTestCommandError: when dbt could not run tests, failed tests are not an error
+    """
+    logger.info("Start dbt test in streaming mode.")
+    stream = TestResultStream()
+    invocation: dict[str, dbtRunnerResult] = {}
+
+    def invoke() -> None:
+        runner = dbtRunner(callbacks=[stream])
+        invocation["result"] = runner.invoke(dbt_test_args(cli_args, select, exclude, state))
+
+    running = threading.Thread(target=invoke, name="dbt-test", daemon=True)
+    running.start()
+
+    yield from stream.batches(running, batch_size, interval)
+    running.join()
+
+    result = invocation.get("result")
+    if result is None or result.exception is not None:
+        reason = result.exception if result else "dbt runner stopped unexpectedly"
+        raise errors.DbtTestCommandError(f"Could not run dbt test command: {reason}")
+
+    logger.success("dbt test completed")
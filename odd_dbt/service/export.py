@@ -0,0 +1,112 @@
+"""
+Entities are written as newline delimited JSON, one entity per line.
+Line with data_source_oddrn only starts entities of that data source.
+Files ending with .gz and .zst are compressed by gzip and zstd, zstd needs zstandard package.
+"""
+import gzip
+import json
+from pathlib import Path
+from typing import IO, Iterable, Iterator, Optional
+
+from odd_models.models import DataEntity, DataEntityList
+
+from odd_dbt.logger import logger
+
+
+def open_file(path: Path, mode: str) -> IO[str]:
+    """
+    :param mode: "w" or "r", file is opened in text mode
+    """
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+
+    if path.suffix in (".zst", ".zstd"):
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError(f"Install zstandard package to read or write {path}")
+
+        return zstandard.open(path, mode + "t", encoding="utf-8")
+
+    return open(path, mode, encoding="utf-8")
+
+
+class EntityWriter:
+    """Writes entities to a file as they come, nothing is kept in memory"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.written = 0
+        self._file: Optional[IO[str]] = None
+        self._data_source_oddrn: Optional[str] = None
+
+    def __enter__(self) -> "EntityWriter":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open_file(self.path, "w")
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._file.close()
+        logger.success(f"Written {self.written} entities to {self.path}")
+
+    def write(self, data_entities: DataEntityList) -> None:
+        if data_entities.data_source_oddrn != self._data_source_oddrn:
+            self._data_source_oddrn = data_entities.data_source_oddrn
+            self._file.write(
+                json.dumps({"data_source_oddrn": self._data_source_oddrn}) + "\n"
+            )
+
+        for entity in data_entities.items or []:
+            self._file.write(entity.json(exclude_none=True) + "\n")
+            self.written += 1
+
+
+def write_entities(data_entities: DataEntityList, path: Path) -> None:
+    with EntityWriter(path) as writer:
+        writer.write(data_entities)
+
+
+def read_entities(lines: Iterable[str]) -> Iterator[tuple[str, DataEntity]]:
+    """
+    :return: iterator of data source oddrn and entity pairs
+    """
+    data_source_oddrn = None
+
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+
+        record = json.loads(line)
+        if record.keys() == {"data_source_oddrn"}:
+            data_source_oddrn = record["data_source_oddrn"]
+            continue
+
+        if data_source_oddrn is None:
+            raise ValueError(f"Line {number}: entity goes before data_source_oddrn line")
+
+        yield data_source_oddrn, DataEntity.parse_obj(record)
+
+
+def read_batches(paths: Iterable[Path], size: int) -> Iterator[DataEntityList]:
+    """
+    Reads entities of files by lists of about `size` entities.
+    Test run is kept in the same list with its test, so they are sent in the same batch.
+    """
+    items: list[DataEntity] = []
+    data_source_oddrn = None
+
+    for path in paths:
+        with open_file(path, "r") as file:
+            for oddrn, entity in read_entities(file):
+                is_run = entity.data_quality_test_run is not None
+                if items and (
+                    oddrn != data_source_oddrn or (len(items) >= size and not is_run)
+                ):
+                    yield DataEntityList(data_source_oddrn=data_source_oddrn, items=items)
+                    items = []
+
+                data_source_oddrn = oddrn
+                items.append(entity)
+
+    if items:
+        yield DataEntityList(data_source_oddrn=data_source_oddrn, items=items)
@@ -0,0 +1,253 @@
+"""
+Samples of rows failed tests stored to audit tables by dbt with store_failures: true.
+Tables are read concurrently over a pooled SQLAlchemy engine, rows and bytes taken by all tests are bounded.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Collection, NamedTuple, Optional, Sequence
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.exc import ArgumentError, NoSuchModuleError
+
+from odd_dbt.domain import FailureSample
+from odd_dbt.domain.context import DbtContext
+from odd_dbt.errors import ProfileError
+from odd_dbt.logger import logger
+from odd_dbt.utils.profiling import profiler
+
+# dbt stores rows of failed and warned tests
+FAILED_STATUSES = {"fail", "warn"}
+
+
+class FailedTest(NamedTuple):
+    unique_id: str
+    relation: str
+    failures: Optional[int]
+
+
+def failed_tests(
+    context: DbtContext, selected: Optional[Collection[str]] = None
+) -> list[FailedTest]:
+    """
+    :return: failed tests with stored failures, in order of results
+    """
+    raw_nodes = context.manifest.raw_nodes
+    failed, not_stored = [], 0
+
+    for result in context.results:
+        if result.status not in FAILED_STATUSES or not result.unique_id.startswith("test."):
+            continue
+        if selected is not None and result.unique_id not in selected:
+            continue
+
+        node = raw_nodes.get(result.unique_id) or {}
+        if relation := result.relation_name or node.get("relation_name"):
+            failed.append(FailedTest(result.unique_id, relation, result.failures))
+        else:
+            not_stored += 1
+
+    if not_stored:
+        logger.info(f"{not_stored} failed tests have no stored failures, set store_failures to sample them")
+    return failed
+
+
+def profile_url(adapter_type: str, settings: dict[str, Any]) -> URL:
+    """SQLAlchemy URL of the database of dbt profile"""
+    if adapter_type == "postgres":
+        return URL.create(
+            "postgresql+psycopg2",
+            username=settings.get("user"),
+            password=settings.get("password"),
+            host=settings.get("host"),
+            port=settings.get("port"),
+            database=settings.get("database") or settings.get("dbname"),
+        )
+
+    if adapter_type == "snowflake":
+        query = {key: settings[key] for key in ("warehouse", "role") if settings.get(key)}
+        return URL.create(
+            "snowflake",
+            username=settings.get("user"),
+            password=settings.get("password"),
+            host=settings.get("account"),
+            database=settings.get("database"),
+            query=query,
+        )
+
+    raise ProfileError(f"Can't connect to {adapter_type} by dbt profile, set failures database URL")
+
+
+def jsonable(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (bytes, memoryview)):
+        return f"<{len(value)} bytes>"
+    return str(value)
+
+
+class FailureSampler:
+    """
+    Takes up to rows_per_test rows of each failed test. Budgets of rows and bytes are shared by all tests
+    sampled by the sampler, so tests sampled by batches, i.e. of streamed results, get the same budget.
+    Row budget is split in order of tests before querying, so samples don't depend on query timing.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        rows_per_test: int,
+        max_rows: int,
+        max_bytes: int,
+        concurrency: int = 1,
+    ) -> None:
+        self.engine = engine
+        self.rows_per_test = rows_per_test
+        self.concurrency = concurrency
+        self.rows_left = max_rows
+        self.bytes_left = max_bytes
+        self._connected: Optional[bool] = None
+
+    def __enter__(self) -> "FailureSampler":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.engine.dispose()
+
+    def sample(self, tests: Sequence[FailedTest]) -> dict[str, FailureSample]:
+        """
+        :return: samples by test unique id, tests which stored failures can't be read are skipped
+        """
+        if not tests or not self.connected():
+            return {}
+
+        limits = []
+        for test in tests:
+            limit = min(self.rows_per_test, self.rows_left)
+            if test.failures is not None:
+                limit = min(limit, test.failures)
+            self.rows_left -= limit
+            limits.append(limit)
+
+        samples = {}
+        with profiler.span("failures.sample"), ThreadPoolExecutor(
+            max_workers=self.concurrency
+        ) as executor:
+            fetched = executor.map(self.fetch, tests, limits)
+            for test, limit, rows in zip(tests, limits, fetched):
+                # Rows reserved, but not taken, are left to next samples
+                self.rows_left += limit - len(rows or [])
+                if rows is None:
+                    continue
+
+                kept = []
+                for row in rows:
+                    size = len(json.dumps(row))
+                    if size > self.bytes_left:
+                        break
+                    self.bytes_left -= size
+                    kept.append(row)
+
+                samples[test.unique_id] = FailureSample(
+                    relation=test.relation,
+                    failures=test.failures,
+                    rows=kept,
+                    truncated=len(kept) < (test.failures if test.failures is not None else len(rows)),
+                )
+                profiler.count("rows", len(kept))
+
+        logger.info(f"Sampled failures of {len(samples)} tests")
+        return samples
+
+    def connected(self) -> bool:
+        """Checks the database once, so an unreachable one doesn't fail each test"""
+        if self._connected is None:
+            try:
+                with self.engine.connect():
+                    self._connected = True
+            except Exception as e:
+                logger.warning(f"Failures are not sampled, can't connect to the database: {e}")
+                self._connected = False
+        return self._connected
+
+    def fetch(self, test: FailedTest, limit: int) -> Optional[list[dict[str, Any]]]:
+        if limit <= 0:
+            return []
+
+        try:
+            with self.engine.connect() as connection:
+                result = connection.execute(text(f"select * from {test.relation} limit {int(limit)}"))
+                return [
+                    {key: jsonable(value) for key, value in row.items()}
+                    for row in result.mappings()
+                ]
+        except Exception as e:
+            logger.warning(f"Can't read stored failures of {test.unique_id} from {test.relation}: {e}")
+            return None
+
+
+def create_engine_for(url: URL, concurrency: int) -> Engine:
+    # SQLite pools connections per thread, pool size doesn't apply to it
+    options = {} if url.get_backend_name() == "sqlite" else {
+        "pool_size": concurrency,
+        "max_overflow": 0,
+        "pool_pre_ping": True,
+    }
+    try:
+        return create_engine(url, **options)
+    except NoSuchModuleError as e:
+        raise ValueError(f"Install SQLAlchemy dialect of {url.drivername} to sample failures: {e}") from e
+
+
+def create_sampler(
+    context: DbtContext,
+    url: Optional[str],
+    rows_per_test: int,
+    max_rows: int,
+    max_bytes: int,
+    concurrency: int,
+) -> Optional[FailureSampler]:
+    """
+    :param url: SQLAlchemy URL of the database with stored failures, built from dbt profile when None
+    :return: None when the database can't be connected to, test results are ingested without samples then
+    """
+    try:
+        database_url = make_url(url) if url else profile_url(context.adapter_type, context.connection_settings)
+        engine = create_engine_for(database_url, concurrency)
+    except (ProfileError, ArgumentError, ValueError) as e:
+        logger.warning(f"Failures are not sampled: {e}")
+        return None
+
+    return FailureSampler(
+        engine,
+        rows_per_test=rows_per_test,
+        max_rows=max_rows,
+        max_bytes=max_bytes,
+        concurrency=concurrency,
+    )
+
+
+def sample_failed_tests(
+    context: DbtContext,
+    selected: Optional[Collection[str]],
+    url: Optional[str],
+    rows_per_test: int,
+    max_rows: int,
+    max_bytes: int,
+    concurrency: int,
+) -> Optional[dict[str, FailureSample]]:
+    """
+    :return: samples of failed tests by unique id, None when the database can't be connected to
+    """
+    sampler = create_sampler(context, url, rows_per_test, max_rows, max_bytes, concurrency)
+    if sampler is None:
+        return None
+
+    with sampler:
+        return sampler.sample(failed_tests(context, selected))
@@ -1,9 +1,54 @@
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+
 import funcy
-from odd_models import DataEntityList
+from odd_models import DataEntity, DataEntityList
 from odd_models.api_client.v2.odd_api_client import Client
+from requests import ConnectionError, HTTPError, Timeout
 
+from odd_dbt.defaults import (
+    BACKOFF,
+    MAX_BACKOFF,
+    MAX_BATCH_BYTES,
+    MAX_BATCH_ENTITIES,
+    RETRIES,
+)
+from odd_dbt.errors import IngestionError
 from odd_dbt.libs.odd import create_dbt_generator
 from odd_dbt.logger import logger
+from odd_dbt.service.state import IngestionState
+from odd_dbt.utils.profiling import profiler
+
+
+@dataclass
+class Batch:
+    items: list[DataEntity] = field(default_factory=list)
+    size: int = 0
+
+    def add(self, entities: list[DataEntity], size: int) -> None:
+        self.items.extend(entities)
+        self.size += size
+
+
+@dataclass
+class IngestionSummary:
+    succeeded: list[Batch] = field(default_factory=list)
+    failed: list[tuple[Batch, Exception]] = field(default_factory=list)
+
+    @property
+    def ingested(self) -> list[DataEntity]:
+        return [entity for batch in self.succeeded for entity in batch.items]
+
+    def __str__(self) -> str:
+        succeeded = sum(len(batch.items) for batch in self.succeeded)
+        failed = sum(len(batch.items) for batch, _ in self.failed)
+        return (
+            f"Succeeded: {len(self.succeeded)} batches ({succeeded} entities), "
+            f"failed: {len(self.failed)} batches ({failed} entities)"
+        )
 
 
 def create_datasource(name: str, dbt_host: str, client: Client) -> str:
@@ -16,9 +61,188 @@ def create_datasource(name: str, dbt_host: str, client: Client) -> str:
     return oddrn
 
 
-def ingest_entities(data_entities: DataEntityList, client: Client) -> None:
-    client.ingest_data_entity_list(data_entities=data_entities)
-    show_message(data_entities)
+def ingest_entities(
+    data_entities: DataEntityList,
+    client: Client,
+    max_entities: int = MAX_BATCH_ENTITIES,
+    max_bytes: int = MAX_BATCH_BYTES,
+    concurrency: int = 1,
+    retries: int = RETRIES,
+) -> IngestionSummary:
+    """
+    Sends entities by batches, up to `concurrency` batches at a time.
+    Failed batch is retried with exponential backoff, when the platform or network error is transient.
+
+    :raises IngestionError: when any of batches was not ingested, error keeps IngestionSummary
+    """
+    summary = IngestionSummary()
+    batches = split_entities(data_entities.items or [], max_entities, max_bytes)
+    pending: dict[Future, Batch] = {}
+
+    def collect(futures: Iterable[Future]) -> None:
+        for future in futures:
+            batch = pending.pop(future)
+            if error := future.exception():
+                logger.error(f"Batch of {len(batch.items)} entities failed: {error}")
+                summary.failed.append((batch, error))
+            else:
+                summary.succeeded.append(batch)
+
+    with profiler.span("upload"), ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for number, batch in enumerate(batches, start=1):
+            if len(pending) >= concurrency:
+                collect(wait(pending, return_when=FIRST_COMPLETED).done)
+
+            future = executor.submit(
+                send_batch, client, data_entities.data_source_oddrn, batch, number, retries
+            )
+            pending[future] = batch
+            profiler.count("batches")
+            profiler.count("entities", len(batch.items))
+
+        collect(wait(pending).done)
+
+    show_message(
+        DataEntityList(
+            data_source_oddrn=data_entities.data_source_oddrn,
+            items=summary.ingested,
+        )
+    )
+
+    if summary.failed:
+        raise IngestionError(summary)
+
+    return summary
+
+
+def ingest_changed_entities(
+    data_entities: DataEntityList,
+    client: Client,
+    state: IngestionState,
+    full_refresh: bool = False,
+    **kwargs,
+) -> Optional[IngestionSummary]:
+    """
+    Sends only entities which changed since the last ingestion saved in the state.
+    All entities are sent when `full_refresh` is set. State is updated by successfully sent batches.
+    """
+    items = data_entities.items or []
+    changed = state.changed(items)
+    if full_refresh:
+        changed = items
+
+    logger.info(
+        f"{len(changed)} of {len(items)} entities are new or changed since the last ingestion"
+    )
+    if not changed:
+        return None
+
+    try:
+        summary = ingest_entities(
+            DataEntityList(
+                data_source_oddrn=data_entities.data_source_oddrn, items=changed
+            ),
+            client,
+            **kwargs,
+        )
+    except IngestionError as e:
+        state.save(e.summary.ingested)
+        raise
+
+    state.save(summary.ingested)
+    return summary
+
+
+def send_batch(
+    client: Client, data_source_oddrn: str, batch: Batch, number: int, retries: int
+) -> None:
+    for attempt in range(retries + 1):
+        started = time.perf_counter()
+        try:
+            with profiler.span("upload.batch"):
+                profiler.count("bytes", batch.size)
+                client.ingest_data_entity_list(
+                    data_entities=DataEntityList(
+                        data_source_oddrn=data_source_oddrn,
+                        items=batch.items,
+                    )
+                )
+        except Exception as e:
+            if attempt == retries or not is_transient(e):
+                raise
+
+            # Exponential backoff with full jitter
+            delay = random.uniform(0, min(MAX_BACKOFF, BACKOFF * 2**attempt))
+            logger.warning(f"Batch {number} failed: {e}. Retrying in {delay:.1f}s")
+            time.sleep(delay)
+        else:
+            logger.info(
+                f"Batch {number}: ingested {len(batch.items)} entities, "
+                f"{batch.size} bytes in {time.perf_counter() - started:.2f}s"
+            )
+            return
+
+
+def is_transient(error: Optional[BaseException]) -> bool:
+    """Connection errors, timeouts, 429 and 5xx responses are worth retrying"""
+    while error is not None:
+        if isinstance(error, (ConnectionError, Timeout)):
+            return True
+
+        if isinstance(error, HTTPError) and error.response is not None:
+            status = error.response.status_code
+            return status == 429 or status >= 500
+
+        error = error.__cause__ or error.__context__
+
+    return False
+
+
+def split_entities(
+    entities: Iterable[DataEntity], max_entities: int, max_bytes: int
+) -> Iterator[Batch]:
+    """
+    Splits entities to batches limited by count and serialized size.
+    Test run is always sent in the same batch with its test, group bigger than limits is sent alone.
+    """
+    batch = Batch()
+
+    for group in group_entities(entities):
+        with profiler.span("serialize"):
+            size = sum(len(entity.json(exclude_none=True).encode()) + 1 for entity in group)
+            profiler.count("entities", len(group))
+
+        if size > max_bytes:
+            logger.warning(
+                f"Entity {group[0].oddrn} takes {size} bytes, which exceeds batch limit of {max_bytes} bytes"
+            )
+
+        if batch.items and (
+            len(batch.items) + len(group) > max_entities
+            or batch.size + size > max_bytes
+        ):
+            yield batch
+            batch = Batch()
+
+        batch.add(group, size)
+
+    if batch.items:
+        yield batch
+
+
+def group_entities(entities: Iterable[DataEntity]) -> Iterable[list[DataEntity]]:
+    """Groups each test job with its runs, keeping order of first appearance"""
+
+    def group_key(entity: DataEntity) -> str:
+        if entity.data_quality_test_run is not None:
+            return entity.data_quality_test_run.data_quality_test_oddrn
+        return entity.oddrn
+
+    groups: dict[str, list[DataEntity]] = {}
+    for entity in entities:
+        groups.setdefault(group_key(entity), []).append(entity)
+
+    return groups.values()
 
 
 def show_message(data_entities: DataEntityList) -> None:
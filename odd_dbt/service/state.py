@@ -0,0 +1,92 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Optional
+
+from odd_dbt.logger import logger
+from odd_dbt.utils.profiling import profiler
+
+if TYPE_CHECKING:
+    from odd_models import DataEntity
+
+STATE_FILE = "odd_ingestion_state.json"
+FRESHNESS_STATE_FILE = "odd_freshness_state.json"
+
+# dbt sets created_at on each parse, it changes even if a node didn't
+_VOLATILE_FIELDS = {"metadata": {"__all__": {"metadata": {"created_at"}}}}
+
+# ODDRNs of test runs end with invocation id, no later ingestion looks them up
+_RUN_KEY = "/runs/"
+
+# Key of entity in the state and digest of its content, None for entities always sent and not kept
+Fingerprint = Callable[["DataEntity"], Optional[tuple[str, str]]]
+
+
+def content_hash(entity: "DataEntity") -> str:
+    payload = entity.json(exclude_none=True, exclude=_VOLATILE_FIELDS)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def content_fingerprint(entity: "DataEntity") -> Optional[tuple[str, str]]:
+    """Test run is new in each invocation, it is always sent and not kept in the state"""
+    if entity.data_quality_test_run is not None:
+        return None
+    return entity.oddrn, content_hash(entity)
+
+
+def status_fingerprint(entity: "DataEntity") -> Optional[tuple[str, str]]:
+    """
+    Test run is keyed by its test and compared by status, so a run of each invocation
+    is sent only when the status changes. Status reason is compared by presence only,
+    it separates warned runs from passed ones. Other entities are compared by content.
+    """
+    if (run := entity.data_quality_test_run) is not None:
+        digest = f"{run.status.value}{':reason' if run.status_reason else ''}"
+        return f"{run.data_quality_test_oddrn}/runs", digest
+    return content_fingerprint(entity)
+
+
+class IngestionState:
+    """Content hashes of entities, keyed by ODDRN, from previous successful ingestions"""
+
+    def __init__(self, file: Path, fingerprint: Fingerprint = content_fingerprint) -> None:
+        self.file = file
+        self._fingerprint = fingerprint
+        self._hashes: dict[str, str] = {}
+        self._pending: dict[str, Optional[tuple[str, str]]] = {}
+
+        if file.is_file():
+            try:
+                hashes = json.loads(file.read_text())
+                # States written by previous versions kept a key per test run
+                self._hashes = {key: digest for key, digest in hashes.items() if _RUN_KEY not in key}
+            except ValueError as e:
+                logger.warning(f"Ingestion state {file} is corrupted, ignoring it: {e}")
+
+    def changed(self, entities: Iterable["DataEntity"]) -> list["DataEntity"]:
+        """
+        :return: entities which are new or differ from the last ingested version
+        """
+        changed = []
+        with profiler.span("state.diff"):
+            for entity in entities:
+                fingerprint = self._pending[entity.oddrn] = self._fingerprint(entity)
+                if fingerprint is None or self._hashes.get(fingerprint[0]) != fingerprint[1]:
+                    changed.append(entity)
+        return changed
+
+    def save(self, ingested: Iterable["DataEntity"]) -> None:
+        with profiler.span("state.save"):
+            for entity in ingested:
+                if entity.oddrn in self._pending:
+                    fingerprint = self._pending[entity.oddrn]
+                else:
+                    fingerprint = self._fingerprint(entity)
+                if fingerprint is not None:
+                    key, digest = fingerprint
+                    self._hashes[key] = digest
+
+            self.file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.file.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._hashes))
+            tmp.replace(self.file)
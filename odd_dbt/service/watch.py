@@ -0,0 +1,104 @@
+import signal
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from odd_dbt.logger import logger
+
+MANIFEST = "manifest.json"
+RUN_RESULTS = "run_results.json"
+SOURCES = "sources.json"
+INTERVAL = 0.2
+DEBOUNCE = 0.5
+
+Signature = Optional[tuple[int, int]]
+
+
+class ArtifactWatcher:
+    """
+    Polls dbt artifacts in the target folder for changes.
+    Burst of writes, i.e. dbt writing manifest.json and then run_results.json,
+    is reported once, when files stay unchanged for `debounce` seconds.
+    Polling stats of a couple of files is cheap and works on any file system.
+    """
+
+    def __init__(
+        self,
+        target_path: Path,
+        files: Iterable[str] = (MANIFEST, RUN_RESULTS),
+        interval: float = INTERVAL,
+        debounce: float = DEBOUNCE,
+    ) -> None:
+        self.target_path = target_path
+        self.files = tuple(files)
+        self.interval = interval
+        self.debounce = debounce
+
+    def changes(
+        self, stop: threading.Event, initial: bool = True
+    ) -> Iterator[set[str]]:
+        """
+        :param stop: event finishing iteration, checked between polls
+        :param initial: report existing files as changed on the first poll
+        :return: iterator of names of changed files
+        """
+        last = {} if initial else self._snapshot()
+
+        while not stop.is_set():
+            current = self._snapshot()
+            if current != last:
+                current = self._settle(current, stop)
+                if current is None:
+                    return
+
+                changed = {
+                    name
+                    for name, signature in current.items()
+                    if signature is not None and signature != last.get(name)
+                }
+                last = current
+                if changed:
+                    yield changed
+                continue
+
+            stop.wait(self.interval)
+
+    def _settle(
+        self, snapshot: dict[str, Signature], stop: threading.Event
+    ) -> Optional[dict[str, Signature]]:
+        """Waits until files stop changing, None when stopped while waiting"""
+        settled_at = time.monotonic()
+        while not stop.wait(min(self.interval, self.debounce)):
+            current = self._snapshot()
+            if current != snapshot:
+                snapshot, settled_at = current, time.monotonic()
+            elif time.monotonic() - settled_at >= self.debounce:
+                return snapshot
+        return None
+
+    def _snapshot(self) -> dict[str, Signature]:
+        snapshot = {}
+        for name in self.files:
+            try:
+                stat = (self.target_path / name).stat()
+                snapshot[name] = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                snapshot[name] = None
+        return snapshot
+
+
+def stop_on_signals(*signals: signal.Signals) -> threading.Event:
+    """
+    :return: event set by any of signals, SIGTERM and SIGINT by default
+    """
+    stop = threading.Event()
+
+    def handler(signum: int, _frame) -> None:
+        logger.info(f"Got {signal.Signals(signum).name}, stopping after current ingestion")
+        stop.set()
+
+    for sig in signals or (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, handler)
+
+    return stop
@@ -1,8 +1,9 @@
-import json
 from pathlib import Path
 
 import yaml
 
+from odd_dbt.utils.json_backend import loads
+
 
 def load_yaml(file_path: Path) -> dict:
     with file_path.open() as file:
@@ -10,5 +11,4 @@ def load_yaml(file_path: Path) -> dict:
 
 
 def load_json(file_path: Path) -> dict:
-    with file_path.open() as file:
-        return json.load(file)
+    return loads(file_path.read_bytes())
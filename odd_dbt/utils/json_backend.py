@@ -0,0 +1,59 @@
+import contextlib
+import json
+import os
+from typing import Any, Callable, Union
+
+Loads = Callable[[Union[bytes, str]], Any]
+
+JSON_BACKENDS: dict[str, Loads] = {}
+
+# Errors raised by backends on invalid documents, orjson one is a ValueError
+DECODE_ERRORS: tuple[type[Exception], ...] = (ValueError,)
+
+# Ordered by preference, msgspec has the lowest peak memory on big manifests.
+with contextlib.suppress(ImportError):
+    import msgspec
+
+    JSON_BACKENDS["msgspec"] = msgspec.json.decode
+    DECODE_ERRORS += (msgspec.DecodeError,)
+
+with contextlib.suppress(ImportError):
+    import orjson
+
+    JSON_BACKENDS["orjson"] = orjson.loads
+
+JSON_BACKENDS["json"] = json.loads
+
+
+def get_backend(name: str = None) -> Loads:
+    """
+    :param name: one of msgspec, orjson or json. The first installed is used by default,
+    can be set by ODD_DBT_JSON_BACKEND env variable
+    :return: function decoding JSON document
+    """
+    name = name or os.getenv("ODD_DBT_JSON_BACKEND") or next(iter(JSON_BACKENDS))
+
+    try:
+        return JSON_BACKENDS[name]
+    except KeyError:
+        raise KeyError(
+            f"JSON backend {name} is not installed. Available: {list(JSON_BACKENDS)}"
+        )
+
+
+_loads = get_backend()
+
+
+def set_backend(name: str) -> None:
+    global _loads
+    _loads = get_backend(name)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    try:
+        return _loads(data)
+    except DECODE_ERRORS:
+        # orjson and msgspec are strict and reject NaN/Infinity which python json module writes
+        if _loads is json.loads:
+            raise
+        return json.loads(data)
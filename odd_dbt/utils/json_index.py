@@ -0,0 +1,199 @@
+import json
+import mmap
+import re
+import threading
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Mapping, Optional
+
+from odd_dbt.utils.json_backend import loads
+
+_DECODER = json.JSONDecoder(strict=False)
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_LEADING_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+_WINDOW = 8 * 1024 * 1024
+
+_MALFORMED = (StopIteration, json.JSONDecodeError, IndexError)
+
+
+class Span:
+    __slots__ = ("start", "end", "members")
+
+    def __init__(
+        self, start: int, end: int, members: Optional[dict[str, "Span"]] = None
+    ) -> None:
+        self.start = start
+        self.end = end
+        self.members = members
+
+
+def _window(buf, start: int, size: int) -> str:
+    # latin-1 maps each byte to a single character, so offsets in the decoded
+    # window are byte offsets in the file. JSON syntax is plain ASCII, only
+    # non-ASCII string contents get garbled and those are re-read from bytes.
+    return buf[start : start + size].decode("latin-1")
+
+
+def _key(buf, key: str, start: int, end: int) -> str:
+    return key if key.isascii() else json.loads(buf[start:end])
+
+
+def index_object(buf, pos: int, depth: int = 0) -> Span:
+    """
+    Builds byte-offset index of JSON object members. Members are scanned one at a time
+    by the C JSON scanner within a sliding window, so the whole document is never decoded.
+
+    :param buf: bytes-like JSON document, i.e. memory-mapped file
+    :param pos: position of the opening brace of an object
+    :param depth: how many levels of nested objects to index
+    :return: Span of the object with spans of its members
+    """
+    if buf[pos : pos + 1] != b"{":
+        raise ValueError(f"Expected JSON object at {pos}")
+
+    members = {}
+    size = len(buf)
+    window = _WINDOW
+    offset = pos + 1
+    text = _window(buf, offset, window)
+    i = _WHITESPACE.match(text, 0).end()
+
+    if text[i : i + 1] == "}":
+        return Span(pos, offset + i + 1, members)
+
+    while True:
+        try:
+            key, key_end = _DECODER.scan_once(text, i)
+            if not isinstance(key, str):
+                raise ValueError(f"Expected object key at {offset + i}")
+
+            j = _WHITESPACE.match(text, key_end).end()
+            if text[j] != ":":
+                raise ValueError(f"Expected ':' at {offset + j}")
+
+            start = _WHITESPACE.match(text, j + 1).end()
+            nested = depth > 0 and text[start] == "{"
+
+            if not nested:
+                _, end = _DECODER.scan_once(text, start)
+                j = _WHITESPACE.match(text, end).end()
+                delimiter = text[j]
+        except _MALFORMED as e:
+            if offset + len(text) >= size:
+                raise ValueError(f"Malformed JSON object at {offset + i}") from e
+
+            # Member crosses the window boundary, slide window to its start.
+            window = window * 2 if i == 0 else window
+            offset += i
+            text = _window(buf, offset, window)
+            i = _WHITESPACE.match(text, 0).end()
+            continue
+
+        name = _key(buf, key, offset + i, offset + key_end)
+
+        if nested:
+            span = index_object(buf, offset + start, depth - 1)
+            offset = span.end
+            text = _window(buf, offset, window)
+            j = _WHITESPACE.match(text, 0).end()
+            delimiter = text[j : j + 1]
+        else:
+            span = Span(offset + start, offset + end)
+
+        members[name] = span
+
+        if delimiter == "}":
+            return Span(pos, offset + j + 1, members)
+
+        if delimiter != ",":
+            raise ValueError(f"Expected ',' or '}}' at {offset + j}")
+
+        i = _WHITESPACE.match(text, j + 1).end()
+
+
+class IndexedFile:
+    """Opened file members of which are read by byte offsets"""
+
+    def __init__(self, file_path: Path) -> None:
+        self._file = file_path.open("rb")
+        self._lock = threading.Lock()
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def read(self, span: Span) -> bytes:
+        with self._lock:
+            self._file.seek(span.start)
+            return self._file.read(span.end - span.start)
+
+    def __del__(self) -> None:
+        self._file.close()
+
+
+class IndexedObject(Mapping[str, Any]):
+    """
+    Read-only mapping over members of a JSON object stored in a file.
+    Holds only byte offsets, member is read and decoded on each lookup.
+    """
+
+    def __init__(self, file: IndexedFile, members: dict[str, Span]) -> None:
+        self._file = file
+        self._members = members
+
+    def __getitem__(self, key: str) -> Any:
+        return loads(self._file.read(self._members[key]))
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._members
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._members)
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+
+def load_json_index(
+    file_path: Path, indexed: Iterable[str], decoded: Iterable[str]
+) -> dict[str, Any]:
+    """
+    Reads top level JSON object from a memory-mapped file without building the whole object tree.
+
+    :param file_path: path to JSON file
+    :param indexed: top level members returned as IndexedObject, their members are decoded on lookup
+    :param decoded: top level members decoded eagerly
+    :return: dict with requested top level members, other members are skipped
+    """
+    indexed, decoded = set(indexed), set(decoded)
+    file = IndexedFile(file_path)
+    result = {}
+
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        top_level = index_object(buf, _LEADING_WHITESPACE.match(buf).end(), depth=1)
+
+        for key, span in top_level.members.items():
+            if key in decoded:
+                result[key] = loads(buf[span.start : span.end])
+            elif key in indexed:
+                result[key] = IndexedObject(file, span.members or {})
+
+    return result
+
+
+_HEAD = 64 * 1024
+
+
+def load_leading_member(file_path: Path, key: str) -> Any:
+    """
+    Decodes a top level member written first, i.e. metadata of dbt artifacts, reading the head of the file only.
+    Falls back to indexing the whole file when the member is not the first one or doesn't fit the head.
+    """
+    with file_path.open("rb") as file:
+        head = file.read(_HEAD).decode("utf-8", errors="ignore")
+
+    if match := re.match(r'[ \t\n\r]*\{[ \t\n\r]*"%s"[ \t\n\r]*:[ \t\n\r]*' % re.escape(key), head):
+        try:
+            return _DECODER.raw_decode(head, match.end())[0]
+        except json.JSONDecodeError:
+            pass
+
+    return load_json_index(file_path, indexed=(), decoded=(key,)).get(key)
@@ -0,0 +1,11 @@
+from pathlib import Path
+
+
+def default_project_dir() -> Path:
+    """Closest folder with dbt_project.yml, as dbt.cli.resolvers does it without importing dbt"""
+    paths = [Path.cwd(), *Path.cwd().parents]
+    return next((x for x in paths if (x / "dbt_project.yml").exists()), Path.cwd())
+
+
+def default_profiles_dir() -> Path:
+    return Path.cwd() if (Path.cwd() / "profiles.yml").exists() else Path.home() / ".dbt"
@@ -0,0 +1,218 @@
+"""
+Spans and counters of run phases: dbt invocation, artifacts parsing, mapping, serialization and upload.
+Nothing is measured until profiling is enabled, a disabled span costs a flag check.
+"""
+import contextlib
+import cProfile
+import functools
+import json
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, Optional, TypeVar
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+F = TypeVar("F", bound=Callable)
+
+
+def peak_rss() -> int:
+    """Peak resident set size of the process in bytes, 0 when unknown"""
+    if resource is None:
+        return 0
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class Span:
+    name: str
+    depth: int
+    calls: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_delta: int = 0
+    counters: dict[str, int] = field(default_factory=dict)
+
+
+class Profiler:
+    """
+    Spans of the same name are summed up, i.e. each batch upload adds to one "upload.batch" span.
+    Span opened in another thread, than the main one, measures CPU time of that thread only
+    and is nested into the span open in the main thread.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.spans: dict[str, Span] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._main_stack: list[Span] = []
+
+    def _stack(self) -> list[Span]:
+        if threading.current_thread() is threading.main_thread():
+            return self._main_stack
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _depth(self, stack: list[Span]) -> int:
+        if stack is self._main_stack:
+            return len(stack)
+        return len(self._main_stack) + len(stack)
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        stack = self._stack()
+        with self._lock:
+            span = self.spans.setdefault(name, Span(name=name, depth=self._depth(stack)))
+
+        cpu_time = (
+            time.process_time
+            if threading.current_thread() is threading.main_thread()
+            else time.thread_time
+        )
+        wall, cpu, rss = time.perf_counter(), cpu_time(), peak_rss()
+        stack.append(span)
+        try:
+            yield
+        finally:
+            stack.pop()
+            with self._lock:
+                span.calls += 1
+                span.wall_seconds += time.perf_counter() - wall
+                span.cpu_seconds += cpu_time() - cpu
+                span.peak_rss_delta += peak_rss() - rss
+
+    def spanned(self, name: str) -> Callable[[F], F]:
+        """Decorator wrapping each call of the function into a span"""
+
+        def decorator(func: F) -> F:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Adds value to a counter of the innermost span of this thread"""
+        if not self.enabled or not (stack := self._stack()):
+            return
+
+        with self._lock:
+            counters = stack[-1].counters
+            counters[name] = counters.get(name, 0) + value
+
+    def report(self) -> list[dict]:
+        return [asdict(span) for span in self.spans.values()]
+
+    def table(self) -> str:
+        header = f"{'phase':<32} {'calls':>6} {'wall, s':>9} {'cpu, s':>9} {'peak rss +, MB':>15}  counters"
+        rows = [header, "-" * len(header)]
+        for span in self.spans.values():
+            counters = " ".join(f"{key}={value}" for key, value in span.counters.items())
+            rows.append(
+                f"{'  ' * span.depth + span.name:<32} {span.calls:>6} {span.wall_seconds:>9.3f} "
+                f"{span.cpu_seconds:>9.3f} {span.peak_rss_delta / 2**20:>15.1f}  {counters}"
+            )
+        return "\n".join(rows)
+
+    def reset(self) -> None:
+        self.spans.clear()
+        self._main_stack.clear()
+
+
+profiler = Profiler()
+
+
+@contextlib.contextmanager
+def profile_phases(enabled: bool, output: Optional[Path] = None) -> Iterator[None]:
+    """
+    Collects spans of the wrapped command, prints them as a table and writes as JSON to output.
+    """
+    profiler.enabled = enabled or output is not None
+    profiler.reset()
+    try:
+        with profiler.span("total"):
+            yield
+    finally:
+        if profiler.enabled:
+            print(profiler.table(), file=sys.stderr)
+            if output:
+                output.write_text(json.dumps(profiler.report(), indent=2))
+            profiler.enabled = False
+
+
+class ProfileDump:
+    """
+    Profiles parts of code by cProfile, i.e. mapping of each streamed batch, stats of all parts are dumped
+    to path on exit. With .html path pyinstrument is used, it needs to be installed.
+    Code run by worker processes is not profiled.
+    """
+
+    def __init__(self, path: Optional[Path]) -> None:
+        self.path = path
+        self._profile = None
+
+        if path is None:
+            return
+
+        if path.suffix == ".html":
+            try:
+                from pyinstrument import Profiler as Instrument
+            except ImportError:
+                raise ValueError(f"Install pyinstrument to write {path}")
+            self._profile = Instrument()
+        else:
+            self._profile = cProfile.Profile()
+
+    def __enter__(self) -> "ProfileDump":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._profile is None:
+            return
+
+        if isinstance(self._profile, cProfile.Profile):
+            self._profile.dump_stats(self.path)
+        elif self._profile.last_session is not None:
+            self.path.write_text(self._profile.output_html())
+
+    @contextlib.contextmanager
+    def part(self) -> Iterator[None]:
+        if self._profile is None:
+            yield
+            return
+
+        # pyinstrument combines a restarted session with the previous ones
+        start, stop = (
+            (self._profile.enable, self._profile.disable)
+            if isinstance(self._profile, cProfile.Profile)
+            else (self._profile.start, self._profile.stop)
+        )
+        start()
+        try:
+            yield
+        finally:
+            stop()
+
+
+@contextlib.contextmanager
+def dump_profile(path: Optional[Path]) -> Iterator[None]:
+    """Profiles the wrapped code, see ProfileDump"""
+    with ProfileDump(path) as profile, profile.part():
+        yield
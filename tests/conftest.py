@@ -0,0 +1,12 @@
+import pytest
+
+from odd_dbt.logger import logger
+
+
+@pytest.fixture
+def warnings() -> list[str]:
+    """Messages of warnings logged by the test"""
+    messages = []
+    handler = logger.add(lambda message: messages.append(message.record["message"]), level="WARNING")
+    yield messages
+    logger.remove(handler)
@@ -0,0 +1,21 @@
+from typer.testing import CliRunner
+
+from odd_dbt import errors
+from odd_dbt.app import app
+from odd_dbt.service import dbt
+
+runner = CliRunner()
+
+
+def test_test_command_exits_with_2_when_dbt_can_not_run(monkeypatch, tmp_path):
+    def run_tests(**kwargs):
+        raise errors.DbtTestCommandError("Could not run dbt test command.")
+
+    monkeypatch.setattr(dbt, "run_tests", run_tests)
+
+    result = runner.invoke(
+        app,
+        ["test", "--project-dir", str(tmp_path), "--dbt-oddrn", "//dbt/host/localhost", "--output", "out.ndjson"],
+    )
+
+    assert result.exit_code == 2
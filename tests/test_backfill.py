@@ -0,0 +1,137 @@
+import json
+from pathlib import Path
+
+import pytest
+from odd_models import DataEntity, DataEntityList
+from odd_models.models import DataEntityType, DataQualityTest, DataQualityTestExpectation
+
+from odd_dbt.errors import ProfileError
+from odd_dbt.mapper.parallel import Mapped
+from odd_dbt.service.backfill import (
+    ArchivedRun,
+    BackfillCheckpoint,
+    ManifestIndex,
+    backfill,
+    check_credentials,
+)
+
+DATA_SOURCE_ODDRN = "//dbt/host/localhost"
+
+
+def write_manifest(folder: Path, invocation_id: str, generated_at: str) -> Path:
+    folder.mkdir(parents=True)
+    file = folder / "manifest.json"
+    metadata = {"invocation_id": invocation_id, "generated_at": generated_at, "adapter_type": "postgres"}
+    file.write_text(json.dumps({"metadata": metadata, "nodes": {}}))
+    return file
+
+
+@pytest.fixture
+def manifests(tmp_path) -> ManifestIndex:
+    return ManifestIndex(
+        [
+            write_manifest(tmp_path / "monday", "monday", "2024-01-01T00:00:00Z"),
+            write_manifest(tmp_path / "wednesday", "wednesday", "2024-01-03T00:00:00Z"),
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    "run_metadata, folder",
+    [
+        ({"invocation_id": "wednesday", "generated_at": "2024-01-01T00:00:00Z"}, "wednesday"),
+        ({"invocation_id": "tuesday", "generated_at": "2024-01-02T00:00:00Z"}, "monday"),
+        ({"invocation_id": "friday", "generated_at": "2024-01-05T00:00:00Z"}, "wednesday"),
+        ({"invocation_id": "sunday", "generated_at": "2023-12-31T00:00:00Z"}, "monday"),
+    ],
+    ids=["same invocation", "latest before", "latest", "earliest after"],
+)
+def test_manifest_is_matched_by_invocation_then_time(manifests, run_metadata, folder):
+    manifest, metadata = manifests.match(run_metadata)
+
+    assert manifest.parent.name == folder
+    assert metadata["invocation_id"] == folder
+
+
+def test_run_without_invocation_and_time_is_not_matched(manifests):
+    assert manifests.match({}) is None
+
+
+def quality_test(name: str) -> DataEntity:
+    return DataEntity(
+        oddrn=f"{DATA_SOURCE_ODDRN}/tests/{name}",
+        name=name,
+        type=DataEntityType.JOB,
+        data_quality_test=DataQualityTest(
+            suite_name="shop",
+            dataset_list=[],
+            expectation=DataQualityTestExpectation(type=name),
+        ),
+    )
+
+
+def archived_run(tmp_path: Path, name: str) -> tuple[ArchivedRun, Mapped[list[DataEntity]]]:
+    run = ArchivedRun(
+        run_results=tmp_path / f"run_results_{name}.json",
+        manifest=tmp_path / "manifest.json",
+        invocation_id=name,
+        generated_at=name,
+        adapter_type="postgres",
+    )
+    run_entity = DataEntity(oddrn=f"{DATA_SOURCE_ODDRN}/runs/{name}", name=name, type=DataEntityType.JOB_RUN)
+    return run, Mapped(name, value=[quality_test("not_null"), run_entity])
+
+
+def test_test_definitions_are_sent_once(tmp_path):
+    sent: list[DataEntityList] = []
+    checkpoint = BackfillCheckpoint(tmp_path / "checkpoint.json")
+    runs = [archived_run(tmp_path, name) for name in ("first", "second", "third")]
+
+    ingested = backfill(runs, checkpoint, sent.append, DATA_SOURCE_ODDRN, size=3)
+
+    names = [entity.name for entities in sent for entity in entities.items]
+    assert ingested == 3
+    assert names == ["not_null", "first", "second", "third"]
+
+
+def test_backfill_resumes_after_failed_flush(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    runs = [archived_run(tmp_path, name) for name in ("first", "second", "third")]
+
+    def fail_on_second_batch(entities: DataEntityList) -> None:
+        if sent:
+            raise ConnectionError("platform is down")
+        sent.append(entities)
+
+    sent: list[DataEntityList] = []
+    with pytest.raises(ConnectionError):
+        backfill(runs, BackfillCheckpoint(path), fail_on_second_batch, DATA_SOURCE_ODDRN, size=2)
+
+    checkpoint = BackfillCheckpoint(path)
+    pending = [(run, mapped) for run, mapped in runs if not checkpoint.is_done(run)]
+    assert [run.invocation_id for run, _ in pending] == ["second", "third"]
+
+    resumed: list[DataEntityList] = []
+    assert backfill(pending, checkpoint, resumed.append, DATA_SOURCE_ODDRN, size=2) == 2
+
+    # Test definition went with the first run, resumed runs refer to it by ODDRN
+    assert [entity.name for entities in resumed for entity in entities.items] == ["second", "third"]
+    assert all(BackfillCheckpoint(path).is_done(run) for run, _ in runs)
+
+
+def test_corrupted_checkpoint_is_ignored(tmp_path, warnings):
+    path = tmp_path / "checkpoint.json"
+    path.write_text("{")
+
+    checkpoint = BackfillCheckpoint(path)
+
+    assert checkpoint.files == set() and checkpoint.tests == set()
+    assert any("corrupted" in message for message in warnings)
+
+
+def test_missing_credentials_fail_before_mapping(tmp_path):
+    runs = [archived_run(tmp_path, name)[0] for name in ("first", "second")]
+
+    check_credentials(runs, {"host": "localhost", "database": "shop"})
+    with pytest.raises(ProfileError, match="host"):
+        check_credentials(runs, {"database": "shop"})
@@ -0,0 +1,70 @@
+from odd_models import DataEntity
+from odd_models.models import DataEntityType, DataQualityTestRun, QualityRunStatus
+
+from odd_dbt.service.odd import split_entities
+
+DATA_SOURCE_ODDRN = "//dbt/host/localhost"
+
+
+def job(name: str) -> DataEntity:
+    return DataEntity(oddrn=f"{DATA_SOURCE_ODDRN}/tests/{name}", name=name, type=DataEntityType.JOB)
+
+
+def job_run(name: str, invocation_id: str) -> DataEntity:
+    return DataEntity(
+        oddrn=f"{DATA_SOURCE_ODDRN}/tests/{name}/runs/{invocation_id}",
+        name=name,
+        type=DataEntityType.JOB_RUN,
+        data_quality_test_run=DataQualityTestRun(
+            data_quality_test_oddrn=f"{DATA_SOURCE_ODDRN}/tests/{name}",
+            start_time="2024-01-01T00:00:00Z",
+            end_time="2024-01-01T00:00:01Z",
+            status=QualityRunStatus.SUCCESS,
+        ),
+    )
+
+
+def oddrns(batches) -> list[list[str]]:
+    return [[entity.oddrn.rsplit("/tests/", 1)[1] for entity in batch.items] for batch in batches]
+
+
+def test_batches_are_limited_by_entity_count():
+    entities = [job(f"test_{i}") for i in range(5)]
+
+    batches = split_entities(entities, max_entities=2, max_bytes=2**20)
+
+    assert oddrns(batches) == [["test_0", "test_1"], ["test_2", "test_3"], ["test_4"]]
+
+
+def test_runs_are_sent_with_their_test():
+    entities = [job("unique"), job("not_null"), job_run("unique", "1"), job_run("not_null", "1")]
+
+    batches = split_entities(entities, max_entities=2, max_bytes=2**20)
+
+    assert oddrns(batches) == [["unique", "unique/runs/1"], ["not_null", "not_null/runs/1"]]
+
+
+def test_group_bigger_than_limit_is_sent_alone():
+    entities = [job("unique"), job("not_null"), job_run("not_null", "1"), job_run("not_null", "2"), job("accepted")]
+
+    batches = split_entities(entities, max_entities=2, max_bytes=2**20)
+
+    assert oddrns(batches) == [["unique"], ["not_null", "not_null/runs/1", "not_null/runs/2"], ["accepted"]]
+
+
+def test_batch_size_is_counted_in_bytes():
+    entities = [job("заказы"), job("orders")]
+    sizes = [len(entity.json(exclude_none=True).encode()) + 1 for entity in entities]
+
+    batches = list(split_entities(entities, max_entities=10, max_bytes=sum(sizes) - 1))
+
+    assert [batch.size for batch in batches] == sizes
+
+
+def test_entity_bigger_than_byte_limit_is_reported(warnings):
+    entities = [job("orders"), job("customers")]
+
+    batches = list(split_entities(entities, max_entities=10, max_bytes=10))
+
+    assert len(batches) == 2
+    assert any(f"{DATA_SOURCE_ODDRN}/tests/orders" in message for message in warnings)
@@ -0,0 +1,69 @@
+import pytest
+from odd_models import DataEntity, DataEntityList
+from odd_models.models import DataEntityType, DataQualityTestRun, QualityRunStatus
+
+from odd_dbt.service.export import EntityWriter, read_batches, write_entities
+
+DATA_SOURCE_ODDRN = "//dbt/host/localhost"
+
+
+def job(name: str) -> DataEntity:
+    return DataEntity(oddrn=f"{DATA_SOURCE_ODDRN}/tests/{name}", name=name, type=DataEntityType.JOB)
+
+
+def job_run(name: str) -> DataEntity:
+    return DataEntity(
+        oddrn=f"{DATA_SOURCE_ODDRN}/tests/{name}/runs/1",
+        name=f"{name} run",
+        type=DataEntityType.JOB_RUN,
+        data_quality_test_run=DataQualityTestRun(
+            data_quality_test_oddrn=f"{DATA_SOURCE_ODDRN}/tests/{name}",
+            start_time="2024-01-01T00:00:00Z",
+            end_time="2024-01-01T00:00:01Z",
+            status=QualityRunStatus.SUCCESS,
+        ),
+    )
+
+
+def entity_list(*items: DataEntity, data_source_oddrn: str = DATA_SOURCE_ODDRN) -> DataEntityList:
+    return DataEntityList(data_source_oddrn=data_source_oddrn, items=list(items))
+
+
+@pytest.mark.parametrize("name", ["entities.jsonl", "entities.jsonl.gz"])
+def test_written_entities_are_read_back(tmp_path, name):
+    path = tmp_path / name
+    written = entity_list(job("not_null"), job_run("not_null"), job("unique"))
+
+    write_entities(written, path)
+
+    assert list(read_batches([path], size=100)) == [written]
+
+
+def test_batches_keep_runs_with_their_tests(tmp_path):
+    path = tmp_path / "entities.jsonl"
+    write_entities(entity_list(job("not_null"), job_run("not_null"), job("unique"), job_run("unique")), path)
+
+    batches = [[entity.name for entity in batch.items] for batch in read_batches([path], size=1)]
+
+    assert batches == [["not_null", "not_null run"], ["unique", "unique run"]]
+
+
+def test_batches_are_split_by_data_source(tmp_path):
+    path = tmp_path / "entities.jsonl"
+    other = "//dbt/host/other"
+    with EntityWriter(path) as writer:
+        writer.write(entity_list(job("not_null")))
+        writer.write(entity_list(job("unique"), data_source_oddrn=other))
+
+    batches = list(read_batches([path], size=100))
+
+    assert writer.written == 2
+    assert [batch.data_source_oddrn for batch in batches] == [DATA_SOURCE_ODDRN, other]
+
+
+def test_entity_before_data_source_is_rejected(tmp_path):
+    path = tmp_path / "entities.jsonl"
+    path.write_text(job("not_null").json(exclude_none=True) + "\n")
+
+    with pytest.raises(ValueError, match="Line 1"):
+        list(read_batches([path], size=100))
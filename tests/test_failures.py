@@ -0,0 +1,113 @@
+import json
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from odd_dbt.domain.context import OfflineDbtContext
+from odd_dbt.service.failures import FailedTest, FailureSampler, create_engine_for, create_sampler
+
+
+@pytest.fixture
+def database(tmp_path):
+    """SQLite database with tables of stored failures of two tests, 5 rows each"""
+    url = make_url(f"sqlite:///{tmp_path / 'failures.db'}")
+    engine = create_engine_for(url, concurrency=2)
+    with engine.begin() as connection:
+        for table in ("not_null_orders_id", "unique_orders_id"):
+            connection.execute(text(f"create table {table} (id integer, value text)"))
+            for i in range(5):
+                connection.execute(text(f"insert into {table} values ({i}, 'value {i}')"))
+    engine.dispose()
+    return url
+
+
+def sampler(url, rows_per_test=10, max_rows=100, max_bytes=1024 * 1024) -> FailureSampler:
+    return FailureSampler(
+        create_engine_for(url, concurrency=2),
+        rows_per_test=rows_per_test,
+        max_rows=max_rows,
+        max_bytes=max_bytes,
+        concurrency=2,
+    )
+
+
+TESTS = [
+    FailedTest("test.shop.not_null_orders_id", "not_null_orders_id", 5),
+    FailedTest("test.shop.unique_orders_id", "unique_orders_id", 5),
+]
+
+
+def test_rows_budget_is_shared_by_tests_and_batches(database):
+    with sampler(database, rows_per_test=4, max_rows=6) as failures:
+        first = failures.sample(TESTS[:1])
+        second = failures.sample(TESTS[1:])
+
+    assert len(first["test.shop.not_null_orders_id"].rows) == 4
+    assert len(second["test.shop.unique_orders_id"].rows) == 2
+    assert second["test.shop.unique_orders_id"].truncated
+    assert failures.rows_left == 0
+
+
+def test_bytes_budget_is_shared_by_tests(database):
+    row_size = len(json.dumps({"id": 0, "value": "value 0"}))
+
+    with sampler(database, max_bytes=row_size * 7) as failures:
+        samples = failures.sample(TESTS)
+
+    assert [len(sample.rows) for sample in samples.values()] == [5, 2]
+    assert failures.bytes_left < row_size
+
+
+def test_missing_table_is_skipped(database, warnings):
+    tests = [FailedTest("test.shop.dropped", "dropped_table", 3), *TESTS]
+
+    with sampler(database, rows_per_test=2, max_rows=4) as failures:
+        samples = failures.sample(tests)
+        # Rows reserved for the missing table are left to next samples
+        rows_left = failures.rows_left
+
+    assert list(samples) == [test.unique_id for test in TESTS]
+    assert [len(sample.rows) for sample in samples.values()] == [2, 0]
+    assert rows_left == 2
+    assert any("dropped_table" in message for message in warnings)
+
+
+def test_unreachable_database_is_reported_once(tmp_path, warnings):
+    url = make_url(f"sqlite:///{tmp_path / 'missing' / 'failures.db'}")
+
+    with sampler(url) as failures:
+        assert failures.sample(TESTS[:1]) == {}
+        assert failures.sample(TESTS[1:]) == {}
+
+    assert len(warnings) == 1
+    assert "can't connect" in warnings[0]
+
+
+def sampler_of(context, url=None):
+    return create_sampler(context, url, rows_per_test=10, max_rows=100, max_bytes=1024, concurrency=1)
+
+
+def test_offline_context_without_database_url_is_not_sampled(tmp_path, warnings):
+    context = OfflineDbtContext(tmp_path, {"host": "localhost", "database": "shop"}, adapter_type="postgres")
+
+    assert sampler_of(context) is None
+    assert len(warnings) == 1
+    assert "no dbt profile" in warnings[0]
+
+
+def test_unsupported_adapter_is_not_sampled(tmp_path, warnings):
+    class BigQueryContext(OfflineDbtContext):
+        connection_settings = {"project": "shop"}
+
+    context = BigQueryContext(tmp_path, {}, adapter_type="bigquery")
+
+    assert sampler_of(context) is None
+    assert "bigquery" in warnings[0]
+
+
+def test_missing_dialect_is_not_sampled(tmp_path, warnings):
+    context = OfflineDbtContext(tmp_path, {}, adapter_type="postgres")
+
+    assert sampler_of(context, "nosuchdialect://reader@db.example.com/shop") is None
+    assert "Install SQLAlchemy dialect" in warnings[0]
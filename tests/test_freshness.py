@@ -0,0 +1,105 @@
+import json
+
+import pytest
+from odd_models.models import DataEntityType, QualityRunStatus
+
+from odd_dbt.domain import SourceFreshnessResults
+from odd_dbt.domain.context import ArtifactCache, OfflineDbtContext
+from odd_dbt.libs.odd import create_dbt_generator_from_oddrn
+from odd_dbt.mapper.freshness import DbtFreshnessMapper
+from odd_dbt.mapper.metadata import SCHEMA_URL
+from odd_dbt.service.state import IngestionState, status_fingerprint
+
+CREDENTIALS = {"host": "localhost", "database": "shop"}
+
+
+def source(name: str) -> dict:
+    return {
+        "unique_id": f"source.shop.raw.{name}",
+        "database": "shop",
+        "schema": "raw",
+        "name": name,
+        "source_name": "raw",
+        "loaded_at_field": "loaded_at",
+    }
+
+
+def result(name: str, status: str, age_hours: float = 1.0, error: str = None) -> dict:
+    return {
+        "unique_id": f"source.shop.raw.{name}",
+        "status": status,
+        "max_loaded_at": "2024-01-01T00:00:00+00:00",
+        "snapshotted_at": "2024-01-01T12:00:00.000000Z",
+        "max_loaded_at_time_ago_in_s": age_hours * 3600,
+        "criteria": {"warn_after": {"count": 12, "period": "hour"}, "error_after": {"count": 24, "period": "hour"}},
+        "error": error,
+        "timing": [],
+    }
+
+
+def freshness(invocation_id: str, *results: dict) -> SourceFreshnessResults:
+    return SourceFreshnessResults.from_dict({"metadata": {"invocation_id": invocation_id}, "results": list(results)})
+
+
+@pytest.fixture
+def context(tmp_path) -> OfflineDbtContext:
+    target = tmp_path / "target"
+    target.mkdir()
+    manifest = {
+        "metadata": {"adapter_type": "postgres", "invocation_id": "invocation"},
+        "nodes": {},
+        "sources": {s["unique_id"]: s for s in map(source, ("orders", "customers", "payments"))},
+        "parent_map": {},
+    }
+    (target / "manifest.json").write_text(json.dumps(manifest))
+    return OfflineDbtContext(tmp_path, CREDENTIALS, target_path=target, cache=ArtifactCache())
+
+
+def map_freshness(context: OfflineDbtContext, results: SourceFreshnessResults) -> list:
+    generator = create_dbt_generator_from_oddrn("//dbt/host/localhost")
+    return DbtFreshnessMapper(context, generator, freshness=results).map().items
+
+
+def test_freshness_results_are_mapped_to_tests_and_runs(context, warnings):
+    results = freshness(
+        "invocation",
+        result("orders", "pass"),
+        result("customers", "warn", age_hours=13),
+        result("payments", "runtime error", error="column loaded_at does not exist"),
+        result("refunds", "pass"),
+    )
+
+    entities = map_freshness(context, results)
+
+    jobs = [entity for entity in entities if entity.type == DataEntityType.JOB]
+    runs = {entity.name: entity.data_quality_test_run for entity in entities if entity.type == DataEntityType.JOB_RUN}
+    assert [job.name for job in jobs] == [f"source_freshness_raw_{name}" for name in ("orders", "customers", "payments")]
+    assert all(str(job.metadata[0].schema_url) == SCHEMA_URL for job in jobs)
+    assert jobs[0].data_quality_test.dataset_list == [
+        context.oddrn_generator.get_oddrn_for(context.manifest.sources["source.shop.raw.orders"])
+    ]
+
+    orders, customers, payments = (runs[f"source_freshness_raw_{name}"] for name in ("orders", "customers", "payments"))
+    assert (orders.status, orders.status_reason) == (QualityRunStatus.SUCCESS, None)
+    assert customers.status == QualityRunStatus.SUCCESS
+    assert customers.status_reason.endswith("warn after 12 hours")
+    assert (payments.status, payments.status_reason) == (QualityRunStatus.BROKEN, "column loaded_at does not exist")
+    assert any("source.shop.raw.refunds" in message for message in warnings)
+
+
+def test_runs_are_sent_when_status_changes(context, tmp_path):
+    file = tmp_path / "freshness_state.json"
+
+    def sent_runs(invocation_id: str, status: str, age_hours: float) -> int:
+        state = IngestionState(file, fingerprint=status_fingerprint)
+        entities = map_freshness(context, freshness(invocation_id, result("orders", status, age_hours)))
+        changed = state.changed(entities)
+        state.save(changed)
+        return sum(entity.type == DataEntityType.JOB_RUN for entity in changed)
+
+    assert sent_runs("monday", "pass", age_hours=1) == 1
+    assert sent_runs("tuesday", "pass", age_hours=2) == 0
+    # Warned run is successful too, it is told apart by its status reason
+    assert sent_runs("wednesday", "warn", age_hours=13) == 1
+    assert sent_runs("thursday", "warn", age_hours=14) == 0
+    assert sent_runs("friday", "error", age_hours=25) == 1
@@ -0,0 +1,106 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from odd_models import DataEntity, DataEntityList
+from odd_models.models import DataEntityType
+
+from odd_dbt.config import create_odd_client
+from odd_dbt.errors import IngestionError
+from odd_dbt.service import odd
+
+DATA_SOURCE_ODDRN = "//dbt/host/localhost"
+
+
+class StubPlatform(ThreadingHTTPServer):
+    """ODD Platform answering ingestion requests with given statuses, then with 200"""
+
+    def __init__(self, statuses: list[int]) -> None:
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.statuses = list(statuses)
+        self.requests: list[dict] = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StubPlatform
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        self.server.requests.append(json.loads(self.rfile.read(int(self.headers["content-length"]))))
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        self.send_response(status)
+        self.send_header("content-length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+
+@pytest.fixture
+def platform(request):
+    server = StubPlatform(request.param)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def delays(monkeypatch) -> list[float]:
+    """Backoff delays, taken at their upper bound instead of sleeping"""
+    slept = []
+    monkeypatch.setattr(odd.random, "uniform", lambda low, high: high)
+    monkeypatch.setattr(odd.time, "sleep", slept.append)
+    return slept
+
+
+def entities(count: int = 3) -> DataEntityList:
+    return DataEntityList(
+        data_source_oddrn=DATA_SOURCE_ODDRN,
+        items=[
+            DataEntity(oddrn=f"{DATA_SOURCE_ODDRN}/tests/test_{i}", name=f"test_{i}", type=DataEntityType.JOB)
+            for i in range(count)
+        ],
+    )
+
+
+def ingest(platform: StubPlatform, retries: int) -> odd.IngestionSummary:
+    client = create_odd_client(host=platform.url, token="token")
+    return odd.ingest_entities(entities(), client, retries=retries)
+
+
+@pytest.mark.parametrize("platform", [[503, 429, 500]], indirect=True)
+def test_transient_errors_are_retried_with_backoff(platform, delays):
+    summary = ingest(platform, retries=3)
+
+    assert len(platform.requests) == 4
+    assert len(summary.ingested) == 3
+    assert delays == [odd.BACKOFF, odd.BACKOFF * 2, odd.BACKOFF * 4]
+
+
+@pytest.mark.parametrize("platform", [[400]], indirect=True)
+def test_client_errors_are_not_retried(platform, delays):
+    with pytest.raises(IngestionError):
+        ingest(platform, retries=3)
+
+    assert len(platform.requests) == 1
+    assert delays == []
+
+
+@pytest.mark.parametrize("platform", [[502, 502, 502]], indirect=True)
+def test_error_is_raised_when_retries_run_out(platform, delays):
+    with pytest.raises(IngestionError) as error:
+        ingest(platform, retries=2)
+
+    assert len(platform.requests) == 3
+    assert len(delays) == 2
+    summary = error.value.summary
+    assert summary.ingested == []
+    assert len(summary.failed) == 1
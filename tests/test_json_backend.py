@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+from odd_dbt.utils import json_backend
+
+
+@pytest.fixture(params=list(json_backend.JSON_BACKENDS))
+def backend(request):
+    previous = json_backend._loads
+    json_backend.set_backend(request.param)
+    yield request.param
+    json_backend._loads = previous
+
+
+def test_loads(backend):
+    assert json_backend.loads(b'{"results": [1, "a", null]}') == {"results": [1, "a", None]}
+
+
+def test_loads_falls_back_on_nan(backend):
+    # Python json module writes NaN and Infinity, i.e. to run_results.json of adapters returning them
+    data = json.dumps({"failures": float("nan"), "execution_time": float("inf")}).encode()
+
+    loaded = json_backend.loads(data)
+
+    assert loaded["failures"] != loaded["failures"]
+    assert loaded["execution_time"] == float("inf")
+
+
+def test_loads_raises_on_invalid_document(backend):
+    with pytest.raises(ValueError):
+        json_backend.loads(b'{"results": [')
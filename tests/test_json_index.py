@@ -0,0 +1,102 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from odd_dbt.domain import Manifest, StreamingManifest
+from odd_dbt.domain.context import ArtifactCache, OfflineDbtContext
+from odd_dbt.utils import json_index
+from odd_dbt.utils.json_index import load_json_index
+
+CREDENTIALS = {"host": "localhost", "database": "shop"}
+
+
+def node(name: str) -> dict:
+    return {
+        "unique_id": f"model.shop.{name}",
+        "name": name,
+        "description": f'Orders of "{name}" from C:\\exports\\{name}, доставка 🚚',
+        "raw_code": "select * from orders -- " + "x" * 200,
+        "tags": [],
+        "config": {"enabled": True, "meta": {}},
+        "columns": {"id": {"name": "id", "data_type": None}},
+    }
+
+
+MANIFEST = {
+    "metadata": {"adapter_type": "postgres", "invocation_id": "invocation"},
+    "nodes": {n["unique_id"]: n for n in map(node, ("stg_orders", "orders", "заказы"))},
+    "sources": {},
+    "parent_map": {"model.shop.orders": ["model.shop.stg_orders"]},
+    "child_map": {"model.shop.stg_orders": ["model.shop.orders"]},
+    "disabled": {"model.shop.old": [{"name": "old"}]},
+}
+
+FORMATS = {
+    "indented": dict(indent=2),
+    "compact": dict(separators=(",", ":")),
+    "non-ascii": dict(indent=1, ensure_ascii=False),
+}
+
+
+@pytest.fixture(params=FORMATS.values(), ids=FORMATS.keys())
+def manifest_file(request, tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps(MANIFEST, **request.param), encoding="utf-8")
+    return path
+
+
+# Windows smaller than an entry, entries crossing window boundary and the whole file
+@pytest.mark.parametrize("window", [8, 100, 1024 * 1024])
+def test_index_matches_json_load(manifest_file, window, monkeypatch):
+    monkeypatch.setattr(json_index, "_WINDOW", window)
+
+    loaded = load_json_index(
+        manifest_file, indexed=("nodes", "sources"), decoded=("metadata", "parent_map")
+    )
+
+    expected = json.loads(manifest_file.read_bytes())
+    assert dict(loaded["nodes"]) == expected["nodes"]
+    assert dict(loaded["sources"]) == expected["sources"]
+    assert loaded["metadata"] == expected["metadata"]
+    assert loaded["parent_map"] == expected["parent_map"]
+    assert "disabled" not in loaded
+
+
+def test_streaming_manifest_matches_manifest(manifest_file, monkeypatch):
+    monkeypatch.setattr(json_index, "_WINDOW", 100)
+
+    streaming, manifest = StreamingManifest(manifest_file), Manifest(manifest_file)
+
+    assert dict(streaming.raw_nodes) == manifest.raw_nodes
+    assert streaming.metadata == manifest.metadata
+    assert streaming.parent_map == manifest.parent_map
+    assert streaming.child_map == manifest.child_map
+
+
+@pytest.mark.parametrize("margin, loader", [(0, Manifest), (-1, StreamingManifest)])
+def test_manifest_bigger_than_threshold_is_streamed(manifest_file, margin, loader):
+    threshold = manifest_file.stat().st_size + margin
+    context = OfflineDbtContext(
+        manifest_file.parent,
+        CREDENTIALS,
+        target_path=manifest_file.parent,
+        cache=ArtifactCache(),
+        streaming_threshold=threshold,
+    )
+
+    assert type(context.manifest) is loader
+
+
+def test_streaming_threshold_is_read_from_environment():
+    process = subprocess.run(
+        [sys.executable, "-c", "from odd_dbt.domain.context import STREAMING_THRESHOLD; print(STREAMING_THRESHOLD)"],
+        env={**os.environ, "ODD_DBT_STREAMING_THRESHOLD": "1024"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert process.stdout.strip() == "1024"
@@ -0,0 +1,127 @@
+import json
+
+from odd_models.models import DataEntityType, Type
+
+from odd_dbt.domain.context import OfflineDbtContext
+from odd_dbt.libs.odd import create_dbt_generator_from_oddrn
+from odd_dbt.mapper.lineage import DbtLineageMapper
+
+CREDENTIALS = {"host": "localhost", "database": "shop"}
+
+
+def model(name: str) -> dict:
+    return {
+        "unique_id": f"model.shop.{name}",
+        "resource_type": "model",
+        "name": name,
+        "alias": name,
+        "package_name": "shop",
+        "database": "shop",
+        "schema": "public",
+        "path": f"{name}.sql",
+        "original_file_path": f"models/{name}.sql",
+        "fqn": ["shop", name],
+        "checksum": {"name": "sha256", "checksum": name},
+    }
+
+
+def write_manifest(target, parent_map=None) -> None:
+    nodes = {node["unique_id"]: node for node in map(model, ("stg_orders", "orders"))}
+    manifest = {
+        "metadata": {"adapter_type": "postgres", "invocation_id": "invocation"},
+        "nodes": nodes,
+        "sources": {},
+    }
+    if parent_map is not None:
+        manifest["parent_map"] = parent_map
+    target.mkdir()
+    (target / "manifest.json").write_text(json.dumps(manifest))
+
+
+def lineage_mapper(tmp_path) -> DbtLineageMapper:
+    context = OfflineDbtContext(tmp_path, CREDENTIALS, target_path=tmp_path / "target")
+    return DbtLineageMapper(context, create_dbt_generator_from_oddrn("//dbt/host/localhost"))
+
+
+def test_upstream_nodes_are_linked(tmp_path, warnings):
+    write_manifest(
+        tmp_path / "target",
+        {"model.shop.stg_orders": [], "model.shop.orders": ["model.shop.stg_orders"]},
+    )
+
+    entities = {entity.name: entity for entity in lineage_mapper(tmp_path).map().items}
+
+    assert entities["model.shop.orders"].data_transformer.inputs == [entities["model.shop.stg_orders"].oddrn]
+    assert warnings == []
+
+
+def test_missing_parent_map_is_reported(tmp_path, warnings):
+    write_manifest(tmp_path / "target")
+
+    entities = lineage_mapper(tmp_path).map().items
+
+    assert all(not entity.data_transformer.inputs for entity in entities)
+    assert any("parent_map" in message for message in warnings)
+
+
+def test_upstream_node_failed_to_map_is_reported(tmp_path, warnings, monkeypatch):
+    write_manifest(
+        tmp_path / "target",
+        {"model.shop.stg_orders": [], "model.shop.orders": ["model.shop.stg_orders"]},
+    )
+    mapper = lineage_mapper(tmp_path)
+    map_model = mapper.map_model
+
+    def fail_on_staging(node):
+        if node.name == "stg_orders":
+            raise ValueError("broken node")
+        return map_model(node)
+
+    monkeypatch.setattr(mapper, "map_model", fail_on_staging)
+    entities = mapper.map().items
+
+    assert [entity.name for entity in entities] == ["model.shop.orders"]
+    assert entities[0].data_transformer.inputs == [mapper.get_node_oddrn("model.shop.stg_orders")]
+    assert warnings == [
+        "Can't map node model.shop.stg_orders: broken node",
+        "1 upstream nodes failed to map and are linked by ODDRN only, i.e. model.shop.stg_orders",
+    ]
+
+
+def test_missing_upstreams_are_reported_once(tmp_path, warnings):
+    write_manifest(
+        tmp_path / "target",
+        {
+            "model.shop.stg_orders": ["operation.shop.hook", "snapshot.shop.deleted"],
+            "model.shop.orders": ["model.shop.stg_orders", "snapshot.shop.deleted"],
+        },
+    )
+
+    lineage_mapper(tmp_path).map()
+
+    assert warnings == [
+        "2 upstream nodes are not models, snapshots, seeds or sources and are not linked, "
+        "i.e. operation.shop.hook, snapshot.shop.deleted"
+    ]
+
+
+def test_model_columns_belong_to_materialized_table(tmp_path):
+    write_manifest(tmp_path / "target", {"model.shop.stg_orders": [], "model.shop.orders": []})
+    columns = {
+        "ID": {"name": "id", "type": "integer", "index": 1},
+        "TOTAL": {"name": "total", "type": "numeric(10,2)", "index": 2},
+    }
+    catalog = {"nodes": {"model.shop.orders": {"columns": columns}}, "sources": {}}
+    (tmp_path / "target" / "catalog.json").write_text(json.dumps(catalog))
+
+    entities = {entity.oddrn: entity for entity in lineage_mapper(tmp_path).map().items}
+
+    model = next(entity for entity in entities.values() if entity.name == "model.shop.orders")
+    (output,) = model.data_transformer.outputs
+    view = entities[output]
+    assert model.dataset is None
+    assert view.type == DataEntityType.VIEW
+    assert [(field.oddrn, field.type.type) for field in view.dataset.field_list] == [
+        (f"{output}/columns/id", Type.TYPE_INTEGER),
+        (f"{output}/columns/total", Type.TYPE_NUMBER),
+    ]
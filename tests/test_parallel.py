@@ -0,0 +1,36 @@
+import pytest
+
+from benchmarks import artifacts
+from benchmarks.suite import DBT_ODDRN, create_context
+from odd_dbt.libs.odd import create_dbt_generator_from_oddrn
+from odd_dbt.mapper.lineage import DbtLineageMapper
+from odd_dbt.mapper.parallel import SHARDS_PER_WORKER, shard
+from odd_dbt.mapper.test_results import DbtTestMapper
+
+
+@pytest.fixture(scope="module")
+def target(tmp_path_factory):
+    shape = artifacts.ProjectShape(models=40, seeds=4, sources=4)
+    return artifacts.write(shape, tmp_path_factory.mktemp("project") / "target")
+
+
+@pytest.mark.parametrize("mapper", [DbtTestMapper, DbtLineageMapper])
+def test_parallel_mapping_matches_serial(target, mapper):
+    def map_entities(workers: int) -> str:
+        generator = create_dbt_generator_from_oddrn(DBT_ODDRN)
+        return mapper(context=create_context(target), generator=generator, workers=workers).map().json()
+
+    assert map_entities(workers=3) == map_entities(workers=1)
+
+
+@pytest.mark.parametrize("count", [0, 1, 7, 100])
+def test_shards_are_ordered_and_contiguous(count):
+    items = list(range(count))
+
+    shards = list(shard(items, workers=3))
+
+    assert [item for part in shards for item in part] == items
+    assert all(shards)
+    assert len(shards) <= 3 * SHARDS_PER_WORKER
+    # Shards are of the same size, but the last one
+    assert len({len(part) for part in shards[:-1]}) <= 1
@@ -0,0 +1,42 @@
+import pstats
+
+from odd_dbt.utils.profiling import ProfileDump, Profiler
+
+
+def map_first_batch() -> int:
+    return sum(range(1000))
+
+
+def map_second_batch() -> int:
+    return sum(range(1000))
+
+
+def test_profile_dump_accumulates_parts(tmp_path):
+    path = tmp_path / "mapping.prof"
+
+    with ProfileDump(path) as profile:
+        with profile.part():
+            map_first_batch()
+        with profile.part():
+            map_second_batch()
+
+    functions = {name for _, _, name in pstats.Stats(str(path)).stats}
+    assert {"map_first_batch", "map_second_batch"} <= functions
+
+
+def test_spanned_function_is_measured_on_each_call():
+    profiler = Profiler()
+    profiler.enabled = True
+
+    @profiler.spanned("map")
+    def map_batch(size: int) -> int:
+        profiler.count("nodes", size)
+        return sum(range(size))
+
+    assert map_batch(10) == 45
+    map_batch(5)
+
+    span = profiler.spans["map"]
+    assert span.calls == 2
+    assert span.counters == {"nodes": 15}
+    assert map_batch.__name__ == "map_batch"
@@ -0,0 +1,64 @@
+import pytest
+
+from odd_dbt.domain.manifest import Manifest
+from odd_dbt.domain.selector import NodeSelector
+
+
+def node(uid: str, fqn: list[str], **fields) -> dict:
+    return {"unique_id": uid, "fqn": fqn, **fields}
+
+
+NODES = [
+    node("model.shop.stg_orders", ["shop", "staging", "stg_orders"], tags=["nightly"]),
+    node("model.shop.stg_customers", ["shop", "staging", "stg_customers"]),
+    node("model.shop.orders", ["shop", "marts", "orders"]),
+    node("model.utils.calendar", ["utils", "calendar"]),
+    node("test.shop.not_null_orders_id.abc", ["shop", "marts", "not_null_orders_id"]),
+]
+
+
+@pytest.fixture
+def selector() -> NodeSelector:
+    manifest = Manifest.from_dict(
+        {
+            "nodes": {item["unique_id"]: item for item in NODES},
+            "sources": {},
+            "parent_map": {
+                "model.shop.stg_orders": [],
+                "model.shop.stg_customers": [],
+                "model.shop.orders": ["model.shop.stg_orders", "model.shop.stg_customers"],
+                "model.utils.calendar": [],
+                "test.shop.not_null_orders_id.abc": ["model.shop.orders"],
+            },
+        }
+    )
+    return NodeSelector(manifest)
+
+
+@pytest.mark.parametrize(
+    "select, expected",
+    [
+        ("orders", {"model.shop.orders", "test.shop.not_null_orders_id.abc"}),
+        ("stg_*", {"model.shop.stg_orders", "model.shop.stg_customers"}),
+        # Package and folder select everything under them, as dbt does
+        ("utils", {"model.utils.calendar"}),
+        ("staging", {"model.shop.stg_orders", "model.shop.stg_customers"}),
+        ("shop.staging", {"model.shop.stg_orders", "model.shop.stg_customers"}),
+        ("marts.orders", {"model.shop.orders", "test.shop.not_null_orders_id.abc"}),
+        ("missing", set()),
+    ],
+)
+def test_fqn(selector, select, expected):
+    assert selector.select([select]) == expected
+
+
+def test_shop_package_selects_all_its_nodes(selector):
+    assert selector.select(["shop"]) == {uid for uid in (item["unique_id"] for item in NODES) if ".shop." in uid}
+
+
+def test_graph_and_exclude(selector):
+    assert selector.select(["+orders"], exclude=["tag:nightly"]) == {
+        "model.shop.orders",
+        "model.shop.stg_customers",
+        "test.shop.not_null_orders_id.abc",
+    }
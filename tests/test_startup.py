@@ -0,0 +1,8 @@
+from benchmarks.startup import BUDGET_MS, HEAVY_PACKAGES, MODULE, import_time
+
+
+def test_cli_module_imports_within_budget():
+    total, packages = import_time(MODULE)
+
+    assert not packages.intersection(HEAVY_PACKAGES)
+    assert total / 1000 <= BUDGET_MS
@@ -0,0 +1,78 @@
+from odd_models.models import (
+    DataEntity,
+    DataEntityType,
+    DataQualityTest,
+    DataQualityTestExpectation,
+    DataQualityTestRun,
+    QualityRunStatus,
+)
+
+from odd_dbt.service.state import IngestionState, status_fingerprint
+
+TEST_ODDRN = "//dbt/host/localhost/databases/db/tests/not_null_orders_id"
+
+
+def make_entities(invocation_id: str, status=QualityRunStatus.SUCCESS) -> list[DataEntity]:
+    test = DataEntity(
+        oddrn=TEST_ODDRN,
+        name="not_null_orders_id",
+        type=DataEntityType.JOB,
+        data_quality_test=DataQualityTest(
+            suite_name="not_null_orders_id",
+            dataset_list=["//postgresql/host/localhost/databases/db/schemas/public/tables/orders"],
+            expectation=DataQualityTestExpectation(type="not_null"),
+        ),
+    )
+    run = DataEntity(
+        oddrn=f"{TEST_ODDRN}/runs/{invocation_id}",
+        name="not_null_orders_id",
+        type=DataEntityType.JOB_RUN,
+        data_quality_test_run=DataQualityTestRun(
+            data_quality_test_oddrn=TEST_ODDRN,
+            start_time="2024-01-01T00:00:00+00:00",
+            end_time="2024-01-01T00:00:01+00:00",
+            status=status,
+        ),
+    )
+    return [test, run]
+
+
+def ingest(state: IngestionState, entities: list[DataEntity]) -> list[DataEntity]:
+    changed = state.changed(entities)
+    state.save(changed)
+    return changed
+
+
+def test_state_size_is_stable_across_invocations(tmp_path):
+    file = tmp_path / "state.json"
+
+    first = ingest(IngestionState(file), make_entities("invocation-1"))
+    size = file.stat().st_size
+    second = ingest(IngestionState(file), make_entities("invocation-2"))
+
+    assert file.stat().st_size == size
+    assert len(first) == 2
+    # Test is unchanged, the run of the new invocation is always sent
+    assert [entity.type for entity in second] == [DataEntityType.JOB_RUN]
+
+
+def test_run_keys_of_previous_versions_are_dropped(tmp_path):
+    file = tmp_path / "state.json"
+    file.write_text(f'{{"{TEST_ODDRN}/runs/invocation-0": "digest"}}')
+
+    ingest(IngestionState(file), make_entities("invocation-1"))
+
+    assert "/runs/" not in file.read_text()
+
+
+def test_status_fingerprint_sends_run_on_status_change(tmp_path):
+    file = tmp_path / "state.json"
+
+    def runs(invocation_id: str, status: QualityRunStatus) -> int:
+        state = IngestionState(file, fingerprint=status_fingerprint)
+        changed = ingest(state, make_entities(invocation_id, status))
+        return sum(entity.type == DataEntityType.JOB_RUN for entity in changed)
+
+    assert runs("invocation-1", QualityRunStatus.SUCCESS) == 1
+    assert runs("invocation-2", QualityRunStatus.SUCCESS) == 0
+    assert runs("invocation-3", QualityRunStatus.FAILED) == 1
@@ -0,0 +1,95 @@
+from typing import Optional
+
+import pytest
+from dbt.contracts.graph.nodes import GenericTestNode, TestMetadata
+
+from odd_dbt.mapper import status_reason
+from odd_dbt.mapper.status_reason import StatusReason, find_template, parse_model_name, register_reason
+
+MODEL = "{{ get_where_subquery(ref('orders')) }}"
+
+
+def generic_test(name: str, namespace: Optional[str] = None, **kwargs) -> GenericTestNode:
+    return GenericTestNode.from_dict(
+        {
+            "database": "shop",
+            "schema": "public",
+            "name": f"{name}_orders",
+            "resource_type": "test",
+            "package_name": "shop",
+            "path": f"{name}_orders.sql",
+            "original_file_path": "models/schema.yml",
+            "unique_id": f"test.shop.{name}_orders",
+            "fqn": ["shop", f"{name}_orders"],
+            "alias": f"{name}_orders",
+            "checksum": {"name": "none", "checksum": ""},
+            "test_metadata": {"name": name, "kwargs": {"model": MODEL, **kwargs}, "namespace": namespace},
+        }
+    )
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    """Templates registered by a test are dropped after it"""
+    monkeypatch.setattr(status_reason, "_TEMPLATES", dict(status_reason._TEMPLATES))
+    monkeypatch.setattr(status_reason, "_BY_NAME", dict(status_reason._BY_NAME))
+
+
+def test_template_is_found_by_namespace_then_by_name():
+    @register_reason("is_positive", "shop_tests")
+    def shop_template(test_metadata: TestMetadata) -> str:
+        return "shop"
+
+    @register_reason("is_positive", "other_tests")
+    def other_template(test_metadata: TestMetadata) -> str:
+        return "other"
+
+    def metadata(namespace: Optional[str]) -> TestMetadata:
+        return TestMetadata(name="is_positive", kwargs={}, namespace=namespace)
+
+    assert find_template(metadata("shop_tests")) is shop_template
+    assert find_template(metadata("other_tests")) is other_template
+    # Namespace without a template of its own falls back to the first one registered by name
+    assert find_template(metadata("unknown_tests")) is shop_template
+    assert find_template(TestMetadata(name="is_negative", kwargs={})) is None
+
+
+def test_reason_of_registered_test():
+    node = generic_test("unique", column_name="id")
+
+    assert StatusReason().get_reason(node) == "The column='id' in the model='orders' must be unique"
+
+
+def test_reason_of_package_test_falls_back_to_name():
+    node = generic_test("not_null", "dbt_utils", column_name="id")
+
+    assert "must not contain null values" in StatusReason().get_reason(node)
+
+
+def test_unknown_test_has_unknown_reason():
+    assert StatusReason().get_reason(generic_test("is_positive")) == "Unknown reason"
+
+
+def test_failed_template_has_unknown_reason(warnings):
+    @register_reason("is_positive")
+    def broken(test_metadata: TestMetadata) -> str:
+        raise KeyError("column_name")
+
+    assert StatusReason().get_reason(generic_test("is_positive")) == "Unknown reason"
+    assert any("test.shop.is_positive_orders" in message for message in warnings)
+
+
+@pytest.mark.parametrize(
+    "model_name, parsed",
+    [
+        (MODEL, "orders"),
+        ("{{ get_where_subquery(ref('shop', 'orders')) }}", "orders"),
+        ("source('raw', 'orders')", "orders"),
+        ("orders", "orders"),
+        (None, None),
+        # Kwargs which are not strings are returned as they are, without caching
+        (["orders", "customers"], ["orders", "customers"]),
+    ],
+)
+def test_model_name_is_parsed_from_relation(model_name, parsed):
+    assert parse_model_name(model_name) == parsed
@@ -0,0 +1,17 @@
+from types import SimpleNamespace
+
+from benchmarks import artifacts
+from benchmarks.suite import DBT_ODDRN, create_context
+from odd_dbt.domain import Result
+from odd_dbt.libs.odd import create_dbt_generator_from_oddrn
+from odd_dbt.mapper.test_results import DbtTestMapper
+
+
+def test_unknown_test_node_type_is_skipped(tmp_path, warnings):
+    target = artifacts.write(artifacts.ProjectShape(models=2, seeds=1, sources=1), tmp_path / "target")
+    mapper = DbtTestMapper(context=create_context(target), generator=create_dbt_generator_from_oddrn(DBT_ODDRN))
+    result = Result({"unique_id": "test.bench.check_orders", "status": "pass"})
+    node = SimpleNamespace(unique_id=result.unique_id, test_node_type="unit")
+
+    assert mapper.map_result(result, {result.unique_id: node}) is None
+    assert any("test.bench.check_orders" in message and "unit" in message for message in warnings)
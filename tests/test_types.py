@@ -0,0 +1,27 @@
+import pytest
+from odd_models.models import Type
+
+from odd_dbt.mapper.types import parse_type
+
+
+@pytest.mark.parametrize(
+    "data_type, expected",
+    [
+        ("integer", Type.TYPE_INTEGER),
+        ("character varying(255)", Type.TYPE_STRING),
+        ("NUMERIC(10, 2)", Type.TYPE_NUMBER),
+        ("timestamp with time zone", Type.TYPE_DATETIME),
+        ("timestamp without time zone", Type.TYPE_DATETIME),
+        ("TIMESTAMP WITH LOCAL TIME ZONE", Type.TYPE_DATETIME),
+        ("time  with   time zone", Type.TYPE_TIME),
+        ("integer[]", Type.TYPE_LIST),
+        ("ARRAY<STRING>", Type.TYPE_LIST),
+        ("STRUCT<id INT64, name STRING>", Type.TYPE_STRUCT),
+        ("int unsigned", Type.TYPE_INTEGER),
+        ("geometry", Type.TYPE_UNKNOWN),
+        ("", Type.TYPE_UNKNOWN),
+        (None, Type.TYPE_UNKNOWN),
+    ],
+)
+def test_database_types_are_normalized(data_type, expected):
+    assert parse_type(data_type) == expected